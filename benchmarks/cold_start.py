@@ -0,0 +1,155 @@
+"""
+בנצ'מרק להפעלה קרה: הזמן עד שהעמוד הראשון של האפליקציה מוצג
+
+כל מדידה רצה בתהליך Python חדש (ללא מודולים במטמון של התהליך), מריצה את
+src/app.py פעם אחת דרך AppTest של Streamlit ומודדת את הזמן מתחילת התהליך
+ועד סיום ההרצה. החציון מושווה לקובץ הבסיס, וחריגה מעבר לסף נכשלת.
+
+נמדד תהליך הממשק בלבד: האפליקציה רצה בלי תהליכי עבודה (jobs.workers = 0),
+כך שהמודלים לא נטענים ברקע ולא משפיעים על הזמן והזיכרון. בנוסף נבדק אילו
+ספריות נטענו בתהליך הממשק, גם אחרי שהחימום ברקע הסתיים: ספריות התמלול
+והסיכום שייכות לתהליכי העבודה, וטעינה שלהן כאן נכשלת.
+
+שימוש:
+    python benchmarks/cold_start.py                    # השוואה לבסיס
+    python benchmarks/cold_start.py --update-baseline  # שמירת התוצאה כבסיס חדש
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "src" / "app.py"
+BASELINE_PATH = Path(__file__).parent / "cold_start_baseline.json"
+# סימון שורת התוצאה - הלוגים של האפליקציה נכתבים גם הם לפלט התקני
+RESULT_PREFIX = "COLD_START "
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_TIMEOUT_SECONDS = 60
+
+# הספריות שאסור שיהיו תנאי להצגת העמוד הראשון
+HEAVY_MODULES = ("faster_whisper", "google.generativeai", "av")
+# הספריות של תהליכי העבודה - אסור שייטענו בתהליך הממשק כלל, גם לא בחימום
+WORKER_ONLY_MODULES = ("faster_whisper", "google.generativeai")
+
+
+def _child(workdir: Path, timeout: float) -> None:
+    """מדידה אחת - רצה בתהליך נפרד ומדפיסה JSON"""
+    started = time.perf_counter()
+    sys.path.insert(0, str(APP_PATH.parent))
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    app.secrets["api_keys"] = {"gemini": "offline"}
+    app.secrets["file_settings"] = {"max_size_mb": 200, "supported_formats": ["mp4"]}
+    app.secrets["models"] = {"whisper": "tiny"}
+    # בלי תהליכי עבודה - רק הממשק נמדד
+    app.secrets["jobs"] = {"db_path": str(workdir / "jobs.db"), "workers": 0}
+    app.run()
+    elapsed = time.perf_counter() - started
+
+    if app.exception:
+        raise SystemExit(f"האפליקציה נכשלה: {app.exception}")
+    # ספריות שכבר נטענו כשהעמוד הוצג - בדרך כלל בחימום ברקע, לא בנתיב ההצגה
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from utils.warmup import get_warmup
+
+    warmup = get_warmup()
+    if warmup is None or not warmup.wait(timeout):
+        raise SystemExit("החימום ברקע לא הסתיים")
+
+    import psutil
+    print(RESULT_PREFIX + json.dumps({
+        "seconds": round(elapsed, 4),
+        "peak_rss_mb": round(psutil.Process().memory_info().rss / (1024 * 1024), 1),
+        "loaded_heavy_modules": loaded,
+        "worker_modules_loaded": [name for name in WORKER_ONLY_MODULES if name in sys.modules],
+        "worker_processes": len(psutil.Process().children(recursive=True))
+    }), flush=True)
+
+
+def measure_cold_start(repeat: int, timeout: float) -> Dict[str, object]:
+    """הרצת repeat תהליכים חדשים - הזמן החציוני ושיא הזיכרון המרבי"""
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", workdir, "--timeout", str(timeout)],
+                cwd=workdir,
+                capture_output=True,
+                text=True,
+                check=True
+            ).stdout
+            line = next(l for l in output.splitlines() if l.startswith(RESULT_PREFIX))
+            run = json.loads(line[len(RESULT_PREFIX):])
+            run["process_seconds"] = round(time.perf_counter() - started, 4)
+            runs.append(run)
+
+    return {
+        "seconds": round(statistics.median(r["seconds"] for r in runs), 4),
+        "process_seconds": round(statistics.median(r["process_seconds"] for r in runs), 4),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        "loaded_heavy_modules": runs[-1]["loaded_heavy_modules"],
+        "worker_modules_loaded": sorted({name for r in runs for name in r["worker_modules_loaded"]}),
+        "worker_processes": max(r["worker_processes"] for r in runs)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="בנצ'מרק להפעלה קרה של האפליקציה")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--child", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child, args.timeout)
+        return 0
+
+    from run import compare, host_info
+
+    results = {"cold_start": measure_cold_start(args.repeat, args.timeout)}
+    print(json.dumps(results, indent=2))
+
+    worker_modules = results["cold_start"]["worker_modules_loaded"]
+    if worker_modules:
+        print(f"ספריות של תהליכי העבודה נטענו בתהליך הממשק: {', '.join(worker_modules)}")
+        return 1
+    if results["cold_start"]["worker_processes"]:
+        print("תהליכי עבודה הופעלו במדידת הממשק")
+        return 1
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps({
+            "host": host_info(),
+            "results": results
+        }, indent=2) + "\n")
+        print(f"הבסיס נשמר ב-{args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"אין קובץ בסיס ב-{args.baseline} - יש להריץ תחילה עם --update-baseline")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("host") != host_info():
+        print("אזהרה: הבסיס נמדד על מחשב אחר")
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    for line in regressions:
+        print(f"נסיגה: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
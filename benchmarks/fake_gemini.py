@@ -0,0 +1,98 @@
+"""
+תחליף מקומי ל-Gemini - ללא רשת, עם השהיה מדומה ותשובה דטרמיניסטית
+
+אפשר להזריק שגיאות 429 באקראי (error_rate) או כשחורגים ממכסת בקשות
+לשנייה (quota_per_second), כמו השרת האמיתי תחת עומס.
+"""
+from collections import deque
+import asyncio
+import hashlib
+import random
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeRateLimitError(Exception):
+    """כמו google.api_core.exceptions.ResourceExhausted"""
+    code = 429
+
+
+class FakeGeminiClient:
+    def __init__(
+        self,
+        latency_seconds: float = 0.05,
+        summary_words: int = 60,
+        jitter_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        quota_per_second: int = 0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency_seconds: השהיה מדומה לכל בקשה
+            summary_words: אורך התשובה במילים
+            jitter_seconds: תוספת אקראית מרבית להשהיה
+            error_rate: החלק מהבקשות שנכשל ב-429
+            quota_per_second: בקשות מעבר למכסה בחלון של שנייה נכשלות ב-429 (0 - ללא מכסה)
+            seed: זרע האקראיות, לריצות חוזרות זהות
+        """
+        self.latency_seconds = latency_seconds
+        self.summary_words = summary_words
+        self.jitter_seconds = jitter_seconds
+        self.error_rate = error_rate
+        self.quota_per_second = quota_per_second
+        self.calls = 0
+        self.rejected = 0
+        self.active = 0
+        self.peak_active = 0
+        self._random = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def _latency(self) -> float:
+        with self._lock:
+            return self.latency_seconds + self._random.uniform(0, self.jitter_seconds)
+
+    def _admit(self) -> None:
+        """ספירת הבקשה, או 429 אם היא חורגת מהמכסה"""
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            over_quota = self.quota_per_second and len(self._recent) >= self.quota_per_second
+            if over_quota or self._random.random() < self.error_rate:
+                self.rejected += 1
+                raise FakeRateLimitError("429 Resource has been exhausted")
+            self._recent.append(now)
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.active -= 1
+
+    def _respond(self, prompt: str) -> FakeResponse:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return FakeResponse(" ".join(digest[i % 56:i % 56 + 8] for i in range(self.summary_words)))
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        self._admit()
+        try:
+            time.sleep(self._latency())
+        finally:
+            self._release()
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt: str) -> FakeResponse:
+        self._admit()
+        try:
+            await asyncio.sleep(self._latency())
+        finally:
+            self._release()
+        return self._respond(prompt)
@@ -0,0 +1,78 @@
+"""יצירת קבצי בדיקה סינתטיים ודטרמיניסטיים לבנצ'מרק"""
+from pathlib import Path
+from typing import Dict, List
+
+import av
+import numpy as np
+
+SAMPLE_RATE = 16000
+VIDEO_SAMPLE_RATE = 44100
+DEFAULT_LENGTHS = [30, 120, 600]
+FIXTURES_DIR = Path(__file__).parent / ".fixtures"
+
+
+def synthetic_audio(seconds: int, sampling_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """
+    אות דמוי דיבור: פרצי צלילים מאופננים עם רעש, מופרדים בשקט, עם זרע קבוע
+    כך שכל הרצה מקבלת בדיוק אותן דגימות
+    """
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(seconds * sampling_rate, dtype=np.float32)
+    position = 0
+    while position < len(audio):
+        burst = int(rng.uniform(1.0, 4.0) * sampling_rate)
+        pause = int(rng.uniform(0.3, 1.5) * sampling_rate)
+        t = np.arange(min(burst, len(audio) - position)) / sampling_rate
+        pitch = rng.uniform(100, 250)
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(2, 6) * t))
+        voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        noise = rng.normal(0, 0.05, len(t))
+        audio[position:position + len(t)] = (0.2 * envelope * voice + noise).astype(np.float32)
+        position += burst + pause
+    return np.clip(audio, -1.0, 1.0)
+
+
+def write_video(path: Path, audio: np.ndarray, sampling_rate: int = SAMPLE_RATE) -> None:
+    """קובץ MP4 עם וידאו שחור קטן (1 פריים לשנייה) וערוץ אודיו AAC"""
+    seconds = len(audio) / sampling_rate
+    upsampled = np.interp(
+        np.arange(int(seconds * VIDEO_SAMPLE_RATE)) * sampling_rate / VIDEO_SAMPLE_RATE,
+        np.arange(len(audio)),
+        audio
+    ).astype(np.float32)
+
+    with av.open(str(path), "w") as container:
+        video = container.add_stream("mpeg4", rate=1)
+        video.width, video.height, video.pix_fmt = 64, 64, "yuv420p"
+        sound = container.add_stream("aac", rate=VIDEO_SAMPLE_RATE)
+        sound.layout = "mono"
+
+        black = np.zeros((64, 64, 3), dtype=np.uint8)
+        for second in range(int(np.ceil(seconds))):
+            frame = av.VideoFrame.from_ndarray(black, format="rgb24")
+            frame.pts = second
+            container.mux(video.encode(frame))
+        container.mux(video.encode())
+
+        frame_size = 1024
+        for pts in range(0, len(upsampled), frame_size):
+            chunk = upsampled[pts:pts + frame_size].reshape(1, -1)
+            frame = av.AudioFrame.from_ndarray(chunk, format="flt", layout="mono")
+            frame.sample_rate = VIDEO_SAMPLE_RATE
+            frame.pts = pts
+            container.mux(sound.encode(frame))
+        container.mux(sound.encode())
+
+
+def ensure_fixtures(lengths: List[int] = DEFAULT_LENGTHS, directory: Path = FIXTURES_DIR) -> Dict[int, Path]:
+    """יצירת קבצי הווידאו לכל אורך (פעם אחת - קבצים קיימים נשמרים)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    fixtures = {}
+    for seconds in lengths:
+        path = directory / f"synthetic_{seconds}s.mp4"
+        if not path.exists():
+            tmp = path.with_suffix(".tmp.mp4")
+            write_video(tmp, synthetic_audio(seconds, seed=seconds))
+            tmp.replace(path)
+        fixtures[seconds] = path
+    return fixtures
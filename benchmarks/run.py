@@ -0,0 +1,162 @@
+"""
+בנצ'מרק לשלבי העיבוד: חילוץ אודיו, תמלול וסיכום
+
+לכל אורך קובץ נמדדים זמן, מקדם זמן-אמת (זמן עיבוד חלקי אורך המדיה) ושיא
+זיכרון (RSS) לכל שלב, ומושווים לקובץ הבסיס. חריגה מעבר לסף נכשלת.
+
+הבנצ'מרק רץ ללא רשת: הסיכום משתמש בתחליף מקומי ל-Gemini (גם בגרסה שמחזירה
+429 בחלק מהבקשות, דרך הלקוח המשותף עם הניסיונות החוזרים), ומודל ה-Whisper
+צריך להיות במטמון של HuggingFace או בנתיב מקומי (HF_HUB_OFFLINE=1).
+
+שימוש:
+    python benchmarks/run.py                    # השוואה לבסיס
+    python benchmarks/run.py --update-baseline  # שמירת התוצאות כבסיס חדש
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fixtures import DEFAULT_LENGTHS, ensure_fixtures  # noqa: E402
+from fake_gemini import FakeGeminiClient  # noqa: E402
+from utils.llm_client import LLMClient, LLMSettings  # noqa: E402
+from utils.audio import audio_duration_seconds  # noqa: E402
+from utils.metrics import PeakMemorySampler  # noqa: E402
+from utils.processor import MediaProcessor  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.2
+
+# מדדים שנבדקים מול הבסיס (ערך גבוה יותר = גרוע יותר)
+GATED_METRICS = ("seconds", "peak_rss_mb")
+
+
+def measure(stage: Callable[[], object], repeat: int) -> Tuple[object, float, int]:
+    """הרצת שלב מספר פעמים - זמן חציוני ושיא הזיכרון המרבי"""
+    durations, peaks, result = [], [], None
+    for _ in range(repeat):
+        with PeakMemorySampler() as sampler:
+            started = time.perf_counter()
+            result = stage()
+            durations.append(time.perf_counter() - started)
+        peaks.append(sampler.peak)
+    return result, statistics.median(durations), max(peaks)
+
+
+def run_benchmarks(model: str, lengths: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """הרצת כל השלבים על כל הקבצים"""
+    logger = logging.getLogger("benchmark")
+    processor = MediaProcessor(model, "offline", logger)
+    # ללא הגבלת קצב - הבנצ'מרק מודד את העיבוד, לא את המכסה
+    settings = LLMSettings(requests_per_minute=0, backoff_base_seconds=0.05)
+    processor.gemini_model = LLMClient(FakeGeminiClient, settings)
+    # אותו תחליף עם 429 בחמישית מהבקשות - מודד את עלות הניסיונות החוזרים
+    throttled = LLMClient(lambda: FakeGeminiClient(error_rate=0.2, seed=1), settings)
+    # טעינת המודל מחוץ למדידה
+    processor.whisper_model
+
+    results = {}
+    for seconds, path in ensure_fixtures(lengths).items():
+        audio, convert_time, convert_peak = measure(lambda: processor.convert_to_audio(path), repeat)
+        media_seconds = audio_duration_seconds(audio)
+        segments, transcribe_time, transcribe_peak = measure(
+            lambda: list(processor.transcribe_segments(audio)), repeat
+        )
+        summary, summarize_time, summarize_peak = measure(
+            lambda: processor.summarize_text(segments), repeat
+        )
+        processor.gemini_model, clean_client = throttled, processor.gemini_model
+        throttled_summary, throttled_time, throttled_peak = measure(
+            lambda: processor.summarize_text(segments), repeat
+        )
+        processor.gemini_model = clean_client
+        if throttled_summary != summary:
+            raise RuntimeError("הסיכום עם שגיאות 429 שונה מהסיכום ללא שגיאות")
+        processor.cleanup()
+
+        for stage, elapsed, peak in (
+            ("convert", convert_time, convert_peak),
+            ("transcribe", transcribe_time, transcribe_peak),
+            ("summarize", summarize_time, summarize_peak),
+            ("summarize_429", throttled_time, throttled_peak)
+        ):
+            results[f"{stage}/{seconds}s"] = {
+                "seconds": round(elapsed, 4),
+                "rtf": round(elapsed / media_seconds, 5),
+                "peak_rss_mb": round(peak / (1024 * 1024), 1)
+            }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """רשימת החריגות מהבסיס מעבר לסף"""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in GATED_METRICS:
+            limit = reference[metric] * (1 + threshold)
+            if current[metric] > limit:
+                regressions.append(
+                    f"{key} {metric}: {current[metric]} > {reference[metric]} (+{threshold:.0%})"
+                )
+    return regressions
+
+
+def host_info() -> Dict[str, object]:
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": psutil.cpu_count(),
+        "python": platform.python_version()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="בנצ'מרק לשלבי העיבוד")
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--lengths", type=int, nargs="+", default=DEFAULT_LENGTHS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.model, args.lengths, args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps({
+            "host": host_info(),
+            "model": args.model,
+            "results": results
+        }, indent=2) + "\n")
+        print(f"הבסיס נשמר ב-{args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"אין קובץ בסיס ב-{args.baseline} - יש להריץ תחילה עם --update-baseline")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("host") != host_info():
+        print("אזהרה: הבסיס נמדד על מחשב אחר")
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    for line in regressions:
+        print(f"נסיגה: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
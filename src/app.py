@@ -5,16 +5,41 @@ import streamlit as st
 import os
 from pathlib import Path
 import json
-import torch
 import psutil
 import sys
+import time
+from datetime import datetime
+from typing import Any, Dict
 from components.file_uploader import file_uploader_component
 from components.progress_tracker import ProgressTracker
+from components.archive_search import archive_search_component
+from components.warmup_status import warmup_status_component
+from components.result_view import transcript_view_component, download_component
 from utils.processor import MediaProcessor
+from utils.job_queue import (
+    JobQueue,
+    AdmissionError,
+    get_worker_pool,
+    MIN_AVAILABLE_MEMORY_BYTES,
+    MIN_FREE_DISK_BYTES,
+    POLL_INTERVAL_SECONDS
+)
 from utils.logger import setup_logger, log_system_info
+from utils.audio import probe_duration
+from utils.metrics import TimeEstimator, get_metrics_recorder
+from utils.pipeline import estimate_stages
+from utils.scratch import ScratchQuotaError, get_scratch_manager
+from utils.segment_store import get_segment_store
+from utils.export import ResultFile, DEFAULT_RESULTS_DIR, RESULT_SUFFIX
+from utils.warmup import start_warmup, import_heavy_modules
+from utils.segments import TranscriptSegment
 
-# הגדרת מערכת הלוגים
-logger = setup_logger()
+# הגדרת מערכת הלוגים (פעם אחת לתהליך - הקובץ רץ מחדש בכל אינטראקציה)
+try:
+    LOG_SETTINGS = dict(st.secrets.get("logging", {}))
+except Exception:
+    LOG_SETTINGS = {}
+logger = setup_logger("app", LOG_SETTINGS)
 logger.info("=== התחלת ריצת האפליקציה ===")
 
 def check_system_resources():
@@ -24,24 +49,15 @@ def check_system_resources():
     
     warnings = []
     
-    if memory.available < 4 * 1024 * 1024 * 1024:  # 4GB
+    # אותם ספים משמשים את בקרת הכניסה של תור העבודות
+    if memory.available < MIN_AVAILABLE_MEMORY_BYTES:
         warnings.append("זיכרון פנוי נמוך - מומלץ לפחות 4GB")
     
-    if disk.free < 1 * 1024 * 1024 * 1024:  # 1GB
+    if disk.free < MIN_FREE_DISK_BYTES:
         warnings.append("שטח דיסק פנוי נמוך - מומלץ לפחות 1GB")
         
     return warnings
 
-# יצירת תיקיית temp אם לא קיימת
-try:
-    temp_dir = Path("temp")
-    temp_dir.mkdir(exist_ok=True)
-    logger.info("תיקיית temp נוצרה בהצלחה")
-except Exception as e:
-    logger.error(f"שגיאה ביצירת תיקיית temp: {str(e)}")
-    st.error(f"שגיאה ביצירת תיקיית temp: {str(e)}")
-    sys.exit(1)
-
 # בדיקת הגדרות Streamlit Secrets
 try:
     logger.info("טוען הגדרות מערכת...")
@@ -49,6 +65,51 @@ try:
     MAX_FILE_SIZE_MB = st.secrets["file_settings"]["max_size_mb"]
     SUPPORTED_FORMATS = st.secrets["file_settings"]["supported_formats"]
     WHISPER_MODEL = st.secrets["models"]["whisper"]
+    MODEL_MEMORY_BUDGET_MB = st.secrets["models"].get("memory_budget_mb")
+    PARALLEL_WORKERS = st.secrets["models"].get("parallel_workers", 1)
+    INFERENCE_BATCH_SIZE = st.secrets["models"].get("inference_batch_size", 0)
+    INFERENCE_MAX_WAIT_MS = st.secrets["models"].get("inference_max_wait_ms")
+    CACHE_DIR = st.secrets.get("cache", {}).get("dir")
+    CACHE_MAX_SIZE_MB = st.secrets.get("cache", {}).get("max_size_mb")
+    METRICS_DIR = st.secrets.get("metrics", {}).get("dir")
+    # כבוי כברירת מחדל - תמלול עם יומן רץ במקטעים ברצף ועוקף את התמלול המקבילי ואת שירות ההסקה
+    CHECKPOINT_DIR = st.secrets.get("checkpoints", {}).get("dir")
+    STORE_DIR = st.secrets.get("archive", {}).get("dir")
+    RESULTS_DIR = st.secrets.get("results", {}).get("dir")
+    VAD_SETTINGS = dict(st.secrets.get("vad", {}))
+    LLM_SETTINGS = dict(st.secrets.get("llm", {}))
+    SCRATCH_SETTINGS = st.secrets.get("scratch", {})
+    SCRATCH_DIR = SCRATCH_SETTINGS.get("dir")
+    SCRATCH_QUOTA_MB = SCRATCH_SETTINGS.get("quota_mb")
+    SCRATCH_RAM_DIR = SCRATCH_SETTINGS.get("ram_dir")
+    SCRATCH_RAM_MAX_MB = SCRATCH_SETTINGS.get("ram_max_mb")
+    JOBS_DB_PATH = st.secrets.get("jobs", {}).get("db_path")
+    JOB_WORKERS = st.secrets.get("jobs", {}).get("workers")
+    JOB_CONCURRENCY = st.secrets.get("jobs", {}).get("concurrency", 1)
+    
+    # הגדרות המודלים של תהליכי העבודה
+    WORKER_CONFIG = {
+        "whisper_model": WHISPER_MODEL,
+        "gemini_api_key": GEMINI_API_KEY,
+        "memory_budget_mb": MODEL_MEMORY_BUDGET_MB,
+        "parallel_workers": PARALLEL_WORKERS,
+        "inference_batch_size": INFERENCE_BATCH_SIZE,
+        "inference_max_wait_ms": INFERENCE_MAX_WAIT_MS,
+        "concurrency": JOB_CONCURRENCY,
+        "cache_dir": CACHE_DIR,
+        "cache_max_size_mb": CACHE_MAX_SIZE_MB,
+        "metrics_dir": METRICS_DIR,
+        "checkpoint_dir": CHECKPOINT_DIR,
+        "vad": VAD_SETTINGS,
+        "llm": LLM_SETTINGS,
+        "logging": LOG_SETTINGS,
+        "store_dir": STORE_DIR,
+        "results_dir": RESULTS_DIR,
+        "scratch_dir": SCRATCH_DIR,
+        "scratch_quota_mb": SCRATCH_QUOTA_MB,
+        "scratch_ram_dir": SCRATCH_RAM_DIR,
+        "scratch_ram_max_mb": SCRATCH_RAM_MAX_MB
+    }
     logger.info("הגדרות נטענו בהצלחה")
 except Exception as e:
     logger.error(f"שגיאה בטעינת הגדרות: {str(e)}")
@@ -81,10 +142,97 @@ else:
     logger.warning("קובץ CSS לא נמצא")
     st.warning("קובץ CSS לא נמצא. חלק מהעיצוב עלול להיות חסר.")
 
+def job_results(job: Dict[str, Any]) -> ResultFile:
+    """קובץ התוצאות של עבודה שהושלמה"""
+    result = job["result"]
+    if "results_path" in result:
+        return ResultFile(Path(result["results_path"]))
+    # עבודה שהושלמה לפני שהתוצאות נכתבו לקובץ - הקובץ נכתב פעם אחת מהתוצאה בתור
+    results = ResultFile(Path(RESULTS_DIR or DEFAULT_RESULTS_DIR) / f"{job['id']}{RESULT_SUFFIX}")
+    if not results.exists():
+        segments = [TranscriptSegment.from_dict(item) for item in result["segments"]]
+        results = ResultFile.write(results.path, segments, result["summary"])
+    return results
+
+def render_job(jobs: JobQueue, job_id: str) -> None:
+    """מעקב אחר עבודה בתור והצגת התוצאות כשהיא מסתיימת"""
+    job = jobs.get(job_id)
+    if job is None:
+        st.warning("העבודה לא נמצאה")
+        return
+        
+    # יצירת עוקב התקדמות
+    progress = ProgressTracker()
+    progress.start_time = datetime.fromtimestamp(job["created"])
+    status = st.empty()
+    
+    # יצירת סרגלי התקדמות
+    progress.create_progress_bar("convert", "ממיר וידאו לאודיו...")
+    progress.create_progress_bar("transcribe", "מתמלל...")
+    progress.create_progress_bar("summarize", "מסכם...")
+    progress.create_preview("transcribe")
+    
+    # העיבוד רץ בתהליך עבודה; הסקריפט רק מציג את מצבו ולכן הרצה חוזרת לא עוצרת אותו
+    while job["status"] in ("queued", "running"):
+        if job["status"] == "queued":
+            status.info(f"ממתין בתור (מקום {job['queue_position'] + 1})")
+        else:
+            status.info("בעיבוד...")
+            
+        for stage, stage_progress in job["progress"].items():
+            progress.update_progress(stage, stage_progress["progress"], stage_progress["message"])
+        progress.update_preview("transcribe", jobs.recent_segments(job_id, 15), force=True)
+        
+        time.sleep(POLL_INTERVAL_SECONDS)
+        job = jobs.get(job_id)
+        
+    status.empty()
+    progress.clear_preview("transcribe")
+    for stage, stage_progress in job["progress"].items():
+        progress.update_progress(stage, stage_progress["progress"], stage_progress["message"])
+    progress.end_time = datetime.fromtimestamp(job["updated"])
+    
+    if job["status"] == "failed":
+        logger.error(f"שגיאה במהלך העיבוד: {job['error']}")
+        st.error(f"אירעה שגיאה במהלך העיבוד: {job['error']}")
+        progress.display_completion(False)
+        return
+        
+    results = job_results(job)
+    if not results.exists():
+        st.error("קובץ התוצאות של העבודה לא נמצא")
+        return
+    
+    # הצגת התוצאות
+    st.markdown(
+        """
+        <div class="results-container">
+            <h2>תוצאות העיבוד</h2>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    
+    st.subheader("📝 תמלול")
+    transcript_view_component(results, job_id)
+    
+    st.subheader("📋 סיכום")
+    st.write(results.summary)
+    
+    # הורדה - רק הפורמט שנבחר נוצר מקובץ התוצאות
+    download_component(results, job_id)
+    
+    # הצגת סיום
+    progress.display_completion()
+
 def main():
     try:
-        # תיעוד מידע מערכת
-        log_system_info(logger)
+        # חימום ברקע, פעם אחת לתהליך: מידע מערכת וייבוא av לבדיקת הקבצים
+        # (תהליכי העבודה טוענים את Whisper ואת Gemini מיד כשהם עולים)
+        warmup = start_warmup([
+            ("מידע מערכת", lambda: log_system_info(logger)),
+            ("ספריות", import_heavy_modules)
+        ], logger)
         
         # בדיקת משאבי מערכת
         system_warnings = check_system_resources()
@@ -104,117 +252,95 @@ def main():
             unsafe_allow_html=True
         )
         
+        # חיפוש בכל התמלולים שעובדו
+        store = get_segment_store(STORE_DIR, logger)
+        archive_search_component(store)
+        
         # בדיקת מפתח API
         if not GEMINI_API_KEY:
             logger.error("מפתח API של Gemini לא הוגדר")
             st.error("נא להגדיר מפתח API של Gemini בהגדרות האפליקציה")
             return
             
-        # יצירת מעבד המדיה
+        # מאגר תהליכי העבודה - נוצר פעם אחת לתהליך ומחזיק את המודלים
         try:
-            processor = MediaProcessor(WHISPER_MODEL, GEMINI_API_KEY, logger)
+            jobs = get_worker_pool(WORKER_CONFIG, JOBS_DB_PATH, JOB_WORKERS, logger).queue
         except Exception as e:
-            logger.error(f"שגיאה באתחול מעבד המדיה: {str(e)}")
-            st.error(f"שגיאה באתחול מעבד המדיה: {str(e)}")
+            logger.error(f"שגיאה בהפעלת תהליכי העבודה: {str(e)}")
+            st.error(f"שגיאה בהפעלת תהליכי העבודה: {str(e)}")
             return
         
+        # השטח הזמני - העלאות של עבודות פעילות לא מפונות
+        scratch = get_scratch_manager(
+            SCRATCH_DIR,
+            SCRATCH_QUOTA_MB,
+            SCRATCH_RAM_DIR,
+            SCRATCH_RAM_MAX_MB,
+            jobs.active_inputs,
+            logger
+        )
+        
+        warmup_status_component(warmup.status(), jobs.worker_states())
+        
         # העלאת קובץ
         try:
-            uploaded_file = file_uploader_component(SUPPORTED_FORMATS, MAX_FILE_SIZE_MB)
+            uploaded_file = file_uploader_component(SUPPORTED_FORMATS, MAX_FILE_SIZE_MB, scratch)
+        except ScratchQuotaError as e:
+            logger.warning(str(e))
+            st.warning(str(e))
+            return
         except Exception as e:
             logger.error(f"שגיאה בהעלאת הקובץ: {str(e)}")
             st.error(f"שגיאה בהעלאת הקובץ: {str(e)}")
             return
         
+        job_id = st.session_state.get("job_id") or st.query_params.get("job")
+        if not uploaded_file and not job_id:
+            return
+            
+        # יצירת מעבד המדיה - רק כשיש קובץ או עבודה, כדי שהעמוד הראשון לא ימתין לו
+        try:
+            processor = MediaProcessor(
+                WHISPER_MODEL,
+                GEMINI_API_KEY,
+                logger,
+                memory_budget_mb=MODEL_MEMORY_BUDGET_MB,
+                parallel_workers=PARALLEL_WORKERS,
+                scratch=scratch
+            )
+        except Exception as e:
+            logger.error(f"שגיאה באתחול מעבד המדיה: {str(e)}")
+            st.error(f"שגיאה באתחול מעבד המדיה: {str(e)}")
+            return
+        
         if uploaded_file:
             logger.info(f"קובץ הועלה: {uploaded_file}")
             
-            # יצירת עוקב התקדמות
-            progress = ProgressTracker()
-            
-            # הצגת הערכת זמן
+            # הצגת הערכת זמן לפי הזמנים שנמדדו בעבודות קודמות
             file_size_mb = uploaded_file.stat().st_size / (1024 * 1024)
-            logger.info(f"גודל הקובץ: {file_size_mb:.1f}MB")
-            progress.display_time_estimate(file_size_mb, torch.cuda.is_available())
+            media_seconds = probe_duration(uploaded_file)
+            logger.info(f"גודל הקובץ: {file_size_mb:.1f}MB, אורך: {media_seconds:.0f} שניות")
+            estimator = TimeEstimator(get_metrics_recorder(METRICS_DIR, logger).history())
+            estimates = estimate_stages(estimator, processor, media_seconds)
+            ProgressTracker().display_time_estimate(estimates, media_seconds, processor.device == 'cuda')
             
             if st.button("התחל בעיבוד", key="start_processing"):
                 logger.info("התחלת עיבוד הקובץ")
                 try:
-                    progress.start_tracking()
-                    
-                    # יצירת סרגלי התקדמות
-                    progress.create_progress_bar("convert", "ממיר וידאו לאודיו...")
-                    progress.create_progress_bar("transcribe", "מתמלל...")
-                    progress.create_progress_bar("summarize", "מסכם...")
-                    
-                    # המרה לאודיו
-                    audio_path = processor.convert_to_audio(
-                        uploaded_file,
-                        lambda p, s: progress.update_progress("convert", p, s)
-                    )
-                    
-                    # תמלול
-                    transcription = processor.transcribe_audio(
-                        audio_path,
-                        lambda p, s: progress.update_progress("transcribe", p, s)
-                    )
-                    
-                    # סיכום
-                    summary = processor.summarize_text(
-                        transcription,
-                        lambda p, s: progress.update_progress("summarize", p, s)
-                    )
-                    
-                    # הצגת התוצאות
-                    st.markdown(
-                        """
-                        <div class="results-container">
-                            <h2>תוצאות העיבוד</h2>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                    
-                    st.subheader("📝 תמלול")
-                    st.write(transcription)
-                    
-                    st.subheader("📋 סיכום")
-                    st.write(summary)
-                    
-                    # הכנת קבצים להורדה
-                    txt_content, json_content = processor.save_results(transcription, summary)
-                    
-                    # כפתורי הורדה
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.download_button(
-                            "⬇️ הורד כטקסט",
-                            txt_content.encode('utf-8'),
-                            "results.txt",
-                            "text/plain",
-                            use_container_width=True
-                        )
-                    
-                    with col2:
-                        st.download_button(
-                            "⬇️ הורד כ-JSON",
-                            json_content.encode('utf-8'),
-                            "results.json",
-                            "application/json",
-                            use_container_width=True
-                        )
-                    
-                    # הצגת סיום
-                    progress.display_completion()
-                    logger.info("עיבוד הקובץ הושלם בהצלחה")
-                    
-                    # ניקוי
-                    processor.cleanup(uploaded_file, audio_path)
-                    
-                except Exception as e:
-                    logger.error(f"שגיאה במהלך העיבוד: {str(e)}")
-                    st.error(f"אירעה שגיאה במהלך העיבוד: {str(e)}")
-                    progress.display_completion(False)
+                    job_id = jobs.submit(uploaded_file, {
+                        "estimates": estimates,
+                        "name": st.session_state.get("upload_names", {}).get(str(uploaded_file))
+                    })
+                    # מזהה העבודה נשמר גם בכתובת כדי לחזור אליה אחרי ניתוק
+                    st.session_state["job_id"] = job_id
+                    st.query_params["job"] = job_id
+                except AdmissionError as e:
+                    logger.warning(str(e))
+                    st.warning(str(e))
+        
+        job_id = st.session_state.get("job_id") or st.query_params.get("job")
+        if job_id:
+            render_job(jobs, job_id)
 
     except Exception as e:
         logger.error(f"שגיאה כללית: {str(e)}")
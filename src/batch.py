@@ -0,0 +1,259 @@
+"""
+עיבוד אצווה של קבצי וידאו רבים ללא ממשק
+
+שלושת השלבים רצים כצנרת חסומה: בזמן שקובץ N מתומלל, האודיו של קובץ N+1
+כבר מחולץ והסיכום של קובץ N-1 נשלח. קבצים שכבר יש להם תוצאה מדולגים.
+
+שימוש:
+    python src/batch.py videos/ --output results/
+    python src/batch.py manifest.txt --output results/ --model ivrit-ai/faster-whisper-v2-d4
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from utils.audio import audio_duration_seconds, probe_duration
+from utils.cache import hash_file
+from utils.checkpoint import journal_key
+from utils.logger import setup_logger
+from utils.metrics import MetricsRecorder, get_metrics_recorder
+from utils.pipeline import measure_stage
+from utils.processor import MediaProcessor, LANGUAGE
+from utils.segments import segments_to_text
+from utils.vad import VadSettings
+
+DEFAULT_EXTENSIONS = ["mp4", "avi", "mov", "mkv"]
+
+# סימן לסיום הזרם בין השלבים
+_DONE = object()
+
+
+class BatchItem:
+    def __init__(self, source: Path, output: Path):
+        self.source = source
+        self.output = output
+        self.audio = None
+        self.duration = 0.0
+        self.segments = None
+        self.resume_key: Optional[str] = None
+        self.error: Optional[Exception] = None
+
+
+def discover_inputs(target: Path, extensions: List[str]) -> List[Path]:
+    """קבצי הקלט מתיקייה (רקורסיבית) או מקובץ רשימה - נתיב בכל שורה או רשימת JSON"""
+    if target.is_dir():
+        suffixes = {f".{ext.lower().lstrip('.')}" for ext in extensions}
+        return sorted(p for p in target.rglob("*") if p.is_file() and p.suffix.lower() in suffixes)
+
+    text = target.read_text(encoding="utf-8")
+    if target.suffix == ".json":
+        entries = json.loads(text)
+    else:
+        entries = [line.strip() for line in text.splitlines()]
+    # נתיבים יחסיים ברשימה הם יחסית למיקום הרשימה
+    return [(target.parent / entry).resolve() for entry in entries if entry and not entry.startswith("#")]
+
+
+def output_path(source: Path, root: Path, output_dir: Path) -> Path:
+    """קובץ התוצאה - שומר על המבנה היחסי כדי ששמות זהים בתיקיות שונות לא יתנגשו"""
+    try:
+        relative = source.resolve().relative_to(root.resolve())
+    except ValueError:
+        relative = Path(source.name)
+    return output_dir / relative.with_suffix(".json")
+
+
+def write_result(item: BatchItem, summary: str) -> None:
+    """כתיבה אטומית - קובץ תוצאה קיים תמיד שלם ומסמן שהקובץ עובד"""
+    item.output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = item.output.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "source": str(item.source),
+            "processed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_seconds": item.duration,
+            "segments": [seg.to_dict() for seg in item.segments],
+            "transcription": segments_to_text(item.segments),
+            "summary": summary
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, item.output)
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        processor: MediaProcessor,
+        logger,
+        queue_size: int = 1,
+        recorder: Optional[MetricsRecorder] = None
+    ):
+        """
+        צנרת עיבוד אצווה
+
+        Args:
+            processor: מעבד המדיה (משותף לשלושת השלבים)
+            logger: מערכת הלוגים
+            queue_size: מספר הקבצים שממתינים בין שלב לשלב
+            recorder: רשם המדדים (שיא הזיכרון נמדד לתהליך כולו, כולל שלבים חופפים)
+        """
+        self.processor = processor
+        self.logger = logger
+        self.queue_size = queue_size
+        self.recorder = recorder
+        self.completed: List[BatchItem] = []
+        self.failed: List[BatchItem] = []
+
+    def run(self, items: List[BatchItem]) -> None:
+        """הרצת הצנרת על כל הקבצים עד לסיומם"""
+        to_transcribe: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        to_summarize: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+
+        # daemon - ריצה שנקטעה (Ctrl+C) יוצאת מיד, וקבצי הביניים נמחקים ב-cleanup של main
+        threads = [
+            threading.Thread(target=self._extract, args=(items, to_transcribe), name="extract", daemon=True),
+            threading.Thread(target=self._transcribe, args=(to_transcribe, to_summarize), name="transcribe", daemon=True),
+            threading.Thread(target=self._summarize, args=(to_summarize,), name="summarize", daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _measure(self, stage: str, item: BatchItem, size_bytes: int):
+        return measure_stage(self.recorder, self.processor, stage, item.duration, size_bytes)
+
+    def _resume_key(self, item: BatchItem) -> Optional[str]:
+        """מפתח יומן התמלול, כדי שקובץ ארוך שנקטע ימשיך מהמקטע האחרון שנרשם"""
+        if not self.processor.checkpoint_dir:
+            return None
+        return journal_key(
+            hash_file(item.source),
+            self.processor.whisper_model_name,
+            self.processor.model_key[2],
+            LANGUAGE
+        )
+
+    def _extract(self, items: List[BatchItem], out: "queue.Queue") -> None:
+        for item in items:
+            try:
+                self.logger.info(f"[חילוץ] {item.source}")
+                item.duration = probe_duration(item.source)
+                with self._measure("convert", item, item.source.stat().st_size):
+                    item.audio = self.processor.convert_to_audio(item.source)
+                item.duration = audio_duration_seconds(item.audio)
+            except Exception as e:
+                item.error = e
+            out.put(item)
+        out.put(_DONE)
+
+    def _transcribe(self, inp: "queue.Queue", out: "queue.Queue") -> None:
+        while (item := inp.get()) is not _DONE:
+            if item.error is None:
+                try:
+                    self.logger.info(f"[תמלול] {item.source}")
+                    item.resume_key = self._resume_key(item)
+                    with self._measure("transcribe", item, item.audio.nbytes):
+                        item.segments = list(self.processor.transcribe_segments(
+                            item.audio,
+                            resume_key=item.resume_key
+                        ))
+                except Exception as e:
+                    item.error = e
+            # האודיו לא נדרש יותר - משחררים את הזיכרון לפני שהקובץ ממתין לסיכום
+            if item.audio is not None:
+                self.processor.release_audio(item.audio)
+                item.audio = None
+            out.put(item)
+        out.put(_DONE)
+
+    def _summarize(self, inp: "queue.Queue") -> None:
+        while (item := inp.get()) is not _DONE:
+            if item.error is None:
+                try:
+                    self.logger.info(f"[סיכום] {item.source}")
+                    text_bytes = sum(len(seg.text.encode("utf-8")) for seg in item.segments)
+                    with self._measure("summarize", item, text_bytes):
+                        summary = self.processor.summarize_text(item.segments)
+                    write_result(item, summary)
+                    # היומן נמחק רק אחרי שהתוצאה נכתבה
+                    if item.resume_key:
+                        self.processor.remove_journal(item.resume_key)
+                except Exception as e:
+                    item.error = e
+
+            if item.error is None:
+                self.completed.append(item)
+                self.logger.info(f"הושלם: {item.source} -> {item.output}")
+            else:
+                self.failed.append(item)
+                self.logger.error(f"נכשל: {item.source}: {str(item.error)}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="תמלול וסיכום אצווה של קבצי וידאו")
+    parser.add_argument("input", type=Path, help="תיקיית קבצים או קובץ רשימה (txt/json)")
+    parser.add_argument("--output", type=Path, required=True, help="תיקיית התוצאות")
+    parser.add_argument("--model", default=os.environ.get("WHISPER_MODEL", "ivrit-ai/faster-whisper-v2-d4"))
+    parser.add_argument("--gemini-api-key", default=os.environ.get("GEMINI_API_KEY"))
+    parser.add_argument("--extensions", nargs="+", default=DEFAULT_EXTENSIONS)
+    parser.add_argument("--parallel-workers", type=int, default=1)
+    parser.add_argument("--queue-size", type=int, default=1)
+    parser.add_argument("--metrics-dir", default=None, help="תיקיית המדדים (ברירת מחדל: metrics)")
+    parser.add_argument("--checkpoint-dir", default=None, help="תיקיית יומני תמלול לחידוש אחרי הפסקה")
+    parser.add_argument("--vad", action="store_true", help="תמלול קטעי הדיבור בלבד (דילוג על שקט)")
+    parser.add_argument("--log-json", action="store_true", help="רשומות JSON בקובץ הלוג (logs/batch.log)")
+    parser.add_argument("--force", action="store_true", help="עיבוד מחדש גם של קבצים שכבר עובדו")
+    args = parser.parse_args(argv)
+
+    logger = setup_logger("batch", {"json": args.log_json})
+    if not args.gemini_api_key:
+        logger.error("מפתח API של Gemini לא הוגדר (GEMINI_API_KEY)")
+        return 2
+
+    sources = discover_inputs(args.input, args.extensions)
+    root = args.input if args.input.is_dir() else args.input.parent
+    items = [BatchItem(source, output_path(source, root, args.output)) for source in sources]
+
+    pending = [item for item in items if args.force or not item.output.exists()]
+    logger.info(f"נמצאו {len(items)} קבצים, {len(items) - len(pending)} כבר עובדו, {len(pending)} לעיבוד")
+    if not pending:
+        return 0
+
+    processor = MediaProcessor(
+        args.model,
+        args.gemini_api_key,
+        logger,
+        parallel_workers=args.parallel_workers,
+        checkpoint_dir=args.checkpoint_dir,
+        vad=VadSettings() if args.vad else None
+    )
+    recorder = get_metrics_recorder(args.metrics_dir, logger)
+    runner = BatchRunner(processor, logger, args.queue_size, recorder)
+
+    started = time.perf_counter()
+    try:
+        runner.run(pending)
+    finally:
+        # קבצי הביניים של ריצה שנקטעה (Ctrl+C, שגיאה) לא נשארים בשטח הזמני
+        processor.cleanup()
+    wall_seconds = time.perf_counter() - started
+    recorder.write_prometheus()
+
+    media_seconds = sum(item.duration for item in runner.completed)
+    throughput = media_seconds / wall_seconds if wall_seconds > 0 else 0.0
+    logger.info("=== סיכום אצווה ===")
+    logger.info(f"הושלמו: {len(runner.completed)}, נכשלו: {len(runner.failed)}")
+    logger.info(f"מדיה שעובדה: {media_seconds / 3600:.2f} שעות בזמן של {wall_seconds / 3600:.2f} שעות")
+    logger.info(f"תפוקה: {throughput:.2f} שעות מדיה לשעת עבודה")
+    return 1 if runner.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
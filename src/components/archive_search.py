@@ -0,0 +1,24 @@
+import streamlit as st
+from utils.segment_store import SegmentStore
+from utils.segments import format_timestamp
+
+def archive_search_component(store: SegmentStore) -> None:
+    """
+    חיפוש בתמלולים של כל הסרטונים שעובדו
+
+    Args:
+        store: ארכיון הקטעים והאינדקס
+    """
+    with st.expander("🔎 חיפוש בארכיון"):
+        query = st.text_input("חיפוש", placeholder="מילים לחיפוש בכל התמלולים", label_visibility="collapsed")
+        if not query:
+            return
+
+        hits = store.search(query)
+        if not hits:
+            st.info("לא נמצאו תוצאות")
+            return
+
+        st.caption(f"{len(hits)} קטעים תואמים")
+        for hit in hits:
+            st.markdown(f"**{hit.name}** · `{format_timestamp(hit.start_ms / 1000)}` — {hit.text}")
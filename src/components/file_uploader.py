@@ -2,10 +2,13 @@ import streamlit as st
 from pathlib import Path
 import os
 from typing import List, Optional
+from utils.ingest import ingest_upload
+from utils.scratch import ScratchManager
 
 def file_uploader_component(
     supported_formats: List[str],
-    max_size_mb: int
+    max_size_mb: int,
+    scratch: ScratchManager
 ) -> Optional[Path]:
     """
     קומפוננטה מעוצבת להעלאת קבצים
@@ -13,6 +16,7 @@ def file_uploader_component(
     Args:
         supported_formats: רשימת הפורמטים הנתמכים
         max_size_mb: גודל מקסימלי בMB
+        scratch: מנהל השטח הזמני שבו נשמרות ההעלאות
     
     Returns:
         Path של הקובץ שהועלה או None אם לא הועלה קובץ
@@ -43,13 +47,24 @@ def file_uploader_component(
             )
             return None
             
-        # שמירת הקובץ באופן זמני
-        temp_dir = Path("temp")
-        temp_dir.mkdir(exist_ok=True)
+        # שמירת הקובץ לפי תוכנו - פעם אחת לכל העלאה ולא בכל הרצה חוזרת
+        upload_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+        ingested = st.session_state.setdefault("ingested_uploads", {})
+        temp_path = ingested.get(upload_id)
         
-        temp_path = temp_dir / uploaded_file.name
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        if temp_path is None or not temp_path.exists():
+            # קובץ עם אותו תוכן שכבר שמור משמש כמו שהוא; רק לכתיבה חדשה מפנים
+            # העלאות ישנות אם אין מקום במכסה (ScratchQuotaError אם אי אפשר)
+            temp_path = ingest_upload(
+                uploaded_file,
+                uploaded_file.name,
+                scratch.root,
+                make_room=scratch.ensure_space
+            )
+            ingested.clear()
+            ingested[upload_id] = temp_path
+            # השם המקורי נשמר לתצוגה בארכיון (הקובץ עצמו נשמר לפי תוכנו)
+            st.session_state.setdefault("upload_names", {})[str(temp_path)] = uploaded_file.name
             
         return temp_path
         
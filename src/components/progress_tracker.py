@@ -1,11 +1,15 @@
 import streamlit as st
-from typing import Optional
+from typing import Dict, Optional, Sequence
 from datetime import datetime, timedelta
+import time
+from utils.segments import TranscriptSegment, format_timestamp
 
 class ProgressTracker:
     def __init__(self):
         self.progress_bars = {}
+        self.previews = {}
         self.start_time = None
+        self.end_time = None
         
     def create_progress_bar(self, key: str, description: str) -> None:
         """יצירת סרגל התקדמות חדש"""
@@ -21,6 +25,38 @@ class ProgressTracker:
             if status:
                 self.progress_bars[key]["status"].info(status)
                 
+    def create_preview(self, key: str, max_lines: int = 15, min_interval: float = 0.5) -> None:
+        """יצירת תצוגה חיה של הטקסט שפוענח עד כה"""
+        self.previews[key] = {
+            "placeholder": st.empty(),
+            "max_lines": max_lines,
+            "min_interval": min_interval,
+            "last_update": 0.0
+        }
+        
+    def update_preview(self, key: str, segments: Sequence[TranscriptSegment], force: bool = False) -> None:
+        """עדכון התצוגה החיה - רק השורות האחרונות ולא יותר מפעם בפרק זמן קצר"""
+        preview = self.previews.get(key)
+        if not preview:
+            return
+            
+        now = time.monotonic()
+        if not force and now - preview["last_update"] < preview["min_interval"]:
+            return
+        preview["last_update"] = now
+        
+        lines = [
+            f"`{format_timestamp(seg.start)}` {seg.text}"
+            for seg in segments[-preview["max_lines"]:]
+        ]
+        preview["placeholder"].markdown("  \n".join(lines))
+        
+    def clear_preview(self, key: str) -> None:
+        """הסרת התצוגה החיה"""
+        preview = self.previews.pop(key, None)
+        if preview:
+            preview["placeholder"].empty()
+        
     def start_tracking(self) -> None:
         """התחלת מעקב זמן"""
         self.start_time = datetime.now()
@@ -30,24 +66,33 @@ class ProgressTracker:
         if not self.start_time:
             return "00:00"
             
-        elapsed = datetime.now() - self.start_time
+        elapsed = (self.end_time or datetime.now()) - self.start_time
         minutes = int(elapsed.total_seconds() // 60)
         seconds = int(elapsed.total_seconds() % 60)
         return f"{minutes:02d}:{seconds:02d}"
         
-    def display_time_estimate(self, file_size_mb: float, has_gpu: bool) -> None:
-        """הצגת הערכת זמן לעיבוד"""
-        # הערכת זמן גסה בהתבסס על גודל הקובץ ונוכחות GPU
-        minutes_per_mb = 0.1 if has_gpu else 0.2
-        estimated_minutes = file_size_mb * minutes_per_mb
-        
-        st.info(
-            f"""
-            **הערכת זמן עיבוד:**
-            - זמן משוער: {estimated_minutes:.1f} דקות
-            - מעבד באמצעות: {'GPU' if has_gpu else 'CPU'}
-            """
-        )
+    def display_time_estimate(
+        self,
+        estimates: Dict[str, Optional[float]],
+        media_seconds: float,
+        has_gpu: bool
+    ) -> None:
+        """הצגת הערכת זמן לעיבוד לפי מודל שהותאם לזמנים שנמדדו בעבר"""
+        labels = {"convert": "חילוץ אודיו", "transcribe": "תמלול", "summarize": "סיכום"}
+        known = {stage: seconds for stage, seconds in estimates.items() if seconds is not None}
+        
+        lines = [
+            "**הערכת זמן עיבוד:**",
+            f"- אורך המדיה: {format_timestamp(media_seconds)}",
+            f"- מעבד באמצעות: {'GPU' if has_gpu else 'CPU'}"
+        ]
+        if len(known) == len(estimates):
+            lines.insert(1, f"- זמן משוער: {sum(known.values()) / 60:.1f} דקות")
+        for stage, seconds in estimates.items():
+            value = f"{seconds / 60:.1f} דקות" if seconds is not None else "אין עדיין מדידות"
+            lines.append(f"- {labels.get(stage, stage)}: {value}")
+            
+        st.info("\n".join(lines))
         
     def display_completion(self, success: bool = True) -> None:
         """הצגת סיום העיבוד"""
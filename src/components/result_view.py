@@ -0,0 +1,61 @@
+import math
+import streamlit as st
+from utils.export import ResultFile, EXPORT_FORMATS, DEFAULT_PAGE_SIZE
+from utils.segments import format_timestamp
+
+def transcript_view_component(results: ResultFile, key: str, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+    """
+    הצגת התמלול בעמודים - רק הקטעים של העמוד הנוכחי נשלחים לדפדפן
+
+    Args:
+        results: קובץ התוצאה של העבודה
+        key: מפתח ייחודי לרכיבים (מזהה העבודה)
+        page_size: מספר הקטעים בעמוד
+    """
+    total = results.segment_count
+    pages = max(math.ceil(total / page_size), 1)
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"עמוד (מתוך {pages})", 1, pages, 1, key=f"page_{key}")
+
+    segments = results.page(page - 1, page_size)
+    st.markdown("  \n".join(
+        f"`{format_timestamp(seg.start)}` {seg.text}" for seg in segments if seg.text
+    ))
+    if pages > 1:
+        first = (page - 1) * page_size
+        st.caption(f"קטעים {first + 1}-{first + len(segments)} מתוך {total}")
+
+def download_component(results: ResultFile, key: str) -> None:
+    """
+    הורדת התוצאות - רק הפורמט שנבחר נוצר (פעם אחת, מהקובץ בדיסק) ונשלח
+
+    Args:
+        results: קובץ התוצאה של העבודה
+        key: מפתח ייחודי לרכיבים (מזהה העבודה)
+    """
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        fmt = st.selectbox(
+            "פורמט",
+            list(EXPORT_FORMATS),
+            format_func=lambda f: EXPORT_FORMATS[f][0],
+            key=f"format_{key}",
+            label_visibility="collapsed"
+        )
+    with col2:
+        compress = st.checkbox("gzip", key=f"gzip_{key}")
+
+    path = results.export(fmt, compress)
+    _, mime = EXPORT_FORMATS[fmt]
+    file_name = f"results.{fmt}" + (".gz" if compress else "")
+    with col3:
+        with open(path, "rb") as f:
+            st.download_button(
+                "⬇️ הורדה",
+                f,
+                file_name,
+                "application/gzip" if compress else mime,
+                key=f"download_{key}",
+                use_container_width=True
+            )
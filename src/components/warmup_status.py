@@ -0,0 +1,25 @@
+import streamlit as st
+from typing import Dict, List
+from utils.warmup import WarmupStep, DONE, FAILED
+
+def warmup_status_component(steps: List[WarmupStep], worker_states: Dict[str, str]) -> None:
+    """
+    הצגת מצב החימום - ספריות בתהליך הממשק ומודלים בתהליכי העבודה
+
+    Args:
+        steps: שלבי החימום של תהליך הממשק
+        worker_states: מצב כל תהליך עבודה (loading / ready)
+    """
+    pending = [step.name for step in steps if step.state not in (DONE, FAILED)]
+    loading = [worker for worker, state in worker_states.items() if state != "ready"]
+    if not worker_states:
+        loading = ["תהליך העבודה"]
+
+    if not pending and not loading:
+        st.caption("✅ המערכת מוכנה")
+        return
+
+    parts = [f"טוען {name}" for name in pending]
+    if loading:
+        parts.append("טוען את מודל התמלול")
+    st.caption(f"⏳ {', '.join(parts)}... אפשר כבר להעלות קובץ")
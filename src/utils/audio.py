@@ -0,0 +1,176 @@
+from pathlib import Path
+from typing import Optional, Union, List, Tuple
+
+import numpy as np
+
+# קצב הדגימה ש-Whisper מצפה לו
+SAMPLE_RATE = 16000
+
+# מעל אורך זה (בשניות) האודיו נכתב לקובץ PCM גולמי ממופה לזיכרון
+DEFAULT_MEMMAP_THRESHOLD_SECONDS = 2 * 60 * 60
+
+AudioInput = Union[Path, np.ndarray]
+
+
+def probe_duration(path: Path) -> float:
+    """אורך ערוץ האודיו בשניות לפי נתוני המכולה, ללא פענוח"""
+    # ייבוא בשימוש ולא בטעינת המודול - לא מעכב את הצגת העמוד הראשון
+    import av
+
+    with av.open(str(path), metadata_errors="ignore") as container:
+        return _audio_duration(container, container.streams.audio[0])
+
+
+def decode_audio(
+    path: Path,
+    sampling_rate: int = SAMPLE_RATE,
+    progress_callback=None,
+    memmap_path: Optional[Path] = None
+) -> np.ndarray:
+    """
+    פענוח ערוץ האודיו ישירות ל-PCM מונו float32 בקצב הדגימה המבוקש
+
+    Args:
+        path: קובץ הווידאו או האודיו
+        sampling_rate: קצב הדגימה של הפלט
+        progress_callback: פונקציה לדיווח התקדמות
+        memmap_path: אם הוגדר, הדגימות נכתבות לקובץ זה ומוחזר מערך ממופה לזיכרון
+    """
+    import av
+
+    with av.open(str(path), metadata_errors="ignore") as container:
+        stream = container.streams.audio[0]
+        # ריבוי תהליכונים בפענוח המכולה
+        stream.thread_type = "AUTO"
+        duration = _audio_duration(container, stream)
+        resampler = av.audio.resampler.AudioResampler(
+            format="s16",
+            layout="mono",
+            rate=sampling_rate
+        )
+        sink = _FileSink(memmap_path) if memmap_path else _MemorySink()
+
+        reported = 0.0
+        try:
+            for frame in container.decode(stream):
+                for resampled in resampler.resample(frame):
+                    sink.write(resampled.to_ndarray())
+
+                # דיווח רק בכל אחוז - יש אלפי מסגרות בשנייה
+                if progress_callback and duration > 0 and frame.time is not None:
+                    progress = min(frame.time / duration, 1.0)
+                    if progress - reported >= 0.01:
+                        reported = progress
+                        progress_callback(progress, "מחלץ אודיו...")
+
+            for resampled in resampler.resample(None):
+                sink.write(resampled.to_ndarray())
+        finally:
+            sink.close()
+
+    return sink.result()
+
+
+def audio_duration_seconds(audio: np.ndarray, sampling_rate: int = SAMPLE_RATE) -> float:
+    """אורך מערך דגימות בשניות"""
+    return len(audio) / sampling_rate
+
+
+def frame_energy(audio: np.ndarray, frame_samples: int) -> np.ndarray:
+    """אנרגיה ממוצעת (RMS בריבוע) לכל מסגרת באורך frame_samples"""
+    n_frames = len(audio) // frame_samples
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.asarray(audio[:n_frames * frame_samples]).reshape(n_frames, frame_samples)
+    # einsum מחשב את סכום הריבועים בלי להקצות מערך ביניים בגודל האודיו
+    return np.einsum('ij,ij->i', frames, frames) / frame_samples
+
+
+def split_on_silence(
+    audio: np.ndarray,
+    target_chunk_seconds: float = 300.0,
+    search_seconds: float = 30.0,
+    sampling_rate: int = SAMPLE_RATE,
+    frame_seconds: float = 0.02
+) -> List[Tuple[int, int]]:
+    """
+    חלוקת האודיו למקטעים באורך משוער, כשכל חיתוך נעשה ברגע השקט ביותר
+    בחלון החיפוש סביב נקודת היעד
+
+    Returns:
+        רשימת (דגימת התחלה, דגימת סיום) מכסה את כל האודיו ברצף
+    """
+    total = len(audio)
+    target = int(target_chunk_seconds * sampling_rate)
+    if total <= target:
+        return [(0, total)]
+
+    frame_samples = max(int(frame_seconds * sampling_rate), 1)
+    energy = frame_energy(audio, frame_samples)
+    search_frames = int(search_seconds * sampling_rate) // frame_samples
+
+    cuts = [0]
+    while total - cuts[-1] > target:
+        center = (cuts[-1] + target) // frame_samples
+        lo = max(center - search_frames, cuts[-1] // frame_samples + 1)
+        hi = min(center + search_frames, len(energy))
+        if hi <= lo:
+            cut = cuts[-1] + target
+        else:
+            cut = (lo + int(np.argmin(energy[lo:hi]))) * frame_samples
+        cuts.append(cut)
+    cuts.append(total)
+
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _audio_duration(container, stream) -> float:
+    import av
+
+    if stream.duration is not None and stream.time_base is not None:
+        return float(stream.duration * stream.time_base)
+    if container.duration is not None:
+        return container.duration / av.time_base
+    return 0.0
+
+
+def _to_float32(samples: np.ndarray) -> np.ndarray:
+    return samples.reshape(-1).astype(np.float32) / 32768.0
+
+
+class _MemorySink:
+    def __init__(self):
+        self.chunks: List[np.ndarray] = []
+
+    def write(self, samples: np.ndarray) -> None:
+        self.chunks.append(_to_float32(samples))
+
+    def close(self) -> None:
+        pass
+
+    def result(self) -> np.ndarray:
+        if not self.chunks:
+            return np.zeros(0, dtype=np.float32)
+        audio = np.concatenate(self.chunks)
+        self.chunks = []
+        return audio
+
+
+class _FileSink:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = open(self.path, "wb")
+        self.samples = 0
+
+    def write(self, samples: np.ndarray) -> None:
+        data = _to_float32(samples)
+        self.file.write(data.tobytes())
+        self.samples += len(data)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def result(self) -> np.ndarray:
+        if self.samples == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(self.path, dtype=np.float32, mode="r", shape=(self.samples,))
@@ -0,0 +1,159 @@
+from pathlib import Path
+from typing import List, Optional, Iterable
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from utils.segments import TranscriptSegment
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """גיבוב SHA-256 של תוכן הקובץ בקריאה הדרגתית"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _derive_key(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, root: Path, max_size_mb: int, logger: Optional[logging.Logger] = None):
+        """
+        מטמון תוצאות על הדיסק לפי תוכן הקובץ
+
+        Args:
+            root: תיקיית המטמון
+            max_size_mb: הגודל המרבי של המטמון; רשומות ישנות מפונות לפי LRU
+            logger: מערכת הלוגים
+        """
+        self.root = Path(root)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self._lock = threading.Lock()
+        for kind in ("transcripts", "summaries"):
+            (self.root / kind).mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def transcript_key(
+        content_hash: str,
+        model_name: str,
+        compute_type: str,
+        language: str,
+        vad: Optional[str] = None
+    ) -> str:
+        """
+        מפתח התמלול - תוכן הקובץ, מודל ה-Whisper, סוג החישוב (גם מפרופיל כיול),
+        השפה והגדרות זיהוי הדיבור (VadSettings.fingerprint, או None בלי זיהוי)
+        """
+        return _derive_key("transcript", content_hash, model_name, compute_type, language, vad or "")
+
+    @staticmethod
+    def summary_key(transcript_key: str, prompt_version: str, llm_model: str) -> str:
+        """מפתח הסיכום - התמלול שעליו הוא מבוסס וגרסת הפרומפט"""
+        return _derive_key("summary", transcript_key, prompt_version, llm_model)
+
+    def get_transcript(self, key: str) -> Optional[List[TranscriptSegment]]:
+        """קטעי התמלול מהמטמון, או None אם אינם שמורים"""
+        data = self._read("transcripts", key)
+        if data is None:
+            return None
+        return [TranscriptSegment.from_dict(item) for item in data["segments"]]
+
+    def put_transcript(self, key: str, segments: Iterable[TranscriptSegment]) -> None:
+        """שמירת קטעי התמלול במטמון"""
+        self._write("transcripts", key, {"segments": [seg.to_dict() for seg in segments]})
+
+    def get_summary(self, key: str) -> Optional[str]:
+        """הסיכום מהמטמון, או None אם אינו שמור"""
+        data = self._read("summaries", key)
+        return None if data is None else data["summary"]
+
+    def put_summary(self, key: str, summary: str) -> None:
+        """שמירת הסיכום במטמון"""
+        self._write("summaries", key, {"summary": summary})
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.root / kind / f"{key}.json"
+
+    def _read(self, kind: str, key: str) -> Optional[dict]:
+        path = self._path(kind, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            # עדכון זמן הגישה לצורך פינוי LRU
+            os.utime(path)
+            self.logger.info(f"נמצא במטמון ({kind}): {key[:12]}")
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"רשומת מטמון פגומה {path}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write(self, kind: str, key: str, data: dict) -> None:
+        path = self._path(kind, key)
+        # כתיבה לקובץ זמני והחלפה אטומית כדי שקורא לא יראה רשומה חלקית
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self.logger.info(f"נשמר במטמון ({kind}): {key[:12]}")
+        self._evict()
+
+    def _evict(self) -> None:
+        """פינוי הרשומות שהגישה אליהן הישנה ביותר עד שחוזרים לגודל המרבי"""
+        with self._lock:
+            entries = []
+            for kind in ("transcripts", "summaries"):
+                for path in (self.root / kind).glob("*.json"):
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_size_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.logger.info(f"פונה מהמטמון: {path.name}")
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_CACHE_SIZE_MB = 1024
+
+
+def get_result_cache(
+    root: Optional[str] = None,
+    max_size_mb: Optional[int] = None,
+    logger: Optional[logging.Logger] = None
+) -> ResultCache:
+    """החזרת מטמון התוצאות של התהליך (נוצר פעם אחת בלבד)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                Path(root or DEFAULT_CACHE_DIR),
+                max_size_mb or DEFAULT_CACHE_SIZE_MB,
+                logger
+            )
+        return _cache
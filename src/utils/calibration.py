@@ -0,0 +1,253 @@
+"""
+כיול הגדרות WhisperModel למחשב הנוכחי
+
+כל שילוב של סוג חישוב ומספר תהליכונים נמדד על קטע ייחוס קצר. שילוב
+שהתמלול שלו סוטה מתמלול הייחוס (float32) מעבר לסף שגיאת המילים נפסל,
+והמהיר מבין השאר נשמר כפרופיל למחשב ולמודל. MediaProcessor טוען את
+הפרופיל אוטומטית בהפעלה.
+
+שימוש (מתוך תיקיית src):
+    python -m utils.calibration reference_clip.mp4 --model ivrit-ai/faster-whisper-v2-d4
+"""
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+DEFAULT_PROFILE_PATH = "profiles/whisper_profiles.json"
+DEFAULT_MAX_WER = 0.05
+DEFAULT_CLIP_SECONDS = 60
+
+REFERENCE_COMPUTE_TYPE = "float32"
+DEFAULT_COMPUTE_TYPES = {
+    "cpu": ["int8", "int8_float32", "float32"],
+    "cuda": ["float16", "int8_float16", "int8"]
+}
+
+
+@dataclass
+class CalibrationResult:
+    """מדידה של שילוב הגדרות אחד"""
+    compute_type: str
+    cpu_threads: int
+    num_workers: int
+    seconds: float
+    rtf: float
+    wer: float
+    accepted: bool
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """שיעור שגיאת מילים (מרחק לוונשטיין על מילים חלקי אורך הייחוס)"""
+    ref = reference.split()
+    hyp = hypothesis.split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def default_thread_counts() -> List[int]:
+    """חזקות של 2 עד מספר הליבות, ומספר הליבות עצמו"""
+    cores = os.cpu_count() or 1
+    counts = {cores}
+    threads = 1
+    while threads < cores:
+        counts.add(threads)
+        threads *= 2
+    return sorted(counts)
+
+
+def _transcribe(model, audio: np.ndarray, language: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    segments, _ = model.transcribe(audio, language=language)
+    text = " ".join(seg.text.strip() for seg in segments)
+    return text, time.perf_counter() - started
+
+
+def calibrate(
+    model_name: str,
+    device: str,
+    audio: np.ndarray,
+    compute_types: Optional[List[str]] = None,
+    thread_counts: Optional[List[int]] = None,
+    num_workers: int = 1,
+    max_wer: float = DEFAULT_MAX_WER,
+    language: str = "he",
+    logger: Optional[logging.Logger] = None
+) -> Tuple[Optional[Dict[str, Any]], List[CalibrationResult]]:
+    """
+    מדידת כל השילובים ובחירת המהיר שעומד בסף השגיאה
+
+    Args:
+        model_name: שם מודל ה-Whisper
+        device: המכשיר (cpu / cuda)
+        audio: קטע הייחוס - PCM מונו 16kHz
+        compute_types: סוגי החישוב לבדיקה
+        thread_counts: מספרי התהליכונים לבדיקה (ב-CUDA נבדק רק ברירת המחדל)
+        num_workers: מספר התמלולים המקבילים שהמודל יאפשר
+        max_wer: שיעור שגיאת המילים המרבי ביחס לתמלול הייחוס
+        language: שפת התמלול
+        logger: מערכת הלוגים
+
+    Returns:
+        הפרופיל הנבחר (או None אם אף שילוב לא עמד בסף) וכל המדידות
+    """
+    from faster_whisper import WhisperModel
+
+    logger = logger or logging.getLogger('VideoProcessor')
+    compute_types = compute_types or DEFAULT_COMPUTE_TYPES.get(device, ["default"])
+    thread_counts = thread_counts or (default_thread_counts() if device == "cpu" else [0])
+    clip_seconds = len(audio) / 16000
+
+    logger.info(f"מכייל {model_name} ({device}) על קטע של {clip_seconds:.0f} שניות")
+    reference_model = WhisperModel(model_name, device=device, compute_type=REFERENCE_COMPUTE_TYPE)
+    reference_text, _ = _transcribe(reference_model, audio, language)
+    del reference_model
+
+    results: List[CalibrationResult] = []
+    for compute_type in compute_types:
+        for cpu_threads in thread_counts:
+            try:
+                model = WhisperModel(
+                    model_name,
+                    device=device,
+                    compute_type=compute_type,
+                    cpu_threads=cpu_threads,
+                    num_workers=num_workers
+                )
+            except ValueError as e:
+                # סוג חישוב שאינו נתמך בחומרה הזו
+                logger.warning(f"דילוג על {compute_type}: {str(e)}")
+                break
+
+            # הרצת חימום כדי שהמדידה לא תכלול הקצאות ראשוניות
+            _transcribe(model, audio[:16000 * 5], language)
+            text, seconds = _transcribe(model, audio, language)
+            del model
+
+            wer = word_error_rate(reference_text, text)
+            result = CalibrationResult(
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+                seconds=round(seconds, 3),
+                rtf=round(seconds / clip_seconds, 4),
+                wer=round(wer, 4),
+                accepted=wer <= max_wer
+            )
+            results.append(result)
+            logger.info(
+                f"{compute_type} / {cpu_threads} תהליכונים: {seconds:.2f} שניות, "
+                f"WER {wer:.3f}{'' if result.accepted else ' - נפסל'}"
+            )
+
+    accepted = [r for r in results if r.accepted]
+    if not accepted:
+        return None, results
+
+    best = min(accepted, key=lambda r: r.seconds)
+    profile = {
+        "compute_type": best.compute_type,
+        "cpu_threads": best.cpu_threads,
+        "num_workers": best.num_workers,
+        "rtf": best.rtf,
+        "wer": best.wer,
+        "calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    return profile, results
+
+
+def _profile_key(model_name: str, device: str) -> str:
+    return f"{model_name}|{device}"
+
+
+def _read_profiles(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_profile(
+    model_name: str,
+    device: str,
+    profile: Dict[str, Any],
+    path: Path = Path(DEFAULT_PROFILE_PATH)
+) -> None:
+    """שמירת הפרופיל למחשב ולמודל (שאר הפרופילים בקובץ נשמרים)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiles = _read_profiles(path)
+    profiles.setdefault(socket.gethostname(), {})[_profile_key(model_name, device)] = profile
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_name, path)
+
+
+def load_profile(
+    model_name: str,
+    device: str,
+    path: Path = Path(DEFAULT_PROFILE_PATH)
+) -> Optional[Dict[str, Any]]:
+    """הפרופיל שנשמר למחשב הנוכחי ולמודל, או None"""
+    profiles = _read_profiles(Path(path))
+    return profiles.get(socket.gethostname(), {}).get(_profile_key(model_name, device))
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.audio import decode_audio
+    from utils.logger import setup_logger
+
+    parser = argparse.ArgumentParser(description="כיול הגדרות WhisperModel למחשב הנוכחי")
+    parser.add_argument("clip", type=Path, help="קטע ייחוס עם דיבור")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--seconds", type=int, default=DEFAULT_CLIP_SECONDS)
+    parser.add_argument("--compute-types", nargs="+")
+    parser.add_argument("--threads", type=int, nargs="+")
+    parser.add_argument("--num-workers", type=int, default=1)
+    parser.add_argument("--max-wer", type=float, default=DEFAULT_MAX_WER)
+    parser.add_argument("--profile-path", type=Path, default=Path(DEFAULT_PROFILE_PATH))
+    args = parser.parse_args()
+
+    logger = setup_logger("calibration")
+    audio = np.asarray(decode_audio(args.clip))[:args.seconds * 16000]
+    profile, results = calibrate(
+        args.model,
+        args.device,
+        audio,
+        args.compute_types,
+        args.threads,
+        args.num_workers,
+        args.max_wer,
+        logger=logger
+    )
+    print(json.dumps([asdict(r) for r in results], indent=2))
+
+    if profile is None:
+        logger.error("אף שילוב לא עמד בסף שגיאת המילים - הפרופיל לא נשמר")
+        raise SystemExit(1)
+    save_profile(args.model, args.device, profile, args.profile_path)
+    logger.info(f"פרופיל נשמר: {profile}")
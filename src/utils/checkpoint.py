@@ -0,0 +1,110 @@
+"""
+יומן תמלול לחידוש תמלול ארוך אחרי הפסקה
+
+האודיו מחולק ברגעי שקט למקטעים קבועים (החלוקה דטרמיניסטית לפי האודיו),
+וקטעי התמלול של כל מקטע נכתבים ליומן כשורה אחת מיד עם סיומו. בהפעלה
+מחדש המקטעים שכבר נרשמו נקראים מהיומן, ורק שאר האודיו מפוענח. מאחר
+שכל מקטע מתומלל בנפרד גם בריצה רציפה, התוצאה זהה לריצה ללא הפסקה.
+"""
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import os
+
+from utils.segments import TranscriptSegment
+
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+
+
+def journal_key(content_hash: str, model_name: str, compute_type: str, language: str) -> str:
+    """מפתח היומן - תוכן הקובץ, המודל, סוג החישוב והשפה"""
+    return hashlib.sha256(
+        "\x1f".join(("journal", content_hash, model_name, compute_type, language)).encode("utf-8")
+    ).hexdigest()
+
+
+class TranscriptJournal:
+    def __init__(self, directory: Path, key: str, logger: Optional[logging.Logger] = None):
+        """
+        יומן append-only של מקטעים שתומללו
+
+        השורה הראשונה היא תכנית המקטעים, וכל שורה נוספת היא מקטע אחד שהושלם.
+        שורה חלקית (התהליך נעצר באמצע כתיבה) נחתכת בפתיחה הבאה.
+
+        Args:
+            directory: תיקיית היומנים
+            key: מפתח היומן (journal_key)
+            logger: מערכת הלוגים
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{key}.jsonl"
+        self.logger = logger or logging.getLogger('VideoProcessor')
+
+    def open(self, chunks: Sequence[Tuple[int, int]]) -> List[List[TranscriptSegment]]:
+        """
+        פתיחת היומן לתכנית המקטעים הנתונה
+
+        Returns:
+            קטעי התמלול של המקטעים שכבר הושלמו, לפי הסדר
+        """
+        plan = [list(chunk) for chunk in chunks]
+        completed, valid_bytes = self._read(plan)
+        if completed is None:
+            # אין יומן, או שהוא נכתב לתכנית אחרת - מתחילים מחדש
+            self._write_line({"chunks": plan}, truncate=True)
+            return []
+
+        with open(self.path, "r+b") as f:
+            f.truncate(valid_bytes)
+        if completed:
+            self.logger.info(f"ממשיך תמלול מהיומן: {len(completed)} מתוך {len(plan)} מקטעים הושלמו")
+        return completed
+
+    def commit(self, index: int, segments: Sequence[TranscriptSegment]) -> None:
+        """רישום מקטע שהושלם (נכתב לדיסק לפני החזרה)"""
+        self._write_line({"chunk": index, "segments": [seg.to_dict() for seg in segments]})
+
+    def remove(self) -> None:
+        """מחיקת היומן לאחר שהתמלול המלא נשמר"""
+        self.path.unlink(missing_ok=True)
+
+    def _read(self, plan: List[List[int]]) -> Tuple[Optional[List[List[TranscriptSegment]]], int]:
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return None, 0
+
+        try:
+            if not lines[0].endswith(b"\n") or json.loads(lines[0])["chunks"] != plan:
+                return None, 0
+        except (IndexError, KeyError, ValueError):
+            return None, 0
+
+        completed: List[List[TranscriptSegment]] = []
+        valid_bytes = len(lines[0])
+        for line in lines[1:]:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+                if record["chunk"] != len(completed):
+                    break
+                completed.append([TranscriptSegment.from_dict(item) for item in record["segments"]])
+            except (KeyError, TypeError, ValueError):
+                break
+            valid_bytes += len(line)
+        return completed, valid_bytes
+
+    def _write_line(self, record: dict, truncate: bool = False) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if truncate else os.O_APPEND)
+        fd = os.open(self.path, flags, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
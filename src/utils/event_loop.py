@@ -0,0 +1,47 @@
+"""
+לולאת אירועים קבועה לכל התהליך
+
+google-generativeai שומרת את לקוח ה-grpc.aio שלה אחרי הבקשה הראשונה, והלקוח
+קשור ללולאה שבה נוצר. asyncio.run פותח וסוגר לולאה חדשה בכל קריאה, ולכן
+בקשה בלולאה הבאה נכשלת ב-"Event loop is closed". כל הקוד האסינכרוני של
+הסיכום רץ בלולאה אחת שחיה לאורך כל התהליך, בתהליכון משלה.
+"""
+from typing import Any, Coroutine, Optional, TypeVar
+import asyncio
+import threading
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """הלולאה הקבועה של התהליך (נוצרת ומופעלת בקריאה הראשונה)"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="event-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def run_coroutine(coro: Coroutine[Any, Any, T]) -> T:
+    """הרצת coroutine בלולאה הקבועה והמתנה לתוצאה (קריאה חוסמת מתהליכון אחר)"""
+    loop = get_event_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_coroutine נקרא מתוך הלולאה הקבועה - יש להשתמש ב-await")
+
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except BaseException:
+        # למשל KeyboardInterrupt בתהליכון הקורא - המשימה בלולאה לא ממשיכה לבד
+        future.cancel()
+        raise
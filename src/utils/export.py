@@ -0,0 +1,188 @@
+"""
+ייצוא תוצאות בזרימה
+
+התוצאה של עבודה נכתבת פעם אחת לדיסק כקובץ JSON Lines דחוס: שורת כותרת עם
+הסיכום ומספר הקטעים, ואחריה שורה לכל קטע תמלול. קבצי ההורדה (TXT, JSON,
+JSONL, SRT, VTT - עם או בלי gzip) נוצרים מהקובץ הזה בזרימה רק כשמבקשים
+אותם, ונשמרים לידו. התצוגה קוראת עמוד אחד של קטעים בכל פעם, כך שהזיכרון
+לא תלוי באורך התמלול.
+"""
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence
+import gzip
+import json
+import os
+import shutil
+import uuid
+
+from utils.segment_store import subtitle_time
+from utils.segments import TranscriptSegment
+
+DEFAULT_RESULTS_DIR = "results"
+DEFAULT_PAGE_SIZE = 100
+RESULT_SUFFIX = ".jsonl.gz"
+
+# פורמט: (שם להצגה, סוג MIME)
+EXPORT_FORMATS = {
+    "txt": ("טקסט", "text/plain"),
+    "json": ("JSON", "application/json"),
+    "jsonl": ("JSON Lines - קטע בכל שורה", "application/jsonl"),
+    "srt": ("כתוביות SRT", "application/x-subrip"),
+    "vtt": ("כתוביות VTT", "text/vtt")
+}
+
+
+def _open_target(path: Path, compress: bool) -> IO[str]:
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+class ResultFile:
+    def __init__(self, path: Path):
+        """
+        קובץ התוצאה של עבודה אחת
+
+        Args:
+            path: הקובץ שנכתב ב-write (job_id.jsonl.gz)
+        """
+        self.path = Path(path)
+        self._header: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def write(
+        cls,
+        path: Path,
+        segments: Sequence[TranscriptSegment],
+        summary: str,
+        **metadata
+    ) -> "ResultFile":
+        """כתיבת התוצאה שורה אחרי שורה (אטומית - קובץ קיים תמיד שלם)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        header = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "summary": summary,
+            "segments": len(segments),
+            **metadata
+        }
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                f.write(json.dumps(header, ensure_ascii=False) + "\n")
+                for segment in segments:
+                    f.write(json.dumps(segment.to_dict(), ensure_ascii=False) + "\n")
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return cls(path)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @property
+    def header(self) -> Dict[str, Any]:
+        """שורת הכותרת (נקראת פעם אחת, בלי לקרוא את הקטעים)"""
+        if self._header is None:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                self._header = json.loads(f.readline())
+        return self._header
+
+    @property
+    def summary(self) -> str:
+        return self.header["summary"]
+
+    @property
+    def segment_count(self) -> int:
+        return self.header["segments"]
+
+    def iter_segments(self, start: int = 0, stop: Optional[int] = None) -> Iterator[TranscriptSegment]:
+        """קטעי התמלול בזרימה, מ-start ועד stop"""
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            f.readline()
+            for line in islice(f, start, stop):
+                yield TranscriptSegment.from_dict(json.loads(line))
+
+    def page(self, index: int, size: int = DEFAULT_PAGE_SIZE) -> List[TranscriptSegment]:
+        """עמוד אחד של קטעים (index מתחיל מ-0)"""
+        return list(self.iter_segments(index * size, (index + 1) * size))
+
+    def export(self, fmt: str, compress: bool = False) -> Path:
+        """
+        קובץ ההורדה בפורמט המבוקש - נוצר בזרימה בבקשה הראשונה ונשמר ליד קובץ התוצאה
+
+        Args:
+            fmt: אחד מ-EXPORT_FORMATS
+            compress: דחיסת gzip
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"פורמט ייצוא לא נתמך: {fmt}")
+
+        stem = self.path.name[:-len(RESULT_SUFFIX)] if self.path.name.endswith(RESULT_SUFFIX) else self.path.stem
+        # ייצוא JSONL בשם משלו - job_id.jsonl.gz הוא קובץ התוצאה עצמו, עם שורת הכותרת
+        name = f"{stem}.segments.jsonl" if fmt == "jsonl" else f"{stem}.{fmt}"
+        target = self.path.with_name(name + (".gz" if compress else ""))
+        if target.exists():
+            return target
+
+        # שם זמני ייחודי - כמה סשנים יכולים לבקש את אותו קובץ בו-זמנית
+        tmp = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with _open_target(tmp, compress) as out:
+                getattr(self, f"_write_{fmt}")(out)
+            os.replace(tmp, target)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return target
+
+    def _write_text(self, out: IO[str], escape=lambda text: text) -> None:
+        """הטקסט הרציף של התמלול, קטע אחרי קטע (כמו segments_to_text)"""
+        first = True
+        for segment in self.iter_segments():
+            if not segment.text:
+                continue
+            if not first:
+                out.write(" ")
+            out.write(escape(segment.text))
+            first = False
+
+    def _write_txt(self, out: IO[str]) -> None:
+        out.write(f"תאריך ושעה: {self.header['timestamp']}\n\nתמלול:\n")
+        self._write_text(out)
+        out.write(f"\n\nסיכום:\n{self.summary}")
+
+    def _write_json(self, out: IO[str]) -> None:
+        # אותו מבנה כמו קודם, כשהתמלול נכתב בחלקים בתוך המחרוזת
+        out.write('{\n  "timestamp": ' + json.dumps(self.header["timestamp"]) + ',\n  "transcription": "')
+        self._write_text(out, lambda text: json.dumps(text, ensure_ascii=False)[1:-1])
+        out.write('",\n  "summary": ' + json.dumps(self.summary, ensure_ascii=False) + "\n}")
+
+    def _write_jsonl(self, out: IO[str]) -> None:
+        """קטע בכל שורה - השורות של קובץ התוצאה כמו שהן, בלי שורת הכותרת"""
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            f.readline()
+            shutil.copyfileobj(f, out)
+
+    def _write_srt(self, out: IO[str]) -> None:
+        for i, segment in enumerate(self.iter_segments()):
+            if i:
+                out.write("\n")
+            out.write(
+                f"{i + 1}\n"
+                f"{subtitle_time(round(segment.start * 1000), ',')} --> "
+                f"{subtitle_time(round(segment.end * 1000), ',')}\n"
+                f"{segment.text}\n"
+            )
+
+    def _write_vtt(self, out: IO[str]) -> None:
+        out.write("WEBVTT\n")
+        for segment in self.iter_segments():
+            out.write(
+                f"\n{subtitle_time(round(segment.start * 1000), '.')} --> "
+                f"{subtitle_time(round(segment.end * 1000), '.')}\n"
+                f"{segment.text}\n"
+            )
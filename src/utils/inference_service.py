@@ -0,0 +1,241 @@
+"""
+שירות הסקה משותף שמאחד חלונות אודיו מכל העבודות הפעילות לאצוות
+
+כל עבודה מחלקת את האודיו שלה ברגעי שקט לחלונות של עד 30 שניות ושולחת
+אותם לתור אחד. תהליכון השירות אוסף חלונות עד לגודל אצווה מרבי או עד
+שעובר זמן ההמתנה המרבי, ומריץ את המקודד והמפענח של המודל על כל האצווה
+בבת אחת. כל עבודה מקבלת את הקטעים שלה בחזרה לפי הסדר.
+
+השירות שייך לרשומת המודל במאגר: נוצר בשימוש הראשון ונסגר כשהמודל מפונה.
+"""
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+from utils.audio import SAMPLE_RATE, split_on_silence
+from utils.model_registry import ModelRegistry
+from utils.segments import TranscriptSegment
+
+# חלונות של עד 30 שניות - אורך הקלט של Whisper
+WINDOW_TARGET_SECONDS = 25.0
+WINDOW_SEARCH_SECONDS = 5.0
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_SECONDS = 0.05
+
+# סינון חלונות ללא דיבור, כמו ב-faster-whisper
+NO_SPEECH_THRESHOLD = 0.6
+LOG_PROB_THRESHOLD = -1.0
+
+TIME_PRECISION = 0.02
+
+
+class _WindowRequest:
+    def __init__(self, features: np.ndarray, offset: float, duration: float):
+        self.features = features
+        self.offset = offset
+        self.duration = duration
+        self.future: Future = Future()
+
+
+class InferenceService:
+    def __init__(
+        self,
+        model,
+        language: str = "he",
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS,
+        beam_size: int = 5,
+        logger: Optional[logging.Logger] = None
+    ):
+        """
+        Args:
+            model: WhisperModel טעון (משותף לכל העבודות)
+            language: שפת התמלול
+            max_batch_size: מספר החלונות המרבי באצווה
+            max_wait_seconds: כמה זמן לחכות לחלונות נוספים לפני הרצת אצווה חלקית
+            beam_size: רוחב החיפוש בפענוח
+            logger: מערכת הלוגים
+        """
+        from faster_whisper.tokenizer import Tokenizer
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.beam_size = beam_size
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self.tokenizer = Tokenizer(
+            model.hf_tokenizer,
+            model.model.is_multilingual,
+            task="transcribe",
+            language=language
+        )
+        self.prompt = list(self.tokenizer.sot_sequence)
+        self.n_frames = model.feature_extractor.nb_max_frames
+
+        self._requests: "queue.Queue[Optional[_WindowRequest]]" = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="inference-service", daemon=True)
+        self._thread.start()
+
+    def transcribe(self, audio: np.ndarray, progress_callback=None) -> Iterator[TranscriptSegment]:
+        """
+        תמלול אודיו של עבודה אחת דרך השירות
+
+        כל החלונות נשלחים מיד, והקטעים מוחזרים לפי הסדר ברגע שהחלון שלהם פוענח.
+        """
+        windows = split_on_silence(audio, WINDOW_TARGET_SECONDS, WINDOW_SEARCH_SECONDS)
+        requests = [self.submit(audio[start:end], start / SAMPLE_RATE) for start, end in windows]
+        total = len(requests)
+
+        try:
+            for index, request in enumerate(requests, 1):
+                yield from request.future.result()
+                if progress_callback:
+                    progress_callback(index / total, f"פוענחו {index} מתוך {total} חלונות")
+        finally:
+            for request in requests:
+                request.future.cancel()
+
+    def submit(self, window: np.ndarray, offset: float) -> _WindowRequest:
+        """שליחת חלון בודד; חישוב המאפיינים נעשה בתהליכון של העבודה"""
+        features = self.model.feature_extractor(np.asarray(window, dtype=np.float32))
+        features = features[:, :self.n_frames]
+        if features.shape[1] < self.n_frames:
+            features = np.pad(features, ((0, 0), (0, self.n_frames - features.shape[1])))
+        request = _WindowRequest(features, offset, len(window) / SAMPLE_RATE)
+        self._requests.put(request)
+        return request
+
+    def close(self) -> None:
+        """עצירת תהליכון השירות (כשהמודל מפונה מהמאגר); חלונות שעוד ממתינים נכשלים"""
+        self._closed.set()
+        self._requests.put(None)
+        self._thread.join()
+
+    def _collect_batch(self) -> List[_WindowRequest]:
+        """המתנה לחלון ראשון, ואיסוף נוספים עד לגודל המרבי או עד תום זמן ההמתנה"""
+        batch = []
+        request = self._requests.get()
+        deadline = time.monotonic() + self.max_wait_seconds
+        # None מסמן שהשירות נסגר
+        while request is not None:
+            batch.append(request)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+        # חלונות של עבודות שבוטלו לא נכנסים לאצווה
+        return [request for request in batch if request.future.set_running_or_notify_cancel()]
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            try:
+                results = self._decode(batch)
+                for request, segments in zip(batch, results):
+                    request.future.set_result(segments)
+            except Exception as e:
+                self.logger.error(f"שגיאה בהרצת אצווה בשירות ההסקה: {str(e)}")
+                for request in batch:
+                    request.future.set_exception(e)
+
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError("שירות ההסקה נסגר"))
+
+    def _decode(self, batch: List[_WindowRequest]) -> List[List[TranscriptSegment]]:
+        """הרצת המקודד והמפענח על כל האצווה"""
+        import ctranslate2
+
+        features = ctranslate2.StorageView.from_array(
+            np.ascontiguousarray(np.stack([request.features for request in batch]))
+        )
+        encoder_output = self.model.model.encode(features, to_cpu=False)
+        results = self.model.model.generate(
+            encoder_output,
+            [self.prompt] * len(batch),
+            beam_size=self.beam_size,
+            max_length=self.model.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            suppress_tokens=[-1]
+        )
+
+        decoded = []
+        for request, result in zip(batch, results):
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.scores[0] < LOG_PROB_THRESHOLD:
+                decoded.append([])
+                continue
+            decoded.append(self._split_segments(result.sequences_ids[0], request))
+        return decoded
+
+    def _split_segments(self, tokens: List[int], request: _WindowRequest) -> List[TranscriptSegment]:
+        """פירוק הפלט לקטעים לפי אסימוני הזמן, בזמנים ביחס לתחילת האודיו"""
+        timestamp_begin = self.tokenizer.timestamp_begin
+        segments = []
+        start: Optional[float] = None
+        text_tokens: List[int] = []
+
+        def emit(end: float) -> None:
+            text = self.tokenizer.decode(text_tokens).strip()
+            if text:
+                segments.append(TranscriptSegment(
+                    request.offset + (start or 0.0),
+                    request.offset + min(end, request.duration),
+                    text
+                ))
+
+        for token in tokens:
+            if token >= timestamp_begin:
+                position = (token - timestamp_begin) * TIME_PRECISION
+                if start is not None and text_tokens:
+                    emit(position)
+                    text_tokens = []
+                    start = None
+                else:
+                    start = position
+            elif token < self.tokenizer.eot:
+                text_tokens.append(token)
+
+        if text_tokens:
+            emit(request.duration)
+        return segments
+
+
+@contextmanager
+def inference_service(
+    registry: ModelRegistry,
+    model_key: Tuple[str, str, str],
+    language: str = "he",
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS,
+    logger: Optional[logging.Logger] = None,
+    **load_kwargs
+):
+    """
+    שירות ההסקה של מודל במאגר, לכל שפה (נוצר פעם אחת; פרמטרי האצווה משמשים רק ביצירה)
+
+    ההפניה למודל מוחזקת לאורך בלוק ה-with, כך שהמודל והשירות לא מפונים באמצע עבודה.
+    """
+    def create(model) -> InferenceService:
+        return InferenceService(model, language, max_batch_size, max_wait_seconds, logger=logger)
+
+    with registry.service(*model_key, ("inference", language), create, **load_kwargs) as service:
+        yield service
@@ -0,0 +1,72 @@
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+import hashlib
+import os
+import re
+import tempfile
+
+INGEST_CHUNK_SIZE = 4 * 1024 * 1024
+
+_CONTENT_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+def content_hash_from_name(path: Path) -> Optional[str]:
+    """הגיבוב של קובץ שנשמר בשם לפי תוכנו (ללא קריאתו), או None"""
+    stem = Path(path).stem
+    return stem if _CONTENT_NAME.match(stem) else None
+
+
+def ingest_upload(
+    upload: BinaryIO,
+    name: str,
+    directory: Path,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    make_room: Optional[Callable[[int], None]] = None
+) -> Path:
+    """
+    שמירת קובץ שהועלה בשם לפי תוכנו (SHA-256 + הסיומת המקורית)
+
+    התוכן נקרא דרך memoryview על החוצץ הקיים, במנות חסומות וללא העתקה.
+    אם קובץ עם אותו תוכן כבר קיים - לא נכתב דבר. כתיבה חדשה נעשית לקובץ
+    זמני ומוחלפת אטומית, כך ששתי העלאות במקביל לא דורסות זו את זו.
+
+    Args:
+        upload: אובייקט הקובץ שהועלה (BytesIO / UploadedFile)
+        name: שם הקובץ המקורי - לצורך הסיומת בלבד
+        directory: תיקיית האחסון
+        chunk_size: גודל מנת הקריאה והכתיבה
+        make_room: נקראת עם גודל הקובץ לפני כתיבה חדשה בלבד (למשל ScratchManager.ensure_space),
+            כך שהעלאה שכבר שמורה לא מפנה קבצים אחרים - וגם לא את עצמה
+
+    Returns:
+        הנתיב של הקובץ השמור
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = Path(name).suffix.lower()
+
+    with upload.getbuffer() as buffer:
+        size = len(buffer)
+        digest = hashlib.sha256()
+        for offset in range(0, size, chunk_size):
+            digest.update(buffer[offset:offset + chunk_size])
+
+        target = directory / f"{digest.hexdigest()}{suffix}"
+        if target.exists() and target.stat().st_size == size:
+            # עדכון זמן השינוי - לפיו מפונות העלאות ישנות מהשטח הזמני
+            os.utime(target)
+            return target
+
+        if make_room is not None:
+            make_room(size)
+        fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for offset in range(0, size, chunk_size):
+                    f.write(buffer[offset:offset + chunk_size])
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    return target
@@ -0,0 +1,531 @@
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import psutil
+
+from utils.segments import TranscriptSegment
+
+# סף המשאבים לקבלת עבודה חדשה לתור
+MIN_AVAILABLE_MEMORY_BYTES = 4 * 1024 * 1024 * 1024
+MIN_FREE_DISK_BYTES = 1 * 1024 * 1024 * 1024
+
+DEFAULT_DB_PATH = "jobs/jobs.db"
+DEFAULT_WORKERS = 1
+POLL_INTERVAL_SECONDS = 1.0
+# זמן ההמתנה לסיום העבודה הנוכחית בכיבוי, לפני עצירה בכוח
+DEFAULT_SHUTDOWN_SECONDS = 10.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS job_progress (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    progress REAL NOT NULL,
+    message TEXT,
+    PRIMARY KEY (job_id, stage)
+);
+CREATE TABLE IF NOT EXISTS job_segments (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+class AdmissionError(Exception):
+    """אין מספיק משאבים לקבלת עבודה חדשה"""
+
+
+class JobQueue:
+    def __init__(
+        self,
+        db_path: Path,
+        logger: Optional[logging.Logger] = None,
+        min_memory_bytes: int = MIN_AVAILABLE_MEMORY_BYTES,
+        min_disk_bytes: int = MIN_FREE_DISK_BYTES,
+        max_queued: int = 20
+    ):
+        """
+        תור עבודות מתמיד מבוסס SQLite, משותף לממשק ולתהליכי העבודה
+
+        Args:
+            db_path: קובץ מסד הנתונים
+            logger: מערכת הלוגים
+            min_memory_bytes: זיכרון פנוי מינימלי לקבלת עבודה
+            min_disk_bytes: שטח דיסק פנוי מינימלי לקבלת עבודה
+            max_queued: מספר העבודות המרבי שממתינות בתור
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self.min_memory_bytes = min_memory_bytes
+        self.min_disk_bytes = min_disk_bytes
+        self.max_queued = max_queued
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def check_admission(self, input_path: Path) -> None:
+        """בקרת כניסה - דחיית עבודה כשאין מספיק זיכרון, דיסק או מקום בתור"""
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(str(Path(input_path).resolve().anchor))
+
+        if memory.available < self.min_memory_bytes:
+            raise AdmissionError("אין מספיק זיכרון פנוי לעבודה חדשה - נסה שוב מאוחר יותר")
+        if disk.free < self.min_disk_bytes:
+            raise AdmissionError("אין מספיק שטח דיסק פנוי לעבודה חדשה - נסה שוב מאוחר יותר")
+
+        with self._connect() as conn:
+            queued = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+        if queued >= self.max_queued:
+            raise AdmissionError("התור מלא - נסה שוב מאוחר יותר")
+
+    def submit(self, input_path: Path, params: Optional[Dict[str, Any]] = None) -> str:
+        """הוספת עבודה לתור; מעלה AdmissionError אם אין משאבים"""
+        self.check_admission(input_path)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, input_path, params, created, updated) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, str(input_path), json.dumps(params or {}), now, now)
+            )
+        self.logger.info(f"עבודה {job_id} נוספה לתור: {input_path}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """מצב העבודה, ההתקדמות בכל שלב והתוצאה אם הסתיימה"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            progress = {
+                r["stage"]: {"progress": r["progress"], "message": r["message"]}
+                for r in conn.execute(
+                    "SELECT stage, progress, message FROM job_progress WHERE job_id = ?",
+                    (job_id,)
+                )
+            }
+            position = None
+            if row["status"] == "queued":
+                position = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created < ?",
+                    (row["created"],)
+                ).fetchone()[0]
+
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "input_path": row["input_path"],
+            "progress": progress,
+            "queue_position": position,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created": row["created"],
+            "updated": row["updated"]
+        }
+
+    def recent_segments(self, job_id: str, limit: int) -> List[TranscriptSegment]:
+        """קטעי התמלול האחרונים שפוענחו עד כה"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT start, end, text FROM job_segments WHERE job_id = ? "
+                "ORDER BY idx DESC LIMIT ?",
+                (job_id, limit)
+            ).fetchall()
+        return [TranscriptSegment(r["start"], r["end"], r["text"]) for r in reversed(rows)]
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """לקיחת העבודה הוותיקה ביותר בתור (אטומית בין תהליכים)"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, input_path, params FROM jobs WHERE status = 'queued' "
+                    "ORDER BY created LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, updated = ? WHERE id = ?",
+                        (worker, time.time(), row["id"])
+                    )
+                    # עבודה שהוחזרה לתור מתחילה מחדש
+                    conn.execute("DELETE FROM job_progress WHERE job_id = ?", (row["id"],))
+                    conn.execute("DELETE FROM job_segments WHERE job_id = ?", (row["id"],))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "input_path": Path(row["input_path"]),
+            "params": json.loads(row["params"])
+        }
+
+    def update_progress(self, job_id: str, stage: str, progress: float, message: Optional[str]) -> None:
+        """עדכון ההתקדמות של שלב (משמש גם כאות חיים של העובד)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_progress (job_id, stage, progress, message) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, stage, progress, message)
+            )
+            conn.execute("UPDATE jobs SET updated = ? WHERE id = ?", (time.time(), job_id))
+
+    def add_segments(self, job_id: str, start_index: int, segments: List[TranscriptSegment]) -> None:
+        """שמירת קטעי תמלול חלקיים לתצוגה החיה"""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_segments (job_id, idx, start, end, text) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (job_id, start_index + i, seg.start, seg.end, seg.text)
+                    for i, seg in enumerate(segments)
+                ]
+            )
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        """סימון העבודה כהושלמה ושמירת התוצאה"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id)
+            )
+            conn.execute("DELETE FROM job_segments WHERE job_id = ?", (job_id,))
+
+    def fail(self, job_id: str, error: str) -> None:
+        """סימון העבודה כנכשלה"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+            conn.execute("DELETE FROM job_segments WHERE job_id = ?", (job_id,))
+
+    def set_worker_state(self, worker: str, state: str) -> None:
+        """עדכון מצב החימום של תהליך עבודה (loading / ready)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker, state, updated) VALUES (?, ?, ?)",
+                (worker, state, time.time())
+            )
+
+    def worker_states(self) -> Dict[str, str]:
+        """מצב תהליכי העבודה החיים (תהליכים שהסתיימו במחשב הזה מושמטים)"""
+        host = os.uname().nodename
+        with self._connect() as conn:
+            rows = conn.execute("SELECT worker, state FROM workers").fetchall()
+        states = {}
+        for row in rows:
+            worker_host, _, pid = row["worker"].rpartition(":")
+            if worker_host == host and not psutil.pid_exists(int(pid or 0)):
+                continue
+            states[row["worker"]] = row["state"]
+        return states
+
+    def active_inputs(self) -> List[Path]:
+        """קבצי הקלט של עבודות שממתינות או רצות - אסור לפנות אותם מהשטח הזמני"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT input_path FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        return [Path(row["input_path"]) for row in rows]
+
+    def requeue_orphans(self) -> int:
+        """החזרת עבודות של תהליכי עבודה שאינם חיים עוד לתור"""
+        host = os.uname().nodename
+        with self._connect() as conn:
+            orphans = []
+            for row in conn.execute("SELECT id, worker FROM jobs WHERE status = 'running'"):
+                worker_host, _, pid = (row["worker"] or "").rpartition(":")
+                if worker_host == host and not psutil.pid_exists(int(pid or 0)):
+                    orphans.append(row["id"])
+            conn.executemany(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE id = ?",
+                [(job_id,) for job_id in orphans]
+            )
+        if orphans:
+            self.logger.warning(f"{len(orphans)} עבודות של תהליכים שהסתיימו הוחזרו לתור")
+        return len(orphans)
+
+
+def _worker_main(db_path: str, config: Dict[str, Any], slot: int = 0, stop=None) -> None:
+    """
+    תהליך עבודה - המודלים נטענים פעם אחת ומשרתים עבודה אחרי עבודה
+
+    עם concurrency גדול מ-1 כמה עבודות רצות במקביל בתהליכונים של אותו תהליך,
+    וחולקות את המודל ואת שירות ההסקה שמאחד את החלונות שלהן לאצוות.
+    התהליך מסתיים כש-stop מסומן, אחרי שהעבודות הנוכחיות הסתיימו.
+    """
+    stop = stop or threading.Event()
+    from utils.logger import setup_logger
+    from utils.cache import get_result_cache
+    from utils.metrics import get_metrics_recorder
+    from utils.scratch import get_scratch_manager
+    from utils.segment_store import get_segment_store
+
+    # לכל תא במאגר קובץ לוג משלו; תהליך שמחליף תהליך שמת ממשיך את הקובץ שלו
+    logger = setup_logger(f"worker_{slot}", config.get("logging"))
+    worker = f"{os.uname().nodename}:{os.getpid()}"
+    queue = JobQueue(Path(db_path), logger)
+    cache = get_result_cache(config.get("cache_dir"), config.get("cache_max_size_mb"), logger)
+    recorder = get_metrics_recorder(config.get("metrics_dir"), logger)
+    store = get_segment_store(config.get("store_dir"), logger)
+    # המנהל נוצר כאן עם הגדרות העבודה, וכל המעבדים בתהליך משתמשים בו
+    get_scratch_manager(
+        config.get("scratch_dir"),
+        config.get("scratch_quota_mb"),
+        config.get("scratch_ram_dir"),
+        config.get("scratch_ram_max_mb"),
+        queue.active_inputs,
+        logger
+    )
+
+    queue.set_worker_state(worker, "loading")
+    threads = [
+        threading.Thread(
+            target=_worker_loop,
+            args=(queue, config, cache, recorder, store, worker, logger, stop),
+            daemon=True
+        )
+        for _ in range(max(config.get("concurrency", 1), 1))
+    ]
+    for thread in threads:
+        thread.start()
+    logger.info(f"תהליך עבודה {worker} מוכן ({len(threads)} עבודות במקביל)")
+    for thread in threads:
+        thread.join()
+    logger.info(f"תהליך עבודה {worker} הסתיים")
+
+
+def _worker_loop(
+    queue: JobQueue,
+    config: Dict[str, Any],
+    cache,
+    recorder,
+    store,
+    worker: str,
+    logger: logging.Logger,
+    stop
+) -> None:
+    """לולאת עבודה אחת; לכל לולאה מעבד משלה כדי שקבצי הביניים לא יתערבבו"""
+    from utils.processor import MediaProcessor
+    from utils.pipeline import run_pipeline
+    from utils.logger import log_context
+    from utils.export import ResultFile, DEFAULT_RESULTS_DIR, RESULT_SUFFIX
+    from utils.vad import VadSettings
+    from utils.llm_client import LLMSettings
+
+    vad_config = config.get("vad") or {}
+    results_dir = Path(config.get("results_dir") or DEFAULT_RESULTS_DIR)
+    processor = MediaProcessor(
+        config["whisper_model"],
+        config["gemini_api_key"],
+        logger,
+        memory_budget_mb=config.get("memory_budget_mb"),
+        parallel_workers=config.get("parallel_workers", 1),
+        inference_batch_size=config.get("inference_batch_size", 0),
+        inference_max_wait_ms=config.get("inference_max_wait_ms"),
+        checkpoint_dir=config.get("checkpoint_dir"),
+        vad=VadSettings.from_dict(vad_config) if vad_config.get("enabled") else None,
+        llm=LLMSettings.from_dict(config.get("llm") or {})
+    )
+    # חימום - המודל נטען מיד עם עליית התהליך, במקביל להעלאת הקובץ בממשק
+    try:
+        processor.whisper_model
+    except Exception as e:
+        logger.warning(f"טעינת המודל בחימום נכשלה: {str(e)}")
+    queue.set_worker_state(worker, "ready")
+
+    while not stop.is_set():
+        job = queue.claim(worker)
+        if job is None:
+            stop.wait(POLL_INTERVAL_SECONDS)
+            continue
+
+        job_id = job["id"]
+        logger.info(f"מעבד עבודה {job_id}")
+        pending: List[TranscriptSegment] = []
+        written = 0
+        last_flush = time.monotonic()
+
+        last_progress: Dict[str, float] = {}
+
+        def on_progress(stage: str, p: float, message: str) -> None:
+            # לכל היותר כתיבה אחת לשנייה לכל שלב, וסיום השלב תמיד נכתב
+            now = time.monotonic()
+            if p < 1.0 and now - last_progress.get(stage, 0.0) < POLL_INTERVAL_SECONDS:
+                return
+            last_progress[stage] = now
+            queue.update_progress(job_id, stage, p, message)
+
+        def on_segment(segment: TranscriptSegment) -> None:
+            nonlocal written, last_flush
+            pending.append(segment)
+            # כתיבה במנות כדי לא לפתוח טרנזקציה לכל קטע
+            if time.monotonic() - last_flush >= POLL_INTERVAL_SECONDS:
+                queue.add_segments(job_id, written, pending)
+                written += len(pending)
+                pending.clear()
+                last_flush = time.monotonic()
+
+        # מזהה העבודה מצורף לכל רשומת לוג מהעבודה (ברשומות JSON)
+        with log_context(job_id=job_id):
+            try:
+                segments, summary = run_pipeline(
+                    processor,
+                    job["input_path"],
+                    cache,
+                    on_progress,
+                    on_segment,
+                    recorder,
+                    job["params"].get("estimates"),
+                    store,
+                    job["params"].get("name")
+                )
+                # התוצאה נכתבת פעם אחת לקובץ, ובתור נשמר רק הנתיב אליו
+                results = ResultFile.write(
+                    results_dir / f"{job_id}{RESULT_SUFFIX}",
+                    segments,
+                    summary,
+                    name=job["params"].get("name")
+                )
+                queue.complete(job_id, {"results_path": str(results.path)})
+                logger.info(f"עבודה {job_id} הושלמה")
+            except Exception as e:
+                logger.error(f"עבודה {job_id} נכשלה: {str(e)}")
+                queue.fail(job_id, str(e))
+            finally:
+                # הקלט נשמר לפי תוכנו ועשוי לשמש עבודות אחרות - רק קבצי הביניים נמחקים;
+                # ההעלאה עצמה מפונה לפי LRU כשהשטח הזמני מגיע למכסה
+                processor.cleanup()
+                recorder.write_prometheus()
+
+
+class WorkerPool:
+    def __init__(self, queue: JobQueue, config: Dict[str, Any], workers: int = DEFAULT_WORKERS):
+        """
+        מאגר קבוע של תהליכי עבודה שמחזיקים את המודלים ומעבדים את התור
+
+        Args:
+            queue: תור העבודות
+            config: הגדרות המודלים עבור MediaProcessor בכל תהליך
+            workers: מספר תהליכי העבודה (0 - התור נשמר בלי תהליכי עבודה, למשל במדידת הממשק)
+        """
+        self.queue = queue
+        self.config = config
+        self.workers = workers
+        # תהליך העבודה לפי מספר התא שלו
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self._lock = threading.Lock()
+        # spawn ולא fork - fork אחרי יצירת תהליכונים של torch/ctranslate2 עלול להיתקע
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+
+    def ensure_running(self) -> None:
+        """הפעלת תהליכי העבודה, והחלפת תהליכים שמתו"""
+        with self._lock:
+            alive = {slot: p for slot, p in self.processes.items() if p.is_alive()}
+            if len(alive) < len(self.processes):
+                self.queue.logger.warning("תהליך עבודה הסתיים - מפעיל מחדש")
+                self.queue.requeue_orphans()
+            self.processes = alive
+            if self._stop.is_set():
+                return
+
+            for slot in range(self.workers):
+                if slot in self.processes:
+                    continue
+                # לא daemon - תהליך עבודה פותח בעצמו מאגר תהליכים לתמלול מקבילי,
+                # ותהליך daemon לא יכול ליצור תהליכי בן; הסיום הוא דרך shutdown
+                process = self._context.Process(
+                    target=_worker_main,
+                    args=(str(self.queue.db_path), self.config, slot, self._stop)
+                )
+                process.start()
+                self.processes[slot] = process
+
+    def shutdown(self, timeout: float = DEFAULT_SHUTDOWN_SECONDS) -> None:
+        """
+        כיבוי תהליכי העבודה: כל תהליך מסיים את העבודות הנוכחיות ויוצא,
+        ותהליך שלא הסתיים תוך timeout נעצר (העבודה שלו תוחזר לתור בהפעלה הבאה)
+        """
+        with self._lock:
+            self._stop.set()
+            deadline = time.monotonic() + timeout
+            for process in self.processes.values():
+                process.join(max(deadline - time.monotonic(), 0))
+            for process in self.processes.values():
+                if process.is_alive():
+                    self.queue.logger.warning(f"תהליך עבודה {process.pid} לא הסתיים בזמן - עוצר אותו")
+                    process.terminate()
+                    process.join()
+            self.processes = {}
+
+
+_job_system: Optional[WorkerPool] = None
+_job_system_lock = threading.Lock()
+
+
+def get_worker_pool(
+    config: Dict[str, Any],
+    db_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    logger: Optional[logging.Logger] = None
+) -> WorkerPool:
+    """החזרת מאגר העובדים של התהליך (נוצר פעם אחת) לאחר וידוא שהוא פועל"""
+    global _job_system
+    with _job_system_lock:
+        if _job_system is None:
+            queue = JobQueue(Path(db_path or DEFAULT_DB_PATH), logger)
+            queue.requeue_orphans()
+            _job_system = WorkerPool(queue, config, DEFAULT_WORKERS if workers is None else workers)
+            # תהליכי העבודה אינם daemon ולכן נסגרים במפורש ביציאה
+            atexit.register(_job_system.shutdown)
+    _job_system.ensure_running()
+    return _job_system
@@ -0,0 +1,229 @@
+"""
+לקוח משותף למודל הסיכום: הגבלת קצב, הגבלת מקביליות, ניסיונות חוזרים ואיחוד בקשות
+
+כל העבודות בתהליך עוברות דרך לקוח אחד לכל מפתח ומודל, כך שהמכסה של ה-API
+מתחלקת ביניהן במקום שכל עבודה תנצל אותה לבדה. שגיאות זמניות (429, 5xx,
+חריגת זמן) מנוסות שוב בהשהיה אקספוננציאלית, ופרומפט זהה שכבר נשלח ועוד
+לא חזר לא נשלח פעם נוספת - כל הממתינים לו מקבלים את אותה תשובה.
+
+המודל עצמו נקרא תמיד מהלולאה הקבועה של התהליך (utils.event_loop): לקוח
+ה-grpc.aio של google-generativeai נוצר בבקשה הראשונה וקשור ללולאה שבה
+נוצר, ולקוח אחד משרת עבודה אחרי עבודה. קריאה מלולאה אחרת מועברת ללולאה
+הקבועה וממתינה לתוצאה משם.
+"""
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from utils.event_loop import get_event_loop, run_coroutine
+
+# קודי HTTP של שגיאות זמניות שכדאי לנסות שוב
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+@dataclass(frozen=True)
+class LLMSettings:
+    """הגדרות הלקוח המשותף"""
+    # קצב בקשות ממוצע ומספר הבקשות שמותר לשלוח ברצף אחרי המתנה
+    requests_per_minute: float = 60.0
+    burst: int = 10
+    # בקשות במקביל מכל העבודות בתהליך
+    max_concurrency: int = 8
+    timeout_seconds: float = 120.0
+    max_retries: int = 5
+    backoff_base_seconds: float = 1.0
+    backoff_max_seconds: float = 60.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LLMSettings":
+        """הגדרות ממילון (מפתחות לא מוכרים מושמטים)"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+def is_retryable(error: BaseException) -> bool:
+    """האם השגיאה זמנית (מכסה, עומס בשרת, חריגת זמן, ניתוק)"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # חריגות google.api_core נושאות את קוד ה-HTTP במאפיין code
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: int):
+        """
+        דלי אסימונים משותף לכל התהליכונים
+
+        Args:
+            rate_per_second: קצב מילוי הדלי (0 - ללא הגבלה)
+            capacity: מספר האסימונים המרבי בדלי
+        """
+        self.rate = rate_per_second
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """לקיחת אסימון; מחזיר כמה שניות לחכות עד שהוא זמין"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # יתרה שלילית היא בקשות שכבר ממתינות לאסימונים הבאים
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class LLMClient:
+    def __init__(
+        self,
+        model: Callable[[], Any],
+        settings: LLMSettings = LLMSettings(),
+        logger: Optional[logging.Logger] = None
+    ):
+        """
+        Args:
+            model: פונקציה שיוצרת את המודל (עם generate_content_async), נקראת בשימוש הראשון
+            settings: הגדרות הקצב, המקביליות והניסיונות החוזרים
+            logger: מערכת הלוגים
+        """
+        self.settings = settings
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self._model_factory = model
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.bucket = TokenBucket(settings.requests_per_minute / 60.0, settings.burst)
+        # המגביל והבקשות שבדרך שייכים ללולאה הקבועה ונגישים רק ממנה
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {"requests": 0, "retries": 0, "coalesced": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                self._model = self._model_factory()
+            return self._model
+
+    def stats(self) -> Dict[str, int]:
+        """מונים: בקשות שנשלחו, ניסיונות חוזרים, בקשות שאוחדו ובקשות שנכשלו"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def generate_content(self, prompt: str):
+        """בקשה סינכרונית (מתהליכון שאינו הלולאה הקבועה)"""
+        return run_coroutine(self._generate(prompt))
+
+    async def generate_content_async(self, prompt: str):
+        """
+        בקשה למודל; פרומפט זהה לבקשה שעדיין בדרך מקבל את התשובה שלה
+
+        Returns:
+            תשובת המודל (עם המאפיין text)
+        """
+        loop = get_event_loop()
+        if asyncio.get_running_loop() is loop:
+            return await self._generate(prompt)
+        # לולאה אחרת (למשל asyncio.run של הקורא) - הבקשה רצה בלולאה הקבועה
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._generate(prompt), loop))
+
+    async def _generate(self, prompt: str):
+        """רץ בלולאה הקבועה בלבד"""
+        shared = self._inflight.get(prompt)
+        if shared is None:
+            shared = asyncio.ensure_future(self._generate_with_retries(prompt))
+            self._inflight[prompt] = shared
+            shared.add_done_callback(lambda done: self._finished(prompt, done))
+        else:
+            self._count("coalesced")
+        # shield - ביטול של ממתין אחד לא מבטל את הבקשה לשאר
+        return await asyncio.shield(shared)
+
+    def _finished(self, prompt: str, done: asyncio.Future) -> None:
+        if self._inflight.get(prompt) is done:
+            del self._inflight[prompt]
+        # השגיאה מגיעה לממתינים; אם כולם בוטלו היא לא מדווחת כ"לא נקראה"
+        if not done.cancelled():
+            done.exception()
+
+    async def _generate_with_retries(self, prompt: str):
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(max(self.settings.max_concurrency, 1))
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.bucket.reserve())
+            async with self._limit:
+                self._count("requests")
+                try:
+                    return await asyncio.wait_for(
+                        self.model.generate_content_async(prompt),
+                        self.settings.timeout_seconds
+                    )
+                except Exception as e:
+                    error = e
+
+            if attempt >= self.settings.max_retries or not is_retryable(error):
+                self._count("failures")
+                raise error
+
+            # השהיה אקספוננציאלית עם רעש, כדי שעבודות שנכשלו יחד לא יחזרו יחד
+            delay = min(
+                self.settings.backoff_max_seconds,
+                self.settings.backoff_base_seconds * 2 ** attempt
+            ) * random.uniform(0.5, 1.0)
+            attempt += 1
+            self._count("retries")
+            self.logger.warning(
+                f"בקשה למודל הסיכום נכשלה ({type(error).__name__}: {error}), "
+                f"ניסיון {attempt} מתוך {self.settings.max_retries} בעוד {delay:.1f} שניות"
+            )
+            await asyncio.sleep(delay)
+
+
+def gemini_model_factory(api_key: str, model_name: str) -> Callable[[], Any]:
+    """פונקציה שיוצרת מודל Gemini (הספרייה מיובאת רק כשהמודל נוצר)"""
+    def create():
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(model_name)
+    return create
+
+
+_clients: Dict[Tuple[str, str], LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(
+    api_key: str,
+    model_name: str,
+    settings: Optional[LLMSettings] = None,
+    logger: Optional[logging.Logger] = None
+) -> LLMClient:
+    """הלקוח של התהליך לכל מפתח ומודל (נוצר פעם אחת; ההגדרות משמשות רק ביצירה)"""
+    with _clients_lock:
+        client = _clients.get((api_key, model_name))
+        if client is None:
+            client = LLMClient(
+                gemini_model_factory(api_key, model_name),
+                settings or LLMSettings(),
+                logger
+            )
+            _clients[(api_key, model_name)] = client
+        return client
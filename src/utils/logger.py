@@ -1,40 +1,130 @@
-import logging
+"""
+מערכת הלוגים
+
+הלוגר מוגדר פעם אחת לכל תהליך, גם כש-Streamlit מריץ את app.py מחדש בכל
+אינטראקציה. הרשומות נכנסות לתור, ותהליכון רקע (QueueListener) כותב אותן
+לקובץ שמתחלף לפי גודל ולמסוף - כך שתהליכון העיבוד לא ממתין לדיסק.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+import atexit
+import json
+import logging
+import queue
 import sys
+import threading
 import psutil
-import torch
-from datetime import datetime
+from utils.warmup import cuda_available
+
+DEFAULT_LOG_DIR = "logs"
+DEFAULT_MAX_MB = 10
+DEFAULT_BACKUPS = 5
+
+# שדות מובנים שנכתבים ברשומות JSON (מ-log_context או מ-extra=...)
+STRUCTURED_FIELDS = ("job_id", "stage", "stage_seconds", "media_seconds")
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields) -> Iterator[None]:
+    """שדות שמצורפים לכל רשומה בתוך הבלוק (למשל job_id), גם בלולאות asyncio שנפתחות בו"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """הוספת שדות ההקשר לרשומה - רץ בתהליכון שכתב את הרשומה, לפני שהיא נכנסת לתור"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """רשומה אחת כשורת JSON"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            "level": record.levelname,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        for key in STRUCTURED_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False)
+
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logger(name: str = "app", settings: Optional[Dict[str, Any]] = None) -> logging.Logger:
+    """
+    הגדרת מערכת הלוגים (פעם אחת לתהליך; קריאות נוספות מחזירות את הלוגר הקיים)
+
+    Args:
+        name: שם קובץ הלוג - לכל תהליך קובץ משלו, כי קובץ מתחלף לא משותף בין תהליכים
+        settings: dir, max_mb, backups ו-json (רשומות JSON בקובץ, עם מזהה העבודה וזמני השלבים)
+    """
+    settings = settings or {}
+    logger = logging.getLogger('VideoProcessor')
+    with _setup_lock:
+        _configure(logger, name, settings)
+    return logger
+
+
+def _configure(logger: logging.Logger, name: str, settings: Dict[str, Any]) -> None:
+    global _listener
+    # הבדיקה על הלוגר עצמו - הוא שורד גם טעינה מחדש של המודול
+    if any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+        return
 
-def setup_logger():
-    """הגדרת מערכת הלוגים"""
     # יצירת תיקיית לוגים
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
-    # הגדרת שם קובץ הלוג עם תאריך ושעה
-    log_file = log_dir / f"app_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    
+    log_dir = Path(settings.get("dir") or DEFAULT_LOG_DIR)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
     # הגדרת פורמט הלוג
     formatter = logging.Formatter(
         '%(asctime)s [%(levelname)s] %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    
-    # הגדרת handler לקובץ
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    
+
+    # קובץ שמתחלף לפי גודל
+    file_handler = RotatingFileHandler(
+        log_dir / f"{name}.log",
+        maxBytes=int(settings.get("max_mb", DEFAULT_MAX_MB) * 1024 * 1024),
+        backupCount=settings.get("backups", DEFAULT_BACKUPS),
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter() if settings.get("json") else formatter)
+
     # הגדרת handler למסוף
     stream_handler = logging.StreamHandler(sys.stdout)
     stream_handler.setFormatter(formatter)
-    
-    # הגדרת הלוגר
-    logger = logging.getLogger('VideoProcessor')
+
+    # הכתיבה עצמה בתהליכון הרקע
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(ContextFilter())
+    _listener = QueueListener(records, file_handler, stream_handler)
+    _listener.start()
+    # ריקון התור בסיום התהליך
+    atexit.register(_listener.stop)
+
     logger.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
-    
-    return logger
+    logger.addHandler(queue_handler)
+
 
 def log_system_info(logger):
     """תיעוד מידע על המערכת"""
@@ -46,7 +136,9 @@ def log_system_info(logger):
     logger.info(f"זיכרון כולל: {memory.total / (1024**3):.1f}GB")
     logger.info(f"זיכרון פנוי: {memory.available / (1024**3):.1f}GB")
     logger.info(f"שטח דיסק פנוי: {disk.free / (1024**3):.1f}GB")
-    logger.info(f"GPU זמין: {torch.cuda.is_available()}")
-    if torch.cuda.is_available():
-        logger.info(f"דגם GPU: {torch.cuda.get_device_name()}")
+    logger.info(f"GPU זמין: {cuda_available()}")
+    if cuda_available():
+        # דרך CTranslate2 ולא torch - torch לא נטען בתהליך הממשק
+        import ctranslate2
+        logger.info(f"מספר GPU: {ctranslate2.get_cuda_device_count()}")
     logger.info("===================") 
\ No newline at end of file
@@ -0,0 +1,265 @@
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+import psutil
+
+DEFAULT_METRICS_DIR = "metrics"
+
+# כמה רשומות אחרונות משמשות להתאמת מודל ההערכה
+HISTORY_WINDOW = 200
+
+
+class PeakMemorySampler:
+    def __init__(self, interval: float = 0.01):
+        """דגימת ה-RSS של התהליך בתהליכון רקע ושמירת השיא"""
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakMemorySampler":
+        self.peak = self.process.memory_info().rss
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+@dataclass
+class StageMetric:
+    """מדידה של שלב עיבוד אחד"""
+    stage: str
+    duration_seconds: float
+    media_seconds: float
+    bytes: int
+    peak_rss_bytes: int
+    model: str
+    device: str
+    estimated_seconds: Optional[float] = None
+    host: str = field(default_factory=socket.gethostname)
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class StageTotals:
+    """סכומים מצטברים של שלב אחד (לפי שלב, מודל ומכשיר) לייצוא Prometheus"""
+    count: int = 0
+    duration_seconds: float = 0.0
+    media_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+    estimate_count: int = 0
+    estimate_error_seconds: float = 0.0
+
+    def add(self, metric: StageMetric) -> None:
+        self.count += 1
+        self.duration_seconds += metric.duration_seconds
+        self.media_seconds += metric.media_seconds
+        self.peak_rss_bytes = max(self.peak_rss_bytes, metric.peak_rss_bytes)
+        if metric.estimated_seconds is not None:
+            self.estimate_count += 1
+            self.estimate_error_seconds += abs(metric.duration_seconds - metric.estimated_seconds)
+
+
+def _parse_metric(line: str) -> Optional[StageMetric]:
+    try:
+        return StageMetric(**json.loads(line))
+    except (ValueError, TypeError):
+        return None
+
+
+class MetricsRecorder:
+    def __init__(self, directory: Path, logger: Optional[logging.Logger] = None):
+        """
+        רישום מדדי השלבים לקובץ JSONL וייצוא בפורמט טקסט של Prometheus
+
+        Args:
+            directory: תיקיית המדדים (stages.jsonl ו-metrics.prom)
+            logger: מערכת הלוגים
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.history_path = self.directory / "stages.jsonl"
+        self.prometheus_path = self.directory / "metrics.prom"
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self._lock = threading.Lock()
+        # סכומי Prometheus ועד איזה מקום בקובץ הם כבר נספרו - כל ייצוא קורא
+        # רק את השורות שנוספו מאז (גם מתהליכים אחרים), ולא את כל ההיסטוריה
+        self._totals: Dict[Tuple[str, str, str], StageTotals] = {}
+        self._offset = 0
+
+    def record(self, metric: StageMetric) -> None:
+        """הוספת מדידה להיסטוריה (שורה אחת, כתיבת append אטומית בין תהליכים)"""
+        line = json.dumps(asdict(metric), ensure_ascii=False) + "\n"
+        with self._lock:
+            fd = os.open(self.history_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        self.logger.info(
+            f"מדד שלב {metric.stage}: {metric.duration_seconds:.1f} שניות "
+            f"למדיה של {metric.media_seconds:.0f} שניות",
+            extra={
+                "stage": metric.stage,
+                "stage_seconds": round(metric.duration_seconds, 3),
+                "media_seconds": round(metric.media_seconds, 1)
+            }
+        )
+
+    @contextmanager
+    def stage(
+        self,
+        stage: str,
+        media_seconds: float,
+        size_bytes: int,
+        model: str,
+        device: str,
+        estimated_seconds: Optional[float] = None
+    ) -> Iterator[None]:
+        """מדידת משך ושיא זיכרון של שלב; נרשם רק אם השלב הסתיים בהצלחה"""
+        with PeakMemorySampler() as sampler:
+            started = time.perf_counter()
+            yield
+            duration = time.perf_counter() - started
+        self.record(StageMetric(
+            stage=stage,
+            duration_seconds=duration,
+            media_seconds=media_seconds,
+            bytes=size_bytes,
+            peak_rss_bytes=sampler.peak,
+            model=model,
+            device=device,
+            estimated_seconds=estimated_seconds
+        ))
+
+    def history(self, limit: Optional[int] = HISTORY_WINDOW) -> List[StageMetric]:
+        """המדידות האחרונות מהקובץ (רק limit השורות האחרונות נשמרות בזיכרון)"""
+        if not self.history_path.exists():
+            return []
+        with open(self.history_path, encoding="utf-8") as f:
+            lines = deque(f, maxlen=limit or None)
+        return [metric for metric in map(_parse_metric, lines) if metric is not None]
+
+    def _update_totals(self) -> None:
+        """הוספת השורות החדשות בקובץ לסכומים (נקרא תחת self._lock)"""
+        if not self.history_path.exists():
+            return
+        with open(self.history_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < self._offset:
+                # הקובץ נמחק או קוצר - סופרים מחדש
+                self._totals.clear()
+                self._offset = 0
+            f.seek(self._offset)
+            for line in f:
+                # שורה בלי סוף עדיין נכתבת - תיקרא בייצוא הבא
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                metric = _parse_metric(line.decode("utf-8", errors="replace"))
+                if metric is not None:
+                    key = (metric.stage, metric.model, metric.device)
+                    self._totals.setdefault(key, StageTotals()).add(metric)
+
+    def write_prometheus(self) -> None:
+        """ייצוא מצטבר בפורמט טקסט של Prometheus (מתאים ל-textfile collector)"""
+        lines = [
+            "# HELP video_stage_duration_seconds Wall time per pipeline stage",
+            "# TYPE video_stage_duration_seconds summary",
+            "# HELP video_stage_media_seconds_total Media duration processed per stage",
+            "# TYPE video_stage_media_seconds_total counter",
+            "# HELP video_stage_peak_rss_bytes Highest peak RSS seen for a stage",
+            "# TYPE video_stage_peak_rss_bytes gauge",
+            "# HELP video_stage_estimate_error_seconds Absolute error of the time estimate",
+            "# TYPE video_stage_estimate_error_seconds summary",
+        ]
+        # כמה עבודות באותו תהליך עשויות לייצא יחד
+        with self._lock:
+            self._update_totals()
+            for (stage, model, device), totals in sorted(self._totals.items()):
+                labels = f'stage="{stage}",model="{model}",device="{device}"'
+                lines += [
+                    f"video_stage_duration_seconds_sum{{{labels}}} {totals.duration_seconds:.3f}",
+                    f"video_stage_duration_seconds_count{{{labels}}} {totals.count}",
+                    f"video_stage_media_seconds_total{{{labels}}} {totals.media_seconds:.3f}",
+                    f"video_stage_peak_rss_bytes{{{labels}}} {totals.peak_rss_bytes}",
+                    f"video_stage_estimate_error_seconds_sum{{{labels}}} {totals.estimate_error_seconds:.3f}",
+                    f"video_stage_estimate_error_seconds_count{{{labels}}} {totals.estimate_count}",
+                ]
+
+            tmp = self.prometheus_path.with_suffix(".tmp")
+            tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            os.replace(tmp, self.prometheus_path)
+
+
+class TimeEstimator:
+    def __init__(self, history: List[StageMetric]):
+        """
+        הערכת זמן לכל שלב לפי ההיסטוריה הנמדדת
+
+        לכל (שלב, מודל, מכשיר) מותאם קו ישר: זמן = קבוע + שיפוע * אורך המדיה.
+        עם מדידה אחת בלבד משתמשים ביחס הממוצע בין זמן העיבוד לאורך המדיה.
+        """
+        self.fits: Dict[Tuple[str, str, str], Tuple[float, float]] = {}
+        groups: Dict[Tuple[str, str, str], List[StageMetric]] = {}
+        for metric in history:
+            groups.setdefault((metric.stage, metric.model, metric.device), []).append(metric)
+        for key, metrics in groups.items():
+            self.fits[key] = _fit_line(
+                [m.media_seconds for m in metrics],
+                [m.duration_seconds for m in metrics]
+            )
+
+    def estimate(self, stage: str, model: str, device: str, media_seconds: float) -> Optional[float]:
+        """הזמן המשוער בשניות, או None אם אין מדידות לשלב זה"""
+        fit = self.fits.get((stage, model, device))
+        if fit is None:
+            return None
+        intercept, slope = fit
+        return max(intercept + slope * media_seconds, 0.0)
+
+
+def _fit_line(xs: List[float], ys: List[float]) -> Tuple[float, float]:
+    """ריבועים פחותים; עם נקודה אחת (או x זהים) - שיפוע ממוצע דרך הראשית"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if n < 2 or var_x == 0:
+        total_x = sum(xs)
+        return (0.0, sum(ys) / total_x) if total_x > 0 else (mean_y, 0.0)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    return mean_y - slope * mean_x, slope
+
+
+_recorder: Optional[MetricsRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_metrics_recorder(
+    directory: Optional[str] = None,
+    logger: Optional[logging.Logger] = None
+) -> MetricsRecorder:
+    """החזרת רשם המדדים של התהליך (נוצר פעם אחת בלבד)"""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = MetricsRecorder(Path(directory or DEFAULT_METRICS_DIR), logger)
+        return _recorder
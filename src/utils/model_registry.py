@@ -0,0 +1,299 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import logging
+import gc
+import subprocess
+
+import psutil
+
+ModelKey = Tuple[str, str, str]
+
+# מספר הפרמטרים (במיליונים) של כל משפחת מודלים - הערכת הזיכרון בלי מדידה.
+# הסדר חשוב: turbo ו-distil לפני large
+MODEL_PARAMS_M = {
+    "large-v3-turbo": 809,
+    "turbo": 809,
+    "distil-large": 756,
+    "large": 1550,
+    "medium": 769,
+    "small": 244,
+    "base": 74,
+    "tiny": 39
+}
+
+BYTES_PER_PARAM = {
+    "float32": 4,
+    "float16": 2,
+    "bfloat16": 2,
+    "int16": 2,
+    "int8": 1,
+    "int8_float32": 1,
+    "int8_float16": 1,
+    "int8_bfloat16": 1
+}
+
+# זיכרון העבודה של המקודד והמפענח מעבר למשקלים
+RUNTIME_OVERHEAD = 1.2
+
+# מודל שלא ניתן להעריך או למדוד נספר כמודל large
+FALLBACK_FAMILY = "large"
+
+
+def estimate_model_bytes(name: str, device: str, compute_type: str) -> Optional[int]:
+    """
+    הערכת הזיכרון של מודל לפי משפחת המודל וסוג החישוב
+
+    Returns:
+        גודל משוער בבתים, או None למודל שמשפחתו לא מזוהה מהשם
+    """
+    family = next((f for f in MODEL_PARAMS_M if f in name.lower().rsplit("/", 1)[-1]), None)
+    if family is None:
+        return None
+    return _family_bytes(family, device, compute_type)
+
+
+def _family_bytes(family: str, device: str, compute_type: str) -> int:
+    # default / auto - float16 על GPU ו-float32 על CPU
+    bytes_per_param = BYTES_PER_PARAM.get(compute_type, 2 if device == 'cuda' else 4)
+    return int(MODEL_PARAMS_M[family] * 1_000_000 * bytes_per_param * RUNTIME_OVERHEAD)
+
+
+class _ModelEntry:
+    def __init__(self, model: Any, size_bytes: int):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.ref_count = 0
+        # שירותים שנבנו על המודל (למשל שירות ההסקה) - נסגרים יחד עם הרשומה
+        self.services: Dict[Hashable, Any] = {}
+
+
+class ModelRegistry:
+    def __init__(self, memory_budget_bytes: int, logger: Optional[logging.Logger] = None):
+        """
+        מאגר מודלים משותף לכל התהליך
+
+        Args:
+            memory_budget_bytes: תקציב הזיכרון המרבי לכל המודלים הטעונים
+            logger: מערכת הלוגים
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self._entries: "OrderedDict[ModelKey, _ModelEntry]" = OrderedDict()
+        self._loading: Dict[ModelKey, threading.Event] = {}
+        self._lock = threading.Lock()
+        # טעינות שנמדדות רצות אחת-אחת, כדי שהפרשי הזיכרון לא יכללו טעינה מקבילה
+        self._measure_lock = threading.Lock()
+
+    @property
+    def used_bytes(self) -> int:
+        """סך הזיכרון שתופסים המודלים הטעונים"""
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def acquire(self, name: str, device: str, compute_type: str = "default", **load_kwargs) -> Any:
+        """
+        קבלת מודל מהמאגר (טעינה רק אם אינו טעון) והגדלת מונה ההפניות
+
+        Args:
+            name: שם מודל ה-Whisper
+            device: המכשיר (cpu / cuda)
+            compute_type: סוג החישוב של המודל
+            load_kwargs: פרמטרים נוספים ל-WhisperModel בזמן הטעינה
+        """
+        key = (name, device, compute_type)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.ref_count += 1
+                    self._entries.move_to_end(key)
+                    return entry.model
+
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = threading.Event()
+                    self._loading[key] = loading
+                    break
+
+            # מודל זה נטען כרגע בסשן אחר - ממתינים ומנסים שוב
+            loading.wait()
+
+        try:
+            model, size_bytes = self._load(key, load_kwargs)
+            with self._lock:
+                entry = _ModelEntry(model, size_bytes)
+                entry.ref_count = 1
+                self._entries[key] = entry
+                self._evict_locked()
+            return model
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def release(self, name: str, device: str, compute_type: str = "default") -> None:
+        """הקטנת מונה ההפניות של מודל; מודל ללא הפניות נשאר טעון עד שיפונה"""
+        key = (name, device, compute_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.ref_count == 0:
+                self.logger.warning(f"שחרור מודל שאינו בשימוש: {key}")
+                return
+            entry.ref_count -= 1
+            self._evict_locked()
+
+    @contextmanager
+    def model(self, name: str, device: str, compute_type: str = "default", **load_kwargs):
+        """שימוש במודל במסגרת בלוק with"""
+        model = self.acquire(name, device, compute_type, **load_kwargs)
+        try:
+            yield model
+        finally:
+            self.release(name, device, compute_type)
+
+    @contextmanager
+    def service(
+        self,
+        name: str,
+        device: str,
+        compute_type: str,
+        service_key: Hashable,
+        factory: Callable[[Any], Any],
+        **load_kwargs
+    ):
+        """
+        שירות שנבנה על מודל מהמאגר, עם הפניה למודל לאורך כל השימוש
+
+        השירות נוצר פעם אחת לכל רשומת מודל ומפתח שירות, ונסגר (close) כשהמודל מפונה.
+
+        Args:
+            service_key: מפתח השירות בתוך רשומת המודל
+            factory: יוצר את השירות מהמודל הטעון
+        """
+        model = self.acquire(name, device, compute_type, **load_kwargs)
+        try:
+            with self._lock:
+                entry = self._entries[(name, device, compute_type)]
+                service = entry.services.get(service_key)
+                if service is None:
+                    service = factory(model)
+                    entry.services[service_key] = service
+            yield service
+        finally:
+            self.release(name, device, compute_type)
+
+    def _load(self, key: ModelKey, load_kwargs: Dict[str, Any]) -> Tuple[Any, int]:
+        """טעינת מודל והערכת הזיכרון שהוא תופס (לפי הטבלה, או במדידה למודל לא מוכר)"""
+        from faster_whisper import WhisperModel
+
+        name, device, compute_type = key
+        self.logger.info(f"טוען מודל Whisper למאגר: {name} ({device}, {compute_type})")
+        size_bytes = estimate_model_bytes(name, device, compute_type)
+        if size_bytes is not None:
+            model = WhisperModel(name, device=device, compute_type=compute_type, **load_kwargs)
+        else:
+            with self._measure_lock:
+                model, size_bytes = self._load_measured(key, load_kwargs)
+        self.logger.info(f"מודל {name} נטען ({size_bytes / (1024**2):.0f}MB)")
+        return model, size_bytes
+
+    def _load_measured(self, key: ModelKey, load_kwargs: Dict[str, Any]) -> Tuple[Any, int]:
+        """טעינה עם מדידת הפרש הזיכרון: RSS על CPU, וזיכרון ה-GPU דרך NVML על CUDA"""
+        from faster_whisper import WhisperModel
+
+        name, device, compute_type = key
+        if device == 'cuda':
+            device_index = load_kwargs.get("device_index", 0)
+            if isinstance(device_index, (list, tuple)):
+                device_index = device_index[0]
+            measure = lambda: _cuda_used_bytes(device_index)
+        else:
+            measure = _process_rss_bytes
+        before = measure()
+        model = WhisperModel(name, device=device, compute_type=compute_type, **load_kwargs)
+        after = measure()
+        if before is None or after is None:
+            self.logger.warning(f"לא ניתן למדוד את זיכרון המודל {name} - נספר כמודל {FALLBACK_FAMILY}")
+            return model, _family_bytes(FALLBACK_FAMILY, device, compute_type)
+        return model, max(after - before, 0)
+
+    def _evict_locked(self) -> None:
+        """פינוי מודלים שאינם בשימוש לפי LRU עד שחוזרים לתקציב"""
+        used = sum(entry.size_bytes for entry in self._entries.values())
+        for key in list(self._entries):
+            if used <= self.memory_budget_bytes:
+                break
+            entry = self._entries[key]
+            if entry.ref_count > 0:
+                continue
+            self.logger.info(f"מפנה מודל מהמאגר: {key}")
+            used -= entry.size_bytes
+            del self._entries[key]
+            for service in entry.services.values():
+                service.close()
+            entry.services.clear()
+            del entry
+            gc.collect()
+
+        if used > self.memory_budget_bytes:
+            self.logger.warning(
+                f"המודלים בשימוש חורגים מתקציב הזיכרון: "
+                f"{used / (1024**2):.0f}MB מתוך {self.memory_budget_bytes / (1024**2):.0f}MB"
+            )
+
+
+def _process_rss_bytes() -> int:
+    return psutil.Process().memory_info().rss
+
+
+def _cuda_used_bytes(device_index: int = 0) -> Optional[int]:
+    """הזיכרון התפוס ב-GPU - דרך pynvml אם מותקן, אחרת nvidia-smi (בלי torch)"""
+    try:
+        import pynvml
+    except ImportError:
+        pynvml = None
+    if pynvml is not None:
+        try:
+            pynvml.nvmlInit()
+            try:
+                handle = pynvml.nvmlDeviceGetHandleByIndex(device_index)
+                return pynvml.nvmlDeviceGetMemoryInfo(handle).used
+            finally:
+                pynvml.nvmlShutdown()
+        except pynvml.NVMLError:
+            return None
+
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.used", "--format=csv,noheader,nounits", f"--id={device_index}"],
+            capture_output=True, text=True, check=True, timeout=10
+        ).stdout
+        return int(output.split()[0]) * 1024 * 1024
+    except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+DEFAULT_MEMORY_BUDGET_MB = 8 * 1024
+
+
+def get_model_registry(
+    memory_budget_mb: Optional[int] = None,
+    logger: Optional[logging.Logger] = None
+) -> ModelRegistry:
+    """
+    החזרת מאגר המודלים של התהליך (נוצר פעם אחת בלבד)
+
+    Args:
+        memory_budget_mb: תקציב זיכרון ב-MB; משמש רק ביצירה הראשונה
+        logger: מערכת הלוגים
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            budget_mb = memory_budget_mb or DEFAULT_MEMORY_BUDGET_MB
+            _registry = ModelRegistry(budget_mb * 1024 * 1024, logger)
+        return _registry
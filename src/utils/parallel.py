@@ -0,0 +1,209 @@
+"""
+תמלול מקבילי של הקלטות ארוכות על פני ליבות המעבד
+
+האודיו מחולק ברגעי שקט למקטעים, כל מקטע מתומלל בתהליך נפרד עם מודל משלו,
+והקטעים מאוחדים לרשימה אחת מסודרת עם זמנים מתוקנים.
+
+מדידת האצה לפי מספר תהליכים (מתוך תיקיית src):
+    python -m utils.parallel lecture.mp4 --model tiny --workers 1 2 4
+"""
+from concurrent.futures import ProcessPoolExecutor, Future
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils.audio import SAMPLE_RATE, split_on_silence
+from utils.segments import TranscriptSegment
+
+DEFAULT_CHUNK_SECONDS = 300.0
+
+PoolKey = Tuple[str, str, str, int, int]
+
+# מודל ה-Whisper של תהליך העבודה הנוכחי
+_worker_model = None
+
+
+def _init_worker(model_name: str, device: str, compute_type: str, cpu_threads: int) -> None:
+    """טעינת מודל פרטי לכל תהליך עבודה"""
+    global _worker_model
+    from faster_whisper import WhisperModel
+
+    _worker_model = WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads
+    )
+
+
+def _load_chunk(source, start: int, end: int) -> np.ndarray:
+    # מקטע מקובץ ממופה נקרא בתהליך העבודה עצמו במקום להעביר את הדגימות
+    if isinstance(source, str):
+        return np.array(np.memmap(source, dtype=np.float32, mode="r")[start:end])
+    return source
+
+
+def _transcribe_chunk(source, start: int, end: int, language: str) -> List[Tuple[float, float, str]]:
+    """תמלול מקטע אחד; הזמנים מוחזרים ביחס לתחילת האודיו המלא"""
+    audio = _load_chunk(source, start, end)
+    offset = start / SAMPLE_RATE
+    segments, _ = _worker_model.transcribe(audio, language=language)
+    return [(seg.start + offset, seg.end + offset, seg.text.strip()) for seg in segments]
+
+
+_pools: Dict[PoolKey, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(key: PoolKey) -> ProcessPoolExecutor:
+    """מאגר תהליכים קבוע לכל תצורה, כדי שהמודלים ייטענו פעם אחת בלבד"""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            model_name, device, compute_type, workers, cpu_threads = key
+            # spawn ולא fork - fork אחרי יצירת תהליכונים של torch/ctranslate2 עלול להיתקע
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, device, compute_type, cpu_threads)
+            )
+            _pools[key] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_pools() -> None:
+    """סגירת כל מאגרי התהליכים"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def _memmap_filename(audio: np.ndarray) -> Optional[str]:
+    # רק קובץ ממופה שלם - במערך חתוך מיקומי הדגימות אינם תואמים לקובץ
+    if isinstance(audio, np.memmap) and audio.filename:
+        if len(audio) * audio.itemsize == os.path.getsize(audio.filename):
+            # filename הוא Path כשהקובץ נפתח מ-Path (קבצי השטח הזמני)
+            return str(audio.filename)
+    return None
+
+
+def default_cpu_threads(workers: int) -> int:
+    """חלוקת ליבות המעבד שווה בשווה בין התהליכים"""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def transcribe_parallel(
+    audio: np.ndarray,
+    model_name: str,
+    workers: int,
+    device: str = "cpu",
+    compute_type: str = "default",
+    cpu_threads: Optional[int] = None,
+    chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+    language: str = "he",
+    progress_callback=None
+) -> Iterator[TranscriptSegment]:
+    """
+    תמלול האודיו במקטעים במקביל
+
+    הקטעים מוחזרים לפי הסדר ברגע שכל המקטעים שלפניהם הסתיימו.
+
+    Args:
+        audio: דגימות PCM מונו 16kHz (מערך או np.memmap)
+        model_name: שם מודל ה-Whisper
+        workers: מספר תהליכי העבודה
+        device: המכשיר לתמלול
+        compute_type: סוג החישוב של המודל
+        cpu_threads: תהליכונים לכל תהליך; ברירת המחדל מחלקת את הליבות שווה בשווה
+        chunk_seconds: אורך המקטע המשוער; החיתוך נעשה ברגע שקט
+        language: שפת התמלול
+        progress_callback: פונקציה לדיווח התקדמות
+    """
+    chunks = split_on_silence(audio, chunk_seconds)
+    threads = cpu_threads or default_cpu_threads(workers)
+    pool = _get_pool((model_name, device, compute_type, workers, threads))
+    memmap_source = _memmap_filename(audio)
+
+    futures: List[Future] = []
+    for start, end in chunks:
+        source = memmap_source or np.ascontiguousarray(audio[start:end])
+        futures.append(pool.submit(_transcribe_chunk, source, start, end, language))
+
+    total_samples = max(len(audio), 1)
+    done_samples = 0
+    try:
+        # איסוף לפי הסדר - כל מקטע ממתין רק לעצמו, והשאר ממשיכים לרוץ ברקע
+        for index, ((start, end), future) in enumerate(zip(chunks, futures)):
+            for seg_start, seg_end, text in future.result():
+                yield TranscriptSegment(seg_start, seg_end, text)
+
+            done_samples += end - start
+            if progress_callback:
+                progress_callback(
+                    done_samples / total_samples,
+                    f"תומללו {index + 1} מתוך {len(chunks)} מקטעים"
+                )
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def measure_speedup(
+    audio: np.ndarray,
+    model_name: str,
+    worker_counts: List[int],
+    chunk_seconds: float = DEFAULT_CHUNK_SECONDS
+) -> List[Dict[str, float]]:
+    """
+    מדידת זמן התמלול לכל מספר תהליכים, ובדיקה שהפלט המאוחד זהה לריצה הסדרתית
+    (תהליך יחיד על אותם מקטעים)
+    """
+    results = []
+    reference = None
+    # הריצה הראשונה היא תמיד הסדרתית - בסיס להשוואה ולחישוב ההאצה
+    for workers in sorted(set([1] + list(worker_counts))):
+        # טעינת המודלים בתהליכים נעשית לפני המדידה
+        pool = _get_pool((model_name, "cpu", "default", workers, default_cpu_threads(workers)))
+        for future in [pool.submit(time.sleep, 0) for _ in range(workers)]:
+            future.result()
+
+        started = time.perf_counter()
+        segments = list(transcribe_parallel(audio, model_name, workers, chunk_seconds=chunk_seconds))
+        elapsed = time.perf_counter() - started
+
+        if reference is None:
+            reference = segments
+        results.append({
+            "workers": workers,
+            "seconds": elapsed,
+            "speedup": results[0]["seconds"] / elapsed if results else 1.0,
+            "matches_serial": segments == reference
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from utils.audio import decode_audio
+
+    parser = argparse.ArgumentParser(description="מדידת האצת התמלול המקבילי")
+    parser.add_argument("media", type=Path)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-seconds", type=float, default=60.0)
+    args = parser.parse_args()
+
+    audio = decode_audio(args.media)
+    report = measure_speedup(audio, args.model, args.workers, args.chunk_seconds)
+    print(json.dumps(report, indent=2))
+    shutdown_pools()
@@ -0,0 +1,165 @@
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+
+from utils.audio import probe_duration
+from utils.cache import ResultCache, hash_file
+from utils.checkpoint import journal_key
+from utils.ingest import content_hash_from_name
+from utils.metrics import MetricsRecorder, TimeEstimator
+from utils.processor import MediaProcessor, LANGUAGE, SUMMARY_PROMPT_VERSION
+from utils.segment_store import SegmentStore
+from utils.segments import TranscriptSegment
+
+# שלבי העיבוד לפי הסדר
+STAGES = ("convert", "transcribe", "summarize")
+
+StageProgress = Callable[[str, float, str], None]
+
+
+def stage_identity(processor: MediaProcessor, stage: str) -> Tuple[str, str]:
+    """המודל והמכשיר שמבצעים את השלב - המפתח של המדדים ושל מודל ההערכה"""
+    if stage == "transcribe":
+        return processor.whisper_model_name, processor.device
+    if stage == "summarize":
+        return processor.gemini_model_name, "api"
+    return "pyav", "cpu"
+
+
+def estimate_stages(
+    estimator: TimeEstimator,
+    processor: MediaProcessor,
+    media_seconds: float
+) -> Dict[str, Optional[float]]:
+    """הזמן המשוער לכל שלב (None לשלב שעוד אין עליו מדידות)"""
+    return {
+        stage: estimator.estimate(stage, *stage_identity(processor, stage), media_seconds)
+        for stage in STAGES
+    }
+
+
+def measure_stage(
+    recorder: Optional[MetricsRecorder],
+    processor: MediaProcessor,
+    stage: str,
+    media_seconds: float,
+    size_bytes: int,
+    estimates: Optional[Dict[str, Optional[float]]] = None
+) -> ContextManager:
+    """מדידת שלב אם הוגדר רשם מדדים"""
+    if recorder is None:
+        return nullcontext()
+    model, device = stage_identity(processor, stage)
+    return recorder.stage(
+        stage,
+        media_seconds,
+        size_bytes,
+        model,
+        device,
+        (estimates or {}).get(stage)
+    )
+
+
+def run_pipeline(
+    processor: MediaProcessor,
+    media_path: Path,
+    cache: Optional[ResultCache] = None,
+    progress_callback: Optional[StageProgress] = None,
+    segment_callback: Optional[Callable[[TranscriptSegment], None]] = None,
+    recorder: Optional[MetricsRecorder] = None,
+    estimates: Optional[Dict[str, Optional[float]]] = None,
+    store: Optional[SegmentStore] = None,
+    name: Optional[str] = None
+) -> Tuple[List[TranscriptSegment], str]:
+    """
+    הרצת כל שלבי העיבוד על קובץ אחד: חילוץ אודיו, תמלול וסיכום
+
+    Args:
+        processor: מעבד המדיה
+        media_path: קובץ הווידאו
+        cache: מטמון התוצאות; פגיעה לא טוענת את מודל ה-Whisper
+            (כשלמעבד מוגדרת תיקיית יומנים, תמלול שנקטע ממשיך מהמקטע האחרון שנרשם)
+        progress_callback: פונקציה לדיווח התקדמות (שלב, התקדמות, הודעה)
+        segment_callback: נקראת עם כל קטע תמלול מיד עם פענוחו
+        recorder: רשם המדדים; שלבים שנטענו מהמטמון אינם נמדדים
+        estimates: הזמן שהוערך לכל שלב, נשמר לצד המדידה להשוואה
+        store: ארכיון הקטעים; התמלול נוסף אליו ולאינדקס החיפוש
+        name: שם הקובץ המקורי להצגה בתוצאות החיפוש
+
+    Returns:
+        קטעי התמלול והסיכום
+    """
+    def report(stage: str):
+        if progress_callback is None:
+            return None
+        return lambda p, s: progress_callback(stage, p, s)
+
+    media_seconds = probe_duration(media_path)
+    segments = None
+    transcript_key = None
+    resume_key = None
+    content_hash = None
+    if cache is not None or store is not None or processor.checkpoint_dir:
+        # קובץ שנקלט לפי תוכנו כבר נושא את הגיבוב בשמו
+        content_hash = content_hash_from_name(media_path) or hash_file(media_path)
+        resume_key = journal_key(content_hash, processor.whisper_model_name, processor.model_key[2], LANGUAGE)
+    if cache is not None:
+        transcript_key = cache.transcript_key(
+            content_hash,
+            processor.whisper_model_name,
+            processor.model_key[2],
+            LANGUAGE,
+            processor.vad.fingerprint() if processor.vad else None
+        )
+        segments = cache.get_transcript(transcript_key)
+
+    cached = segments is not None
+    if cached:
+        if progress_callback:
+            progress_callback("convert", 1.0, "נטען מהמטמון")
+            progress_callback("transcribe", 1.0, "נטען מהמטמון")
+    else:
+        with measure_stage(recorder, processor, "convert", media_seconds, media_path.stat().st_size, estimates):
+            audio = processor.convert_to_audio(media_path, report("convert"))
+            
+        segments = []
+        with measure_stage(recorder, processor, "transcribe", media_seconds, audio.nbytes, estimates):
+            for segment in processor.transcribe_segments(audio, report("transcribe"), resume_key):
+                segments.append(segment)
+                if segment_callback:
+                    segment_callback(segment)
+        del audio
+        if cache is not None:
+            cache.put_transcript(transcript_key, segments)
+            # היומן נמחק רק אחרי שהתמלול נשמר במטמון
+            processor.remove_journal(resume_key)
+
+    # תמלול מהמטמון נוסף לארכיון רק אם עוד אינו שם
+    if store is not None and not (cached and store.contains(content_hash)):
+        store.put(content_hash, segments, name, processor.whisper_model_name)
+
+    # הסיכום נשמר בנפרד כך ששינוי בפרומפט משתמש בתמלול מהמטמון
+    summary = None
+    summary_key = None
+    if cache is not None:
+        summary_key = cache.summary_key(
+            transcript_key,
+            SUMMARY_PROMPT_VERSION,
+            processor.gemini_model_name
+        )
+        summary = cache.get_summary(summary_key)
+
+    if summary is not None:
+        if progress_callback:
+            progress_callback("summarize", 1.0, "נטען מהמטמון")
+    else:
+        text_bytes = sum(len(seg.text.encode("utf-8")) for seg in segments)
+        with measure_stage(recorder, processor, "summarize", media_seconds, text_bytes, estimates):
+            summary = processor.summarize_text(segments, report("summarize"))
+        if cache is not None:
+            cache.put_summary(summary_key, summary)
+
+    if cache is None and resume_key:
+        # בלי מטמון התמלול נשמר רק עם התוצאה - היומן נשאר עד שהעיבוד הושלם
+        processor.remove_journal(resume_key)
+    return segments, summary
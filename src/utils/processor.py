@@ -1,16 +1,66 @@
-import torch
-from faster_whisper import WhisperModel
-from moviepy.editor import VideoFileClip
-import google.generativeai as genai
+import numpy as np
 from pathlib import Path
-import tempfile
-from typing import Tuple, Dict
-import json
-from datetime import datetime
+from typing import Optional, Iterator, Sequence, Union
+import hashlib
 import logging
+from utils.model_registry import get_model_registry
+from utils.calibration import load_profile
+from utils.segments import TranscriptSegment, segments_to_text, format_timestamp
+from utils.summarizer import MapReduceSummarizer, DEFAULT_CHUNK_TOKENS, DEFAULT_MAX_CONCURRENCY
+from utils.parallel import transcribe_parallel, DEFAULT_CHUNK_SECONDS
+from utils.inference_service import inference_service, DEFAULT_MAX_WAIT_SECONDS
+from utils.checkpoint import TranscriptJournal
+from utils.scratch import ScratchManager, get_scratch_manager
+from utils.warmup import cuda_available
+from utils.vad import VadSettings, SpeechMap, detect_speech
+from utils.llm_client import LLMSettings, get_llm_client
+from utils.audio import (
+    AudioInput,
+    SAMPLE_RATE,
+    DEFAULT_MEMMAP_THRESHOLD_SECONDS,
+    decode_audio,
+    split_on_silence,
+    probe_duration,
+    audio_duration_seconds
+)
+
+
+def _describe_audio(audio: AudioInput) -> str:
+    if isinstance(audio, Path):
+        return str(audio)
+    return f"PCM בזיכרון ({format_timestamp(audio_duration_seconds(audio))})"
+
+
+# שפת התמלול
+LANGUAGE = 'he'
+
+# מודל הסיכום
+GEMINI_MODEL = 'gemini-pro'
+
+# יש להעלות את הגרסה בכל שינוי בפרומפט הסיכום כדי שסיכומים ישנים במטמון לא ישמשו
+SUMMARY_PROMPT_VERSION = "2"
+
 
 class MediaProcessor:
-    def __init__(self, whisper_model_name: str, gemini_api_key: str, logger: logging.Logger):
+    def __init__(
+        self,
+        whisper_model_name: str,
+        gemini_api_key: str,
+        logger: logging.Logger,
+        compute_type: str = "default",
+        memory_budget_mb: Optional[int] = None,
+        memmap_threshold_seconds: float = DEFAULT_MEMMAP_THRESHOLD_SECONDS,
+        parallel_workers: int = 1,
+        parallel_cpu_threads: Optional[int] = None,
+        summary_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        summary_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        inference_batch_size: int = 0,
+        inference_max_wait_ms: Optional[float] = None,
+        checkpoint_dir: Optional[str] = None,
+        scratch: Optional[ScratchManager] = None,
+        vad: Optional[VadSettings] = None,
+        llm: Optional[LLMSettings] = None
+    ):
         """
         אתחול מעבד המדיה
         
@@ -18,20 +68,58 @@ class MediaProcessor:
             whisper_model_name: שם מודל ה-Whisper לשימוש
             gemini_api_key: מפתח API של Gemini
             logger: מערכת הלוגים
+            compute_type: סוג החישוב של מודל ה-Whisper; "default" משתמש בפרופיל הכיול של המחשב אם קיים
+            memory_budget_mb: תקציב הזיכרון של מאגר המודלים המשותף
+            memmap_threshold_seconds: מעל אורך זה האודיו המפוענח נשמר בקובץ ממופה לזיכרון
+            parallel_workers: מספר תהליכי תמלול מקבילים להקלטות ארוכות (CPU בלבד)
+            parallel_cpu_threads: תהליכונים לכל תהליך תמלול; ברירת המחדל מחלקת את הליבות
+            summary_chunk_tokens: תקציב הטוקנים לכל בקשת סיכום
+            summary_concurrency: מספר בקשות הסיכום המרבי במקביל
+            inference_batch_size: מעל 0 - התמלול עובר דרך שירות ההסקה המשותף, שמאחד
+                חלונות מכל העבודות בתהליך לאצוות בגודל זה
+            inference_max_wait_ms: זמן ההמתנה המרבי של השירות להשלמת אצווה
+            checkpoint_dir: תיקיית יומני התמלול; תמלול עם resume_key נרשם במקטעים
+                וממשיך מהמקטע האחרון שנרשם אחרי הפסקה (ברצף - קודם לתמלול המקבילי ולשירות ההסקה)
+            scratch: מנהל השטח הזמני; ברירת המחדל היא המנהל של התהליך
+            vad: הגדרות זיהוי הדיבור; כשמוגדרות, רק קטעי הדיבור מועברים ל-Whisper
+            llm: הגדרות הקצב והניסיונות החוזרים של לקוח הסיכום המשותף
         """
         self.logger = logger
+        self.memmap_threshold_seconds = memmap_threshold_seconds
+        self.parallel_workers = parallel_workers
+        self.parallel_cpu_threads = parallel_cpu_threads
+        self.summary_chunk_tokens = summary_chunk_tokens
+        self.summary_concurrency = summary_concurrency
+        self.inference_batch_size = inference_batch_size
+        self.inference_max_wait_seconds = (
+            DEFAULT_MAX_WAIT_SECONDS if inference_max_wait_ms is None else inference_max_wait_ms / 1000
+        )
+        self.checkpoint_dir = checkpoint_dir
+        self.vad = vad
+        # קבצי הביניים של המעבד נמחקים ב-cleanup, גם כשהעבודה נכשלה
+        self.scratch = (scratch or get_scratch_manager(logger=logger)).space()
         self.logger.info("מאתחל את מעבד המדיה...")
         
         try:
-            self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            self.device = 'cuda' if cuda_available() else 'cpu'
             self.logger.info(f"משתמש במכשיר: {self.device}")
             
-            self.logger.info(f"טוען מודל Whisper: {whisper_model_name}")
-            self.whisper_model = WhisperModel(whisper_model_name, device=self.device)
+            # המודל נטען פעם אחת לכל התהליך ומשותף לכל הסשנים,
+            # ורק בשימוש הראשון - תוצאה מהמטמון לא מחייבת טעינה
+            self.whisper_model_name = whisper_model_name
+            self.registry = get_model_registry(memory_budget_mb, logger)
+            self.model_load_kwargs = {}
+            if compute_type == "default":
+                compute_type = self._apply_calibration_profile(whisper_model_name)
+            self.model_key = (whisper_model_name, self.device, compute_type)
+            self._whisper_model = None
             
-            self.logger.info("מגדיר Gemini API")
-            genai.configure(api_key=gemini_api_key)
-            self.gemini_model = genai.GenerativeModel('gemini-pro')
+            # לקוח Gemini משותף לכל התהליך, והמודל נוצר רק בבקשה הראשונה -
+            # כדי לא לייבא את הספרייה בהצגת העמוד
+            self.gemini_api_key = gemini_api_key
+            self.gemini_model_name = GEMINI_MODEL
+            self.llm_settings = llm
+            self._gemini_model = None
             
             self.logger.info("אתחול הושלם בהצלחה")
         except Exception as e:
@@ -41,65 +129,329 @@ class MediaProcessor:
     def __del__(self):
         """שחרור משאבים בסיום"""
         self.logger.info("משחרר משאבים...")
-        if hasattr(self, 'whisper_model'):
-            del self.whisper_model
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        if getattr(self, '_whisper_model', None) is not None:
+            # המאגר אחראי לפנות את המודל מהזיכרון כשאין בו שימוש
+            self._whisper_model = None
+            self.registry.release(*self.model_key)
+        
+    def _apply_calibration_profile(self, whisper_model_name: str) -> str:
+        """טעינת פרופיל הכיול של המחשב והמודל; מחזיר את סוג החישוב לשימוש"""
+        profile = load_profile(whisper_model_name, self.device)
+        if profile is None:
+            return "default"
+            
+        self.logger.info(
+            f"משתמש בפרופיל כיול: {profile['compute_type']}, "
+            f"{profile['cpu_threads']} תהליכונים (RTF {profile['rtf']})"
+        )
+        self.model_load_kwargs = {
+            "cpu_threads": profile["cpu_threads"],
+            "num_workers": profile["num_workers"]
+        }
+        return profile["compute_type"]
         
-    def convert_to_audio(self, video_path: Path, progress_callback=None) -> Path:
-        """המרת וידאו לאודיו"""
-        self.logger.info(f"ממיר וידאו לאודיו: {video_path}")
+    @property
+    def whisper_model(self):
+        """מודל ה-Whisper מהמאגר המשותף (נטען בגישה הראשונה)"""
+        if self._whisper_model is None:
+            self.logger.info(f"מקבל מודל Whisper מהמאגר: {self.whisper_model_name}")
+            self._whisper_model = self.registry.acquire(*self.model_key, **self.model_load_kwargs)
+        return self._whisper_model
+        
+    @property
+    def gemini_model(self):
+        """לקוח מודל הסיכום - הלקוח המשותף של התהליך, עם הגבלת קצב וניסיונות חוזרים"""
+        if self._gemini_model is None:
+            self._gemini_model = get_llm_client(
+                self.gemini_api_key,
+                self.gemini_model_name,
+                self.llm_settings,
+                self.logger
+            )
+        return self._gemini_model
+        
+    @gemini_model.setter
+    def gemini_model(self, client) -> None:
+        self._gemini_model = client
+        
+    def convert_to_audio(self, video_path: Path, progress_callback=None) -> np.ndarray:
+        """חילוץ האודיו ישירות ל-PCM מונו 16kHz בזיכרון, ללא קובץ ביניים"""
+        self.logger.info(f"מחלץ אודיו מהוידאו: {video_path}")
         try:
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_audio:
-                self.logger.info(f"יוצר קובץ אודיו זמני: {temp_audio.name}")
-                video = VideoFileClip(str(video_path))
-                video.audio.write_audiofile(
-                    temp_audio.name,
-                    logger=None
-                )
-                video.close()
+            duration = probe_duration(video_path)
+            memmap_path = None
+            
+            # הקלטות ארוכות במיוחד נכתבות לקובץ PCM גולמי ממופה לזיכרון
+            if duration > self.memmap_threshold_seconds:
+                # על הדיסק ולא בשכבת ה-RAM - הקובץ נועד להוציא את ה-PCM מהזיכרון
+                memmap_path = self.scratch.new_file('.f32', int(duration * SAMPLE_RATE) * 4, ram=False)
+                self.logger.info(f"אודיו ארוך ({format_timestamp(duration)}) - כותב לקובץ ממופה: {memmap_path}")
+            
+            audio = decode_audio(video_path, SAMPLE_RATE, progress_callback, memmap_path)
+            
+            if progress_callback:
+                progress_callback(1.0, "המרה הושלמה")
                 
-                if progress_callback:
-                    progress_callback(1.0, "המרה הושלמה")
-                    
-                self.logger.info("המרה הושלמה בהצלחה")
-                return Path(temp_audio.name)
+            self.logger.info(f"חילוץ האודיו הושלם: {format_timestamp(audio_duration_seconds(audio))}")
+            return audio
         except Exception as e:
             self.logger.error(f"שגיאה בהמרת הוידאו: {str(e)}")
             raise
             
-    def transcribe_audio(self, audio_path: Path, progress_callback=None) -> str:
-        """תמלול קובץ האודיו"""
-        self.logger.info(f"מתחיל תמלול: {audio_path}")
+    def transcribe_segments(
+        self,
+        audio: AudioInput,
+        progress_callback=None,
+        resume_key: Optional[str] = None
+    ) -> Iterator[TranscriptSegment]:
+        """
+        תמלול הדרגתי - מחזיר כל קטע מיד עם פענוחו
+        
+        Args:
+            audio: האודיו לתמלול
+            progress_callback: פונקציה לדיווח התקדמות
+            resume_key: מפתח יומן התמלול (checkpoint.journal_key); כשמוגדרת
+                תיקיית יומנים התמלול נרשם במקטעים וממשיך אחרי הפסקה
+        """
+        self.logger.info(f"מתחיל תמלול: {_describe_audio(audio)}")
+        if self.vad is not None:
+            if isinstance(audio, Path):
+                audio = decode_audio(audio, SAMPLE_RATE)
+            speech = detect_speech(audio, self.vad)
+            self.logger.info(
+                f"זיהוי דיבור: {len(speech.regions)} קטעים, "
+                f"דילוג על {speech.skipped_fraction:.1%} מהאודיו"
+            )
+            if speech.skipped_fraction >= self.vad.min_skipped_fraction:
+                yield from self._transcribe_speech(audio, speech, progress_callback, resume_key)
+                return
+        yield from self._transcribe(audio, progress_callback, resume_key)
+        
+    def _transcribe_speech(
+        self,
+        audio: np.ndarray,
+        speech: SpeechMap,
+        progress_callback=None,
+        resume_key: Optional[str] = None
+    ) -> Iterator[TranscriptSegment]:
+        """תמלול קטעי הדיבור בלבד, ברצף אחד, עם מיפוי הזמנים חזרה להקלטה המקורית"""
+        if progress_callback:
+            progress_callback(0.0, f"מדלג על {speech.skipped_fraction:.0%} שקט")
+        if speech.speech_samples == 0:
+            self.logger.info("לא זוהה דיבור - אין מה לתמלל")
+            if progress_callback:
+                progress_callback(1.0, "תמלול הושלם")
+            return
+            
+        # אודיו ארוך בקובץ ממופה - גם הדיבור בלבד נכתב לקובץ ממופה
+        out = None
+        if isinstance(audio, np.memmap):
+            path = self.scratch.new_file('.f32', speech.speech_samples * 4, ram=False)
+            out = np.memmap(path, dtype=np.float32, mode='w+', shape=(speech.speech_samples,))
+        compact = speech.compact(audio, out)
+        if resume_key:
+            resume_key = self._speech_resume_key(resume_key)
+        try:
+            for segment in self._transcribe(compact, progress_callback, resume_key):
+                yield speech.remap(segment)
+        finally:
+            self.release_audio(compact)
+            
+    def _speech_resume_key(self, resume_key: str) -> str:
+        """היומן של קטעי הדיבור נכתב בזמנים של האודיו המכווץ - תקף רק לאותן הגדרות זיהוי"""
+        return hashlib.sha256((resume_key + self.vad.fingerprint()).encode("utf-8")).hexdigest()
+        
+    def remove_journal(self, resume_key: str) -> None:
+        """מחיקת יומן התמלול - לקרוא רק אחרי שהתמלול המלא נשמר"""
+        if not self.checkpoint_dir:
+            return
+        keys = [resume_key]
+        if self.vad is not None:
+            keys.append(self._speech_resume_key(resume_key))
+        for key in keys:
+            TranscriptJournal(Path(self.checkpoint_dir), key, self.logger).remove()
+            
+    def _transcribe(
+        self,
+        audio: AudioInput,
+        progress_callback=None,
+        resume_key: Optional[str] = None
+    ) -> Iterator[TranscriptSegment]:
+        """בחירת אופן התמלול: לפי יומן, דרך שירות ההסקה, מקבילי או ישיר"""
+        if resume_key and self.checkpoint_dir:
+            yield from self._transcribe_resumable(audio, resume_key, progress_callback)
+            return
+        if self.inference_batch_size > 0:
+            yield from self._transcribe_batched(audio, progress_callback)
+            return
+        if self._should_parallelize(audio):
+            yield from self._transcribe_parallel(audio, progress_callback)
+            return
+            
         try:
-            segments, _ = self.whisper_model.transcribe(str(audio_path), language='he')
-            text = ' '.join([seg.text for seg in segments])
+            source = str(audio) if isinstance(audio, Path) else audio
+            segments, info = self.whisper_model.transcribe(source, language=LANGUAGE)
+            duration = info.duration or 0
+            count = 0
+            
+            for seg in segments:
+                count += 1
+                yield TranscriptSegment(seg.start, seg.end, seg.text.strip())
+                
+                if progress_callback and duration > 0:
+                    progress_callback(
+                        min(seg.end / duration, 1.0),
+                        f"תומללו {format_timestamp(seg.end)} מתוך {format_timestamp(duration)}"
+                    )
             
             if progress_callback:
                 progress_callback(1.0, "תמלול הושלם")
                 
-            self.logger.info(f"תמלול הושלם. אורך הטקסט: {len(text)} תווים")
-            return text
+            self.logger.info(f"תמלול הושלם. מספר קטעים: {count}")
         except Exception as e:
             self.logger.error(f"שגיאה בתמלול: {str(e)}")
             raise
             
-    def summarize_text(self, text: str, progress_callback=None) -> str:
-        """סיכום הטקסט באמצעות Gemini"""
-        self.logger.info("מתחיל סיכום טקסט")
+    def _transcribe_resumable(
+        self,
+        audio: AudioInput,
+        resume_key: str,
+        progress_callback=None
+    ) -> Iterator[TranscriptSegment]:
+        """תמלול במקטעים קבועים, כשכל מקטע שהושלם נרשם ביומן לפני שקטעיו מוחזרים"""
+        try:
+            if isinstance(audio, Path):
+                audio = decode_audio(audio, SAMPLE_RATE)
+            journal = TranscriptJournal(Path(self.checkpoint_dir), resume_key, self.logger)
+            chunks = split_on_silence(audio, DEFAULT_CHUNK_SECONDS)
+            completed = journal.open(chunks)
+            duration = audio_duration_seconds(audio)
+            count = 0
+            
+            for segments in completed:
+                count += len(segments)
+                yield from segments
+                
+            for index in range(len(completed), len(chunks)):
+                start, end = chunks[index]
+                segments = list(self._transcribe_chunk(audio[start:end], start / SAMPLE_RATE))
+                journal.commit(index, segments)
+                count += len(segments)
+                yield from segments
+                
+                if progress_callback:
+                    progress_callback(
+                        end / len(audio),
+                        f"תומללו {format_timestamp(end / SAMPLE_RATE)} מתוך {format_timestamp(duration)}"
+                    )
+            
+            # היומן נמחק רק אחרי שהתמלול נשמר (remove_journal)
+            if progress_callback:
+                progress_callback(1.0, "תמלול הושלם")
+                
+            self.logger.info(f"תמלול במקטעים הושלם. מספר קטעים: {count}")
+        except Exception as e:
+            self.logger.error(f"שגיאה בתמלול במקטעים: {str(e)}")
+            raise
+            
+    def _transcribe_chunk(self, audio: np.ndarray, offset: float) -> Iterator[TranscriptSegment]:
+        """תמלול מקטע אחד; הזמנים מוחזרים ביחס לתחילת האודיו המלא"""
+        if self.inference_batch_size > 0:
+            with self._inference_service() as service:
+                for seg in service.transcribe(audio):
+                    yield TranscriptSegment(seg.start + offset, seg.end + offset, seg.text)
+            return
+        segments, _ = self.whisper_model.transcribe(audio, language=LANGUAGE)
+        for seg in segments:
+            yield TranscriptSegment(seg.start + offset, seg.end + offset, seg.text.strip())
+            
+    def _inference_service(self):
+        """שירות ההסקה המשותף של המודל הזה במאגר (בלוק with מחזיק הפניה למודל)"""
+        return inference_service(
+            self.registry,
+            self.model_key,
+            LANGUAGE,
+            self.inference_batch_size,
+            self.inference_max_wait_seconds,
+            self.logger,
+            **self.model_load_kwargs
+        )
+        
+    def _transcribe_batched(self, audio: AudioInput, progress_callback=None) -> Iterator[TranscriptSegment]:
+        """תמלול דרך שירות ההסקה המשותף של התהליך"""
         try:
-            prompt = f"""אנא סכם את הטקסט הבא בצורה תמציתית ומובנת:
+            if isinstance(audio, Path):
+                audio = decode_audio(audio, SAMPLE_RATE)
+            count = 0
+            with self._inference_service() as service:
+                for segment in service.transcribe(audio, progress_callback):
+                    count += 1
+                    yield segment
+                
+            if progress_callback:
+                progress_callback(1.0, "תמלול הושלם")
+                
+            self.logger.info(f"תמלול דרך שירות ההסקה הושלם. מספר קטעים: {count}")
+        except Exception as e:
+            self.logger.error(f"שגיאה בתמלול דרך שירות ההסקה: {str(e)}")
+            raise
             
-            {text}
+    def _should_parallelize(self, audio: AudioInput) -> bool:
+        """תמלול מקבילי רק על CPU, לאודיו מפוענח וארוך ממקטע אחד"""
+        return (
+            self.parallel_workers > 1
+            and self.device == 'cpu'
+            and isinstance(audio, np.ndarray)
+            and audio_duration_seconds(audio) > DEFAULT_CHUNK_SECONDS
+        )
+        
+    def _transcribe_parallel(self, audio: np.ndarray, progress_callback=None) -> Iterator[TranscriptSegment]:
+        """תמלול במקטעים על פני מספר תהליכים"""
+        self.logger.info(f"תמלול מקבילי עם {self.parallel_workers} תהליכים")
+        try:
+            count = 0
+            for segment in transcribe_parallel(
+                audio,
+                self.whisper_model_name,
+                self.parallel_workers,
+                device=self.device,
+                compute_type=self.model_key[2],
+                cpu_threads=self.parallel_cpu_threads,
+                language=LANGUAGE,
+                progress_callback=progress_callback
+            ):
+                count += 1
+                yield segment
+                
+            if progress_callback:
+                progress_callback(1.0, "תמלול הושלם")
+                
+            self.logger.info(f"תמלול מקבילי הושלם. מספר קטעים: {count}")
+        except Exception as e:
+            self.logger.error(f"שגיאה בתמלול המקבילי: {str(e)}")
+            raise
             
-            הסיכום צריך להיות:
-            1. ברור ותמציתי
-            2. מכיל את הנקודות העיקריות
-            3. מאורגן בצורה לוגית
-            """
+    def transcribe_audio(self, audio: AudioInput, progress_callback=None) -> str:
+        """תמלול קובץ האודיו"""
+        text = segments_to_text(self.transcribe_segments(audio, progress_callback))
+        self.logger.info(f"אורך הטקסט: {len(text)} תווים")
+        return text
             
-            response = self.gemini_model.generate_content(prompt)
-            summary = response.text
+    def summarize_text(
+        self,
+        content: Union[str, Sequence[TranscriptSegment]],
+        progress_callback=None
+    ) -> str:
+        """סיכום הטקסט באמצעות Gemini; תמלול ארוך מסוכם בחלקים במקביל ואז מאוחד"""
+        self.logger.info("מתחיל סיכום טקסט")
+        try:
+            summarizer = MapReduceSummarizer(
+                self.gemini_model,
+                self.logger,
+                max_chunk_tokens=self.summary_chunk_tokens,
+                max_concurrency=self.summary_concurrency
+            )
+            summary = summarizer.summarize(content, progress_callback)
             
             if progress_callback:
                 progress_callback(1.0, "סיכום הושלם")
@@ -110,36 +462,15 @@ class MediaProcessor:
             self.logger.error(f"שגיאה בסיכום: {str(e)}")
             raise
         
-    def save_results(self, transcription: str, summary: str) -> Tuple[str, str]:
-        """שמירת התוצאות בפורמטים שונים"""
-        self.logger.info("מכין קבצי תוצאות")
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # יצירת תוכן טקסט
-        txt_content = f"""תאריך ושעה: {timestamp}
-
-תמלול:
-{transcription}
-
-סיכום:
-{summary}"""
-
-        # יצירת תוכן JSON
-        json_content = json.dumps({
-            "timestamp": timestamp,
-            "transcription": transcription,
-            "summary": summary
-        }, ensure_ascii=False, indent=2)
-        
-        self.logger.info("הכנת קבצי תוצאות הושלמה")
-        return txt_content, json_content
-        
     def cleanup(self, *paths: Path) -> None:
-        """ניקוי קבצים זמניים"""
+        """ניקוי קבצים זמניים (כולל קבצים שהמעבד עצמו יצר)"""
         self.logger.info("מנקה קבצים זמניים")
         for path in paths:
-            try:
-                path.unlink()
-                self.logger.info(f"נמחק: {path}")
-            except Exception as e:
-                self.logger.warning(f"לא הצלחתי למחוק את {path}: {str(e)}") 
\ No newline at end of file
+            self.scratch.manager.remove(path)
+        self.scratch.cleanup()
+                
+    def release_audio(self, audio: AudioInput) -> None:
+        """מחיקת הקובץ הממופה שמאחורי אודיו מפוענח, בלי לגעת בקבצים זמניים אחרים"""
+        if not isinstance(audio, np.memmap) or not audio.filename:
+            return
+        self.scratch.release(Path(audio.filename))
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+ניהול שטח העבודה הזמני - העלאות וקבצי ביניים
+
+כל קובץ ביניים נוצר דרך ScratchSpace של העבודה שיצרה אותו ונמחק בסיומה,
+בהצלחה או בכישלון. שמות קבצי הביניים כוללים את המחשב ואת מזהה התהליך,
+כך שקבצים של תהליך שקרס נמחקים בהפעלה הבאה. הנפח הכולל מוגבל במכסה:
+כשחסר מקום, העלאות שאינן בשימוש של עבודה פעילה מפונות לפי LRU.
+קבצי ביניים קטנים וקצרי חיים יכולים להיכתב לשכבת RAM (tmpfs, למשל
+/dev/shm). קבצים ממופים של אודיו ארוך נכתבים תמיד לדיסק - הם קיימים כדי
+שה-PCM לא יישב בזיכרון, ועל tmpfs הוא היה חוזר אליו.
+"""
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+import logging
+import os
+import threading
+import time
+import uuid
+
+import psutil
+
+DEFAULT_SCRATCH_DIR = "temp"
+DEFAULT_QUOTA_MB = 10240
+DEFAULT_RAM_MAX_MB = 512
+# קובץ גדול מזה לא נכתב לשכבת ה-RAM גם אם יש בה מקום
+DEFAULT_RAM_FILE_MAX_MB = 32
+
+# קובץ העלאה חלקי שלא הושלם בזמן הזה נחשב נטוש
+STALE_PART_SECONDS = 3600
+
+WORK_DIR_NAME = "work"
+
+
+class ScratchQuotaError(Exception):
+    """אין מספיק מקום במכסה גם אחרי פינוי כל מה שאפשר"""
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class ScratchManager:
+    def __init__(
+        self,
+        root: Path,
+        quota_mb: int = DEFAULT_QUOTA_MB,
+        ram_dir: Optional[Path] = None,
+        ram_max_mb: int = DEFAULT_RAM_MAX_MB,
+        active_inputs: Optional[Callable[[], Iterable[Path]]] = None,
+        logger: Optional[logging.Logger] = None,
+        ram_file_max_mb: int = DEFAULT_RAM_FILE_MAX_MB
+    ):
+        """
+        Args:
+            root: תיקיית ההעלאות; קבצי הביניים נשמרים בתת-התיקייה work
+            quota_mb: הנפח המרבי של ההעלאות וקבצי הביניים על הדיסק
+            ram_dir: תיקייה על tmpfs לקבצי ביניים קטנים (None - ללא שכבת RAM)
+            ram_max_mb: הנפח המרבי של קבצי הביניים בשכבת ה-RAM
+            active_inputs: מחזירה את קבצי הקלט של עבודות פעילות, שאסור לפנות
+            logger: מערכת הלוגים
+            ram_file_max_mb: הגודל המרבי של קובץ בודד בשכבת ה-RAM
+        """
+        self.root = Path(root)
+        self.work_dir = self.root / WORK_DIR_NAME
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.ram_dir = Path(ram_dir) / "video_summurize" if ram_dir else None
+        self.ram_max_bytes = ram_max_mb * 1024 * 1024
+        self.ram_file_max_bytes = min(ram_file_max_mb * 1024 * 1024, self.ram_max_bytes)
+        if self.ram_dir is not None:
+            self.ram_dir.mkdir(parents=True, exist_ok=True)
+        self.active_inputs = active_inputs
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self._host = os.uname().nodename
+        self._lock = threading.Lock()
+
+    def space(self) -> "ScratchSpace":
+        """מרחב קבצי ביניים חדש לעבודה אחת"""
+        return ScratchSpace(self)
+
+    def allocate(self, suffix: str, size_hint: int = 0, ram: bool = True) -> Path:
+        """
+        יצירת קובץ ביניים ריק, בשכבת ה-RAM אם הוא קטן מספיק ויש בה מקום
+
+        Args:
+            suffix: סיומת הקובץ
+            size_hint: הגודל הצפוי בבתים
+            ram: False - תמיד על הדיסק (למשל קובץ ממופה שנועד לחסוך זיכרון)
+        """
+        name = f"{self._host}__{os.getpid()}__{uuid.uuid4().hex}{suffix}"
+        with self._lock:
+            directory = self.work_dir
+            if ram and self.ram_dir is not None and self._fits_ram(size_hint):
+                directory = self.ram_dir
+            else:
+                self._make_room(size_hint)
+            path = directory / name
+            path.touch()
+        return path
+
+    def ensure_space(self, nbytes: int) -> None:
+        """פינוי העלאות ישנות עד שיש מקום ל-nbytes נוספים במכסה"""
+        with self._lock:
+            self._make_room(nbytes)
+
+    def usage(self) -> int:
+        """הנפח הנוכחי על הדיסק (העלאות וקבצי ביניים)"""
+        return sum(size for _, size, _ in self._uploads()) + sum(
+            _file_size(path) for path in self.work_dir.iterdir()
+        )
+
+    def remove(self, path: Path) -> None:
+        try:
+            path.unlink()
+            self.logger.info(f"נמחק: {path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"לא הצלחתי למחוק את {path}: {str(e)}")
+
+    def sweep_orphans(self) -> int:
+        """מחיקת קבצי ביניים של תהליכים שאינם חיים והעלאות חלקיות נטושות"""
+        removed = 0
+        for directory in filter(None, (self.work_dir, self.ram_dir)):
+            for path in directory.iterdir():
+                host, _, rest = path.name.partition("__")
+                pid = rest.partition("__")[0]
+                if host == self._host and pid.isdigit() and not psutil.pid_exists(int(pid)):
+                    self.remove(path)
+                    removed += 1
+
+        cutoff = time.time() - STALE_PART_SECONDS
+        for path in self.root.glob("*.part"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    self.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+
+        if removed:
+            self.logger.warning(f"נמחקו {removed} קבצים זמניים שנשארו מתהליכים קודמים")
+        return removed
+
+    def _fits_ram(self, size_hint: int) -> bool:
+        if size_hint <= 0 or size_hint > self.ram_file_max_bytes:
+            return False
+        used = sum(_file_size(path) for path in self.ram_dir.iterdir())
+        try:
+            free = os.statvfs(self.ram_dir)
+            available = free.f_bavail * free.f_frsize
+        except OSError:
+            return False
+        return used + size_hint <= self.ram_max_bytes and size_hint < available
+
+    def _uploads(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self.root.iterdir():
+            if not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _make_room(self, nbytes: int) -> None:
+        total = self.usage()
+        if total + nbytes <= self.quota_bytes:
+            return
+
+        protected: Set[Path] = set()
+        if self.active_inputs is not None:
+            protected = {Path(p).resolve() for p in self.active_inputs()}
+
+        # העלאות שסיימו את תפקידן, מהישנה ביותר (זמן השינוי מתעדכן בכל שימוש)
+        for _, size, path in sorted(self._uploads()):
+            if total + nbytes <= self.quota_bytes:
+                break
+            if path.suffix == ".part" or path.resolve() in protected:
+                continue
+            self.remove(path)
+            total -= size
+
+        if total + nbytes > self.quota_bytes:
+            raise ScratchQuotaError(
+                f"אין מספיק מקום בשטח הזמני: נדרשים {nbytes / 1024 ** 2:.0f}MB, "
+                f"בשימוש {total / 1024 ** 2:.0f}MB מתוך {self.quota_bytes / 1024 ** 2:.0f}MB"
+            )
+
+
+class ScratchSpace:
+    def __init__(self, manager: ScratchManager):
+        """קבצי הביניים של עבודה אחת; cleanup מוחק את כולם"""
+        self.manager = manager
+        self.paths: List[Path] = []
+        self._lock = threading.Lock()
+
+    def new_file(self, suffix: str, size_hint: int = 0, ram: bool = True) -> Path:
+        """קובץ ביניים חדש שיימחק בסיום העבודה (ram - כמו ב-ScratchManager.allocate)"""
+        path = self.manager.allocate(suffix, size_hint, ram)
+        with self._lock:
+            self.paths.append(path)
+        return path
+
+    def release(self, path: Path) -> None:
+        """מחיקת קובץ ביניים שכבר אינו נדרש, לפני סיום העבודה"""
+        with self._lock:
+            if path not in self.paths:
+                return
+            self.paths.remove(path)
+        self.manager.remove(path)
+
+    def cleanup(self) -> None:
+        """מחיקת כל קבצי הביניים של העבודה"""
+        with self._lock:
+            paths, self.paths = self.paths, []
+        for path in paths:
+            self.manager.remove(path)
+
+    def __enter__(self) -> "ScratchSpace":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cleanup()
+
+
+_manager: Optional[ScratchManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_scratch_manager(
+    root: Optional[str] = None,
+    quota_mb: Optional[int] = None,
+    ram_dir: Optional[str] = None,
+    ram_max_mb: Optional[int] = None,
+    active_inputs: Optional[Callable[[], Iterable[Path]]] = None,
+    logger: Optional[logging.Logger] = None
+) -> ScratchManager:
+    """החזרת מנהל השטח הזמני של התהליך (נוצר פעם אחת; קבצים יתומים נמחקים ביצירה)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ScratchManager(
+                Path(root or DEFAULT_SCRATCH_DIR),
+                quota_mb or DEFAULT_QUOTA_MB,
+                ram_dir,
+                ram_max_mb or DEFAULT_RAM_MAX_MB,
+                active_inputs,
+                logger
+            )
+            _manager.sweep_orphans()
+        return _manager
@@ -0,0 +1,306 @@
+"""
+ארכיון קטעי התמלול של כל הסרטונים שעובדו, עם אינדקס חיפוש
+
+לכל סרטון נשמר קובץ עמודות אחד: זמני התחלה וסיום במילישניות, טבלת
+היסטים וגוש טקסט UTF-8 רציף. אינדקס הפוך ב-SQLite ממפה מילים מנורמלות
+(ללא ניקוד, אותיות סופיות כרגילות, וגם ללא אותיות השימוש בתחילת המילה)
+לקטעים, כך שחיפוש מחזיר סרטונים וזמנים בלי לקרוא את קבצי התמלול.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from utils.segments import TranscriptSegment
+
+DEFAULT_STORE_DIR = "archive"
+DEFAULT_SEARCH_LIMIT = 50
+
+# ניקוד וטעמים; המקף העברי מפריד בין מילים
+_MARKS = re.compile("[֑-ֽֿ-ׇ]")
+_QUOTES = re.compile("['\"׳״]")
+_TOKEN = re.compile(r"\w+")
+_FINALS = str.maketrans("ךםןףץ", "כמנפצ")
+
+# אותיות השימוש שיכולות להופיע בתחילת מילה (ו, ה, ב, כ, ל, מ, ש)
+_PREFIXES = set("והבכלמש")
+_MAX_PREFIX = 3
+
+
+def normalize(text: str) -> str:
+    """הסרת ניקוד וגרשיים והחלפת אותיות סופיות ברגילות"""
+    text = _MARKS.sub("", text.replace("־", " "))
+    return _QUOTES.sub("", text).lower().translate(_FINALS)
+
+
+def tokenize(text: str) -> List[str]:
+    """המילים המנורמלות בטקסט"""
+    return _TOKEN.findall(normalize(text))
+
+
+def index_forms(token: str) -> Set[str]:
+    """המילה עצמה וכל צורה שלה ללא אותיות שימוש בתחילתה (לפחות שתי אותיות נשארות)"""
+    forms = {token}
+    for i in range(min(_MAX_PREFIX, len(token) - 2)):
+        if token[i] not in _PREFIXES:
+            break
+        forms.add(token[i + 1:])
+    return forms
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """קטע שתואם לחיפוש"""
+    video_id: str
+    name: str
+    segment: int
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+class VideoSegments:
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, offsets: np.ndarray, text: bytes):
+        """קטעי התמלול של סרטון אחד בעמודות"""
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.text = text
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text_at(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    @classmethod
+    def from_segments(cls, segments: Sequence[TranscriptSegment]) -> "VideoSegments":
+        encoded = [seg.text.encode("utf-8") for seg in segments]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(
+            np.round(np.array([seg.start for seg in segments], dtype=np.float64) * 1000).astype(np.int64),
+            np.round(np.array([seg.end for seg in segments], dtype=np.float64) * 1000).astype(np.int64),
+            offsets,
+            b"".join(encoded)
+        )
+
+
+def subtitle_time(ms: int, separator: str) -> str:
+    """זמן כתובית HH:MM:SS,mmm (SRT) או HH:MM:SS.mmm (VTT)"""
+    hours, rest = divmod(int(ms), 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+
+def to_srt(columns: VideoSegments) -> str:
+    """כתוביות בפורמט SRT"""
+    cues = []
+    for i in range(len(columns)):
+        cues.append(
+            f"{i + 1}\n"
+            f"{subtitle_time(columns.starts[i], ',')} --> {subtitle_time(columns.ends[i], ',')}\n"
+            f"{columns.text_at(i)}\n"
+        )
+    return "\n".join(cues)
+
+
+def to_vtt(columns: VideoSegments) -> str:
+    """כתוביות בפורמט WebVTT"""
+    cues = ["WEBVTT\n"]
+    for i in range(len(columns)):
+        cues.append(
+            f"{subtitle_time(columns.starts[i], '.')} --> {subtitle_time(columns.ends[i], '.')}\n"
+            f"{columns.text_at(i)}\n"
+        )
+    return "\n".join(cues)
+
+
+class SegmentStore:
+    def __init__(self, root: Path, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            root: תיקיית הארכיון (קובץ npz לכל סרטון ו-index.db)
+            logger: מערכת הלוגים
+        """
+        self.root = Path(root)
+        self.segments_dir = self.root / "segments"
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "index.db"
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS videos ("
+                "video_id TEXT PRIMARY KEY, name TEXT, model TEXT, "
+                "segments INTEGER, indexed REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "token TEXT NOT NULL, video_id TEXT NOT NULL, segment INTEGER NOT NULL, "
+                "PRIMARY KEY (token, video_id, segment)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS postings_video ON postings (video_id)")
+
+    def _path(self, video_id: str) -> Path:
+        return self.segments_dir / f"{video_id}.npz"
+
+    def contains(self, video_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone() is not None
+
+    def put(
+        self,
+        video_id: str,
+        segments: Sequence[TranscriptSegment],
+        name: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> None:
+        """
+        שמירת הקטעים של סרטון ועדכון האינדקס (מחליף גרסה קודמת של אותו סרטון)
+
+        Args:
+            video_id: מזהה הסרטון - הגיבוב של תוכן הקובץ
+            segments: קטעי התמלול לפי הסדר
+            name: שם הקובץ המקורי להצגה
+            model: מודל התמלול
+        """
+        columns = VideoSegments.from_segments(segments)
+        path = self._path(video_id)
+        fd, tmp_name = tempfile.mkstemp(dir=self.segments_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    starts=columns.starts,
+                    ends=columns.ends,
+                    offsets=columns.offsets,
+                    text=np.frombuffer(columns.text, dtype=np.uint8)
+                )
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        postings = set()
+        for index, segment in enumerate(segments):
+            for token in tokenize(segment.text):
+                for form in index_forms(token):
+                    postings.add((form, video_id, index))
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM postings WHERE video_id = ?", (video_id,))
+                conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", postings)
+                conn.execute(
+                    "INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?)",
+                    (video_id, name or video_id[:12], model, len(columns), time.time())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self.logger.info(f"נוסף לארכיון: {name or video_id[:12]} ({len(columns)} קטעים)")
+
+    def load(self, video_id: str) -> Optional[VideoSegments]:
+        """העמודות של סרטון, או None אם אינו בארכיון"""
+        try:
+            with np.load(self._path(video_id)) as data:
+                return VideoSegments(
+                    data["starts"],
+                    data["ends"],
+                    data["offsets"],
+                    data["text"].tobytes()
+                )
+        except FileNotFoundError:
+            return None
+
+    def export(self, video_id: str, fmt: str = "srt") -> Optional[str]:
+        """כתוביות SRT או VTT ישירות מהארכיון"""
+        columns = self.load(video_id)
+        if columns is None:
+            return None
+        return to_vtt(columns) if fmt == "vtt" else to_srt(columns)
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[SearchHit]:
+        """
+        הקטעים שמכילים את כל מילות החיפוש
+
+        מילת חיפוש תואמת גם למילה עם אותיות שימוש בתחילתה ("בית" מוצא את "והבית").
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        sql = " INTERSECT ".join(
+            ["SELECT video_id, segment FROM postings WHERE token = ?"] * len(tokens)
+        )
+        # השמות נשלפים רק לסרטונים שבתוצאות, בחיפוש לפי המפתח הראשי
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT hits.video_id, hits.segment, videos.name FROM "
+                f"(SELECT video_id, segment FROM ({sql}) ORDER BY video_id, segment LIMIT ?) AS hits "
+                f"LEFT JOIN videos ON videos.video_id = hits.video_id "
+                f"ORDER BY hits.video_id, hits.segment",
+                (*tokens, limit)
+            ).fetchall()
+
+        loaded: Dict[str, Optional[VideoSegments]] = {}
+        hits = []
+        for row in rows:
+            video_id, index = row["video_id"], row["segment"]
+            if video_id not in loaded:
+                loaded[video_id] = self.load(video_id)
+            columns = loaded[video_id]
+            if columns is None or index >= len(columns):
+                continue
+            hits.append(SearchHit(
+                video_id,
+                row["name"] or video_id[:12],
+                index,
+                int(columns.starts[index]),
+                int(columns.ends[index]),
+                columns.text_at(index)
+            ))
+        return hits
+
+
+_store: Optional[SegmentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_segment_store(
+    directory: Optional[str] = None,
+    logger: Optional[logging.Logger] = None
+) -> SegmentStore:
+    """החזרת הארכיון של התהליך (נוצר פעם אחת בלבד)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SegmentStore(Path(directory or DEFAULT_STORE_DIR), logger)
+        return _store
@@ -0,0 +1,32 @@
+from dataclasses import dataclass, asdict
+from typing import Iterable, Dict, Any
+
+
+@dataclass(frozen=True)
+class TranscriptSegment:
+    """קטע תמלול עם זמני התחלה וסיום בשניות"""
+    start: float
+    end: float
+    text: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TranscriptSegment":
+        return cls(float(data["start"]), float(data["end"]), data["text"])
+
+
+def segments_to_text(segments: Iterable[TranscriptSegment]) -> str:
+    """איחוד קטעי התמלול לטקסט רציף"""
+    return ' '.join(seg.text for seg in segments if seg.text)
+
+
+def format_timestamp(seconds: float) -> str:
+    """הצגת זמן בפורמט H:MM:SS או MM:SS"""
+    total = int(seconds)
+    hours, rest = divmod(total, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
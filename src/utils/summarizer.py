@@ -0,0 +1,178 @@
+from typing import List, Optional, Sequence, Union
+import asyncio
+import logging
+import re
+
+from utils.event_loop import run_coroutine
+from utils.segments import TranscriptSegment, segments_to_text
+
+# הערכה גסה לעברית - טוקן לכל כשלושה תווים
+CHARS_PER_TOKEN = 3
+
+DEFAULT_CHUNK_TOKENS = 8000
+DEFAULT_MAX_CONCURRENCY = 4
+
+SUMMARY_CRITERIA = """הסיכום צריך להיות:
+            1. ברור ותמציתי
+            2. מכיל את הנקודות העיקריות
+            3. מאורגן בצורה לוגית
+            """
+
+
+def build_summary_prompt(text: str) -> str:
+    """פרומפט לסיכום טקסט שנכנס בבקשה אחת"""
+    return f"""אנא סכם את הטקסט הבא בצורה תמציתית ומובנת:
+
+            {text}
+
+            {SUMMARY_CRITERIA}"""
+
+
+def build_chunk_prompt(text: str, index: int, total: int) -> str:
+    """פרומפט לסיכום חלק אחד מתוך תמלול ארוך"""
+    return f"""לפניך חלק {index} מתוך {total} של תמלול ארוך.
+            אנא סכם את החלק הזה בצורה תמציתית, ושמור על כל הנקודות העיקריות,
+            השמות והמספרים שמוזכרים בו:
+
+            {text}
+            """
+
+
+def build_reduce_prompt(summaries: Sequence[str]) -> str:
+    """פרומפט לאיחוד סיכומי החלקים לסיכום אחד"""
+    parts = "\n\n".join(f"חלק {i}:\n{summary}" for i, summary in enumerate(summaries, 1))
+    return f"""לפניך סיכומים של חלקים עוקבים מתוך תמלול אחד, לפי הסדר.
+            אנא אחד אותם לסיכום אחד של התמלול כולו, ללא חזרות:
+
+            {parts}
+
+            {SUMMARY_CRITERIA}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """הערכת מספר הטוקנים בטקסט"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def text_to_segments(text: str) -> List[TranscriptSegment]:
+    """פירוק טקסט רציף למשפטים, כשאין זמני קטעים"""
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    return [TranscriptSegment(0.0, 0.0, sentence) for sentence in sentences if sentence]
+
+
+def split_by_token_budget(
+    segments: Sequence[TranscriptSegment],
+    max_tokens: int
+) -> List[List[TranscriptSegment]]:
+    """חלוקת הקטעים לחלקים רצופים שכל אחד מהם בתקציב הטוקנים (קטע לא מפוצל)"""
+    chunks: List[List[TranscriptSegment]] = []
+    current: List[TranscriptSegment] = []
+    current_tokens = 0
+    for segment in segments:
+        tokens = estimate_tokens(segment.text)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(segment)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class MapReduceSummarizer:
+    def __init__(
+        self,
+        client,
+        logger: Optional[logging.Logger] = None,
+        max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ):
+        """
+        סיכום היררכי של תמלולים ארוכים
+
+        Args:
+            client: מודל עם generate_content_async (GenerativeModel או תחליף מקומי לבדיקות)
+            logger: מערכת הלוגים
+            max_chunk_tokens: תקציב הטוקנים לכל בקשה
+            max_concurrency: מספר הבקשות המרבי שרצות במקביל
+        """
+        self.client = client
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_concurrency = max_concurrency
+
+    def summarize(
+        self,
+        content: Union[str, Sequence[TranscriptSegment]],
+        progress_callback=None
+    ) -> str:
+        """
+        סיכום סינכרוני - מריץ את הסיכום האסינכרוני בלולאה הקבועה של התהליך
+
+        לא asyncio.run: הלקוח האסינכרוני של Gemini נשמר אחרי הבקשה הראשונה וקשור
+        ללולאה שלה, ולולאה חדשה לכל סיכום מכשילה את כל הסיכומים שאחרי הראשון.
+        דיווחי ההתקדמות נקראים מתהליכון הלולאה.
+        """
+        return run_coroutine(self.asummarize(content, progress_callback))
+
+    async def asummarize(
+        self,
+        content: Union[str, Sequence[TranscriptSegment]],
+        progress_callback=None
+    ) -> str:
+        """
+        סיכום בשלבים: כל חלק מסוכם במקביל (map) והסיכומים מאוחדים (reduce)
+
+        טקסט שנכנס בתקציב אחד מסוכם בבקשה אחת כמו קודם.
+        """
+        segments = text_to_segments(content) if isinstance(content, str) else list(content)
+        chunks = split_by_token_budget(segments, self.max_chunk_tokens)
+        if len(chunks) <= 1:
+            return await self._generate(build_summary_prompt(segments_to_text(segments)))
+
+        self.logger.info(f"סיכום היררכי: {len(chunks)} חלקים, עד {self.max_concurrency} במקביל")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        total = len(chunks)
+        done = 0
+
+        async def summarize_chunk(index: int, chunk: List[TranscriptSegment]) -> str:
+            nonlocal done
+            async with semaphore:
+                summary = await self._generate(
+                    build_chunk_prompt(segments_to_text(chunk), index, total)
+                )
+            done += 1
+            if progress_callback:
+                # החלק האחרון של הסרגל שמור לשלב האיחוד
+                progress_callback(0.9 * done / total, f"סוכמו {done} מתוך {total} חלקים")
+            return summary
+
+        summaries = await asyncio.gather(
+            *(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks, 1))
+        )
+        return await self._reduce(list(summaries), semaphore)
+
+    async def _reduce(self, summaries: List[str], semaphore: asyncio.Semaphore) -> str:
+        """איחוד הסיכומים; אם אינם נכנסים בבקשה אחת מאחדים אותם בקבוצות ושוב"""
+        while estimate_tokens("\n\n".join(summaries)) > self.max_chunk_tokens and len(summaries) > 1:
+            groups = split_by_token_budget(
+                [TranscriptSegment(0.0, 0.0, summary) for summary in summaries],
+                self.max_chunk_tokens
+            )
+            if len(groups) == len(summaries):
+                # כל סיכום ממלא את התקציב לבדו - איחוד בזוגות כדי להבטיח התקדמות
+                groups = [sum(groups[i:i + 2], []) for i in range(0, len(groups), 2)]
+            self.logger.info(f"איחוד ביניים: {len(summaries)} סיכומים ל-{len(groups)}")
+
+            async def reduce_group(group: List[TranscriptSegment]) -> str:
+                async with semaphore:
+                    return await self._generate(build_reduce_prompt([seg.text for seg in group]))
+
+            summaries = list(await asyncio.gather(*(reduce_group(group) for group in groups)))
+
+        return await self._generate(build_reduce_prompt(summaries))
+
+    async def _generate(self, prompt: str) -> str:
+        response = await self.client.generate_content_async(prompt)
+        return response.text
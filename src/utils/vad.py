@@ -0,0 +1,179 @@
+"""
+זיהוי קטעי דיבור לפי אנרגיה, לפני התמלול
+
+האנרגיה של כל מסגרת מחושבת בבת אחת על כל האודיו (frame_energy), והסף נקבע
+ביחס לרצפת הרעש של ההקלטה. קטעי דיבור מורחבים בשוליים, ושקטים קצרים בתוך
+דיבור לא נחתכים, כך שמילים לא נקטעות. רק קטעי הדיבור מועברים ל-Whisper,
+והזמנים ממופים בחזרה לזמני ההקלטה המקורית.
+
+בדיקת ההגדרות על קובץ (מתוך תיקיית src):
+    python -m utils.vad lecture.mp4 --margin-db 12 --min-silence 1.5
+"""
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, Optional
+import json
+
+import numpy as np
+
+from utils.audio import SAMPLE_RATE, frame_energy
+from utils.segments import TranscriptSegment
+
+
+@dataclass(frozen=True)
+class VadSettings:
+    """הגדרות זיהוי הדיבור"""
+    # אורך מסגרת האנרגיה
+    frame_seconds: float = 0.03
+    # הסף: כמה דציבלים מעל רצפת הרעש (האחוזון הנמוך של האנרגיה)
+    margin_db: float = 10.0
+    noise_percentile: float = 10.0
+    # גבולות מוחלטים לסף (dBFS): הקלטה שקטה לגמרי לא תיחשב כולה לדיבור, והקלטה
+    # שרובה דיבור (רצפת "רעש" גבוהה) לא תדלג על דיבור חלש
+    min_threshold_db: float = -60.0
+    max_threshold_db: float = -35.0
+    # שקט קצר מזה בין שני קטעי דיבור לא מדולג
+    min_silence_seconds: float = 1.0
+    # דיבור קצר מזה (קליק, רעש בודד) לא נחשב לדיבור
+    min_speech_seconds: float = 0.2
+    # שוליים שנשמרים לפני ואחרי כל קטע דיבור
+    padding_seconds: float = 0.3
+    # מתחת לחלק הזה של שקט האודיו מתומלל כמו שהוא
+    min_skipped_fraction: float = 0.05
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def fingerprint(self) -> str:
+        """ייצוג קבוע של ההגדרות - חלק ממפתחות התמלול במטמון וביומן"""
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VadSettings":
+        """הגדרות ממילון (מפתחות לא מוכרים, כמו enabled, מושמטים)"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+class SpeechMap:
+    def __init__(self, regions: np.ndarray, total_samples: int, sampling_rate: int = SAMPLE_RATE):
+        """
+        קטעי הדיבור באודיו והמיפוי בין האודיו המכווץ (דיבור בלבד) למקורי
+
+        Args:
+            regions: מערך (n, 2) של דגימות התחלה וסיום, ממוין וללא חפיפות
+            total_samples: אורך האודיו המקורי
+            sampling_rate: קצב הדגימה
+        """
+        self.regions = regions.astype(np.int64).reshape(-1, 2)
+        self.total_samples = total_samples
+        self.sampling_rate = sampling_rate
+        lengths = self.regions[:, 1] - self.regions[:, 0]
+        # מיקום תחילת כל קטע באודיו המכווץ
+        self.compact_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        self.speech_samples = int(lengths.sum())
+
+    @property
+    def skipped_fraction(self) -> float:
+        """החלק מהאודיו שמדולג"""
+        if self.total_samples == 0:
+            return 0.0
+        return 1.0 - self.speech_samples / self.total_samples
+
+    def compact(self, audio: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """האודיו של קטעי הדיבור בלבד, ברצף (out - מערך יעד, למשל קובץ ממופה)"""
+        if out is None:
+            out = np.empty(self.speech_samples, dtype=np.float32)
+        for (start, end), position in zip(self.regions, self.compact_starts):
+            out[position:position + end - start] = audio[start:end]
+        return out
+
+    def to_original(self, seconds: np.ndarray, is_end: bool = False) -> np.ndarray:
+        """
+        מיפוי זמנים באודיו המכווץ לזמנים באודיו המקורי
+
+        זמן סיום שנופל בדיוק על גבול בין קטעים משויך לקטע שלפניו.
+        """
+        samples = np.asarray(seconds, dtype=np.float64) * self.sampling_rate
+        side = "left" if is_end else "right"
+        index = np.clip(np.searchsorted(self.compact_starts, samples, side=side) - 1, 0, len(self.regions) - 1)
+        original = self.regions[index, 0] + (samples - self.compact_starts[index])
+        return np.minimum(original, self.regions[index, 1]) / self.sampling_rate
+
+    def remap(self, segment: TranscriptSegment) -> TranscriptSegment:
+        """קטע תמלול עם הזמנים המקוריים"""
+        start = float(self.to_original(segment.start))
+        end = float(self.to_original(segment.end, is_end=True))
+        return TranscriptSegment(start, max(end, start), segment.text)
+
+
+def detect_speech(
+    audio: np.ndarray,
+    settings: VadSettings = VadSettings(),
+    sampling_rate: int = SAMPLE_RATE
+) -> SpeechMap:
+    """זיהוי קטעי הדיבור באודיו (PCM מונו float32)"""
+    total = len(audio)
+    frame_samples = max(int(settings.frame_seconds * sampling_rate), 1)
+    energy = frame_energy(audio, frame_samples)
+    if len(energy) == 0:
+        return SpeechMap(np.array([[0, total]]), total, sampling_rate)
+
+    db = 10.0 * np.log10(energy + 1e-12)
+    noise_floor = float(np.percentile(db, settings.noise_percentile))
+    threshold = min(
+        max(noise_floor + settings.margin_db, settings.min_threshold_db),
+        settings.max_threshold_db
+    )
+    speech = db > threshold
+
+    # גבולות הקטעים - מעברים בין שקט לדיבור
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], speech, [False])).astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+
+    keep = (ends - starts) * frame_samples >= settings.min_speech_seconds * sampling_rate
+    starts, ends = starts[keep] * frame_samples, ends[keep] * frame_samples
+    if len(starts) == 0:
+        return SpeechMap(np.zeros((0, 2), dtype=np.int64), total, sampling_rate)
+
+    # דיבור עד המסגרת השלמה האחרונה ממשיך גם על הדגימות שאחריה
+    reaches_end = ends[-1] == len(energy) * frame_samples
+    padding = int(settings.padding_seconds * sampling_rate)
+    starts = np.maximum(starts - padding, 0)
+    ends = np.minimum(ends + padding, total)
+    if reaches_end:
+        ends[-1] = total
+
+    # איחוד קטעים שהשקט ביניהם קצר מהמינימום (או שחופפים אחרי השוליים)
+    gap = int(settings.min_silence_seconds * sampling_rate)
+    new_region = np.concatenate(([True], starts[1:] - ends[:-1] >= gap))
+    merged_starts = starts[new_region]
+    merged_ends = np.maximum.reduceat(ends, np.flatnonzero(new_region))
+
+    return SpeechMap(np.stack([merged_starts, merged_ends], axis=1), total, sampling_rate)
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+    from utils.audio import decode_audio
+    from utils.segments import format_timestamp
+
+    defaults = VadSettings()
+    parser = argparse.ArgumentParser(description="בדיקת זיהוי הדיבור על קובץ")
+    parser.add_argument("media", type=Path)
+    parser.add_argument("--margin-db", type=float, default=defaults.margin_db)
+    parser.add_argument("--min-silence", type=float, default=defaults.min_silence_seconds)
+    parser.add_argument("--min-speech", type=float, default=defaults.min_speech_seconds)
+    parser.add_argument("--padding", type=float, default=defaults.padding_seconds)
+    args = parser.parse_args()
+
+    audio = decode_audio(args.media)
+    speech = detect_speech(audio, VadSettings(
+        margin_db=args.margin_db,
+        min_silence_seconds=args.min_silence,
+        min_speech_seconds=args.min_speech,
+        padding_seconds=args.padding
+    ))
+    for start, end in speech.regions:
+        print(f"{format_timestamp(start / SAMPLE_RATE)} - {format_timestamp(end / SAMPLE_RATE)}")
+    print(f"{len(speech.regions)} קטעי דיבור, דילוג על {speech.skipped_fraction:.1%} מהאודיו")
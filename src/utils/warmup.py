@@ -0,0 +1,122 @@
+"""
+חימום ברקע: ייבוא הספריות הכבדות וטעינת המודלים בזמן שהמשתמש מעלה קובץ
+
+הספריות הכבדות (faster_whisper, google.generativeai, av) מיובאות רק
+במקום שבו הן נדרשות, כך שהעמוד הראשון מוצג בלי לחכות להן. התמלול והסיכום
+רצים בתהליכי העבודה, שטוענים את faster_whisper ואת google.generativeai
+בעצמם - לכן בתהליך הממשק החימום מייבא ברקע רק את av (לבדיקת אורך הקובץ
+שהועלה), פעם אחת לכל תהליך, ומצבו מוצג בממשק.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import importlib
+import logging
+import threading
+import time
+
+# הספריות שתהליך הממשק עצמו משתמש בהן ומחוממות ברקע
+HEAVY_MODULES = ("av",)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@lru_cache(maxsize=None)
+def cuda_available() -> bool:
+    """האם יש GPU זמין ל-CTranslate2 (נבדק פעם אחת לתהליך, ללא ייבוא torch)"""
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+
+def import_heavy_modules() -> None:
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+
+@dataclass
+class WarmupStep:
+    """שלב חימום אחד ומצבו"""
+    name: str
+    state: str = PENDING
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Warmup:
+    def __init__(self, steps: List[Tuple[str, Callable[[], object]]], logger: Optional[logging.Logger] = None):
+        """
+        הרצת שלבי החימום לפי הסדר בתהליכון רקע
+
+        Args:
+            steps: רשימת (שם להצגה, פונקציה)
+            logger: מערכת הלוגים
+        """
+        self.logger = logger or logging.getLogger('VideoProcessor')
+        self._steps = steps
+        self._status: Dict[str, WarmupStep] = {name: WarmupStep(name) for name, _ in steps}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+
+    def start(self) -> "Warmup":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        for name, step in self._steps:
+            self._update(name, state=RUNNING)
+            step_started = time.perf_counter()
+            try:
+                step()
+                self._update(name, state=DONE, seconds=time.perf_counter() - step_started)
+            except Exception as e:
+                self.logger.warning(f"שלב החימום '{name}' נכשל: {str(e)}")
+                self._update(name, state=FAILED, error=str(e))
+        self.logger.info(f"החימום הסתיים תוך {time.perf_counter() - started:.1f} שניות")
+
+    def _update(self, name: str, **fields) -> None:
+        with self._lock:
+            for key, value in fields.items():
+                setattr(self._status[name], key, value)
+
+    def status(self) -> List[WarmupStep]:
+        """עותק של מצב כל השלבים"""
+        with self._lock:
+            return [WarmupStep(**vars(step)) for step in self._status.values()]
+
+    @property
+    def done(self) -> bool:
+        return all(step.state in (DONE, FAILED) for step in self.status())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """המתנה לסיום כל השלבים; מחזיר האם החימום הסתיים"""
+        self._thread.join(timeout)
+        return self.done
+
+
+_warmup: Optional[Warmup] = None
+_warmup_lock = threading.Lock()
+
+
+def start_warmup(
+    steps: List[Tuple[str, Callable[[], object]]],
+    logger: Optional[logging.Logger] = None
+) -> Warmup:
+    """הפעלת החימום של התהליך (פעם אחת בלבד; קריאות נוספות מחזירות את הקיים)"""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = Warmup(steps, logger).start()
+        return _warmup
+
+
+def get_warmup() -> Optional[Warmup]:
+    """החימום של התהליך, אם כבר הופעל"""
+    with _warmup_lock:
+        return _warmup
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# המודולים נטענים כמו באפליקציה - מתוך תיקיית src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
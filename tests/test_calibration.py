@@ -0,0 +1,106 @@
+"""
+הכיול בוחר את השילוב המהיר ביותר שעומד בסף שגיאת המילים מול float32
+"""
+from types import ModuleType, SimpleNamespace
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from utils.calibration import REFERENCE_COMPUTE_TYPE, calibrate, word_error_rate
+
+REFERENCE = " ".join(f"מילה{i}" for i in range(20))
+
+
+class FakeWhisperModel:
+    """תמלול ומהירות לפי סוג החישוב, בלי מודל אמיתי"""
+    # סוג חישוב: (שניות, תמלול)
+    behaviour = {}
+    created = []
+
+    def __init__(self, model_name, device="cpu", compute_type="default", **kwargs):
+        if compute_type not in self.behaviour:
+            raise ValueError(f"{compute_type} לא נתמך")
+        self.compute_type = compute_type
+        self.created.append(compute_type)
+
+    def transcribe(self, audio, language=None):
+        seconds, text = self.behaviour[self.compute_type]
+        time.sleep(seconds)
+        return iter([SimpleNamespace(text=text)]), SimpleNamespace(duration=len(audio) / 16000)
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    module = ModuleType("faster_whisper")
+    module.WhisperModel = FakeWhisperModel
+    monkeypatch.setitem(sys.modules, "faster_whisper", module)
+    FakeWhisperModel.created = []
+    return FakeWhisperModel
+
+
+def run(audio_seconds: int = 10, **kwargs):
+    audio = np.zeros(16000 * audio_seconds, dtype=np.float32)
+    return calibrate("tiny", "cpu", audio, thread_counts=[1], **kwargs)
+
+
+def test_faster_config_over_the_wer_threshold_is_rejected(fake_whisper):
+    # שתי מילים שגויות מתוך 20 - 10% שגיאה, מעל סף ברירת המחדל של 5%
+    degraded = REFERENCE.replace("מילה3", "שגוי").replace("מילה7", "שגוי")
+    fake_whisper.behaviour = {
+        "float32": (0.03, REFERENCE),
+        "int8": (0.0, degraded),
+    }
+
+    profile, results = run(compute_types=["int8", "float32"])
+
+    by_type = {r.compute_type: r for r in results}
+    assert by_type["int8"].wer == pytest.approx(0.1)
+    assert not by_type["int8"].accepted
+    assert by_type["int8"].seconds < by_type["float32"].seconds
+    assert by_type["float32"].accepted
+    assert profile["compute_type"] == REFERENCE_COMPUTE_TYPE
+    # הייחוס תמיד מתומלל ב-float32
+    assert fake_whisper.created[0] == REFERENCE_COMPUTE_TYPE
+
+
+def test_faster_config_within_the_threshold_wins(fake_whisper):
+    # מילה אחת מתוך 20 - 5% בדיוק, עדיין בסף
+    fake_whisper.behaviour = {
+        "float32": (0.03, REFERENCE),
+        "int8": (0.0, REFERENCE.replace("מילה3", "שגוי")),
+    }
+
+    profile, _ = run(compute_types=["int8", "float32"])
+
+    assert profile["compute_type"] == "int8"
+    assert profile["wer"] == pytest.approx(0.05)
+
+
+def test_no_profile_when_every_config_is_rejected(fake_whisper):
+    fake_whisper.behaviour = {
+        "float32": (0.0, REFERENCE),
+        "int8": (0.0, "משהו אחר לגמרי"),
+    }
+
+    profile, results = run(compute_types=["int8"])
+
+    assert profile is None
+    assert [r.accepted for r in results] == [False]
+
+
+def test_unsupported_compute_type_is_skipped(fake_whisper):
+    fake_whisper.behaviour = {"float32": (0.0, REFERENCE)}
+
+    profile, results = run(compute_types=["float16", "float32"])
+
+    assert [r.compute_type for r in results] == ["float32"]
+    assert profile["compute_type"] == "float32"
+
+
+def test_word_error_rate():
+    assert word_error_rate("a b c d", "a b c d") == 0.0
+    assert word_error_rate("a b c d", "a x c d") == 0.25
+    assert word_error_rate("a b c d", "a b c") == 0.25
+    assert word_error_rate("", "") == 0.0
@@ -0,0 +1,154 @@
+"""
+חידוש תמלול מהיומן - תמלול שנקטע באמצע ממשיך מהמקטע האחרון שנרשם,
+והתוצאה זהה לריצה רציפה. היומן נמחק רק אחרי שהתמלול נשמר.
+"""
+from types import SimpleNamespace
+import logging
+
+import numpy as np
+import pytest
+
+from utils import pipeline
+from utils import processor as processor_module
+from utils.audio import SAMPLE_RATE, split_on_silence
+from utils.cache import ResultCache
+from utils.checkpoint import TranscriptJournal
+from utils.processor import MediaProcessor
+from utils.segments import TranscriptSegment
+
+CHUNK_SECONDS = 40.0
+RESUME_KEY = "r" * 64
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FakeModel:
+    """מודל מדומה: קטע לכל פרץ צליל, והטקסט הוא עוצמת הפרץ; נעצר אחרי fail_after קריאות"""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def transcribe(self, audio, language="he"):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise Interrupted()
+        self.calls += 1
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], audio != 0, [0])).astype(np.int8)))
+        segments = [
+            SimpleNamespace(start=start / SAMPLE_RATE, end=end / SAMPLE_RATE, text=f" {audio[start]:.2f} ")
+            for start, end in zip(edges[0::2], edges[1::2])
+        ]
+        return iter(segments), None
+
+
+def make_audio(seconds: int = 200) -> np.ndarray:
+    """פרצים של שנייה כל 7 שניות, עם עוצמה שונה לכל פרץ, ושקט מוחלט ביניהם"""
+    audio = np.zeros(seconds * SAMPLE_RATE, dtype=np.float32)
+    for k, start in enumerate(range(2, seconds - 1, 7)):
+        audio[start * SAMPLE_RATE:(start + 1) * SAMPLE_RATE] = 0.1 + 0.01 * k
+    return audio
+
+
+@pytest.fixture
+def make_processor(tmp_path, monkeypatch):
+    """מעבד אמיתי עם מודל מדומה ומקטעים קצרים"""
+    monkeypatch.setattr(processor_module, "DEFAULT_CHUNK_SECONDS", CHUNK_SECONDS)
+    processors = []
+
+    def make(model, checkpoint_dir=tmp_path / "journals"):
+        processor = MediaProcessor(
+            "tiny", "", logging.getLogger("test"), compute_type="int8",
+            checkpoint_dir=str(checkpoint_dir) if checkpoint_dir else None
+        )
+        processor._whisper_model = model
+        processors.append(processor)
+        return processor
+
+    yield make
+    for processor in processors:
+        # המודל המדומה לא נלקח מהמאגר
+        processor._whisper_model = None
+        processor.cleanup()
+
+
+def test_reopen_truncates_a_half_written_line(tmp_path):
+    chunks = [(0, 10), (10, 20), (20, 30)]
+    journal = TranscriptJournal(tmp_path, RESUME_KEY)
+    assert journal.open(chunks) == []
+    journal.commit(0, [TranscriptSegment(0.0, 1.0, "ראשון")])
+    complete_size = journal.path.stat().st_size
+    with open(journal.path, "ab") as f:
+        f.write(b'{"chunk": 1, "segments": [{"sta')
+
+    reopened = TranscriptJournal(tmp_path, RESUME_KEY)
+    assert reopened.open(chunks) == [[TranscriptSegment(0.0, 1.0, "ראשון")]]
+    assert reopened.path.stat().st_size == complete_size
+
+    # מקטע שנרשם אחרי החיתוך נקרא כרגיל
+    reopened.commit(1, [TranscriptSegment(10.0, 11.0, "שני")])
+    assert len(TranscriptJournal(tmp_path, RESUME_KEY).open(chunks)) == 2
+
+
+def test_resume_after_interruption_matches_a_clean_run(make_processor, tmp_path):
+    audio = make_audio()
+    chunks = split_on_silence(audio, CHUNK_SECONDS)
+    assert len(chunks) > 3
+
+    clean = list(make_processor(FakeModel(), tmp_path / "clean").transcribe_segments(audio, resume_key=RESUME_KEY))
+
+    # הריצה נקטעת אחרי שני מקטעים, והשורה האחרונה ביומן נכתבה רק בחלקה
+    first = make_processor(FakeModel(fail_after=2))
+    with pytest.raises(Interrupted):
+        list(first.transcribe_segments(audio, resume_key=RESUME_KEY))
+    journal_path = tmp_path / "journals" / f"{RESUME_KEY}.jsonl"
+    with open(journal_path, "ab") as f:
+        f.write(b'{"chunk": 2, "segm')
+
+    model = FakeModel()
+    resumed = list(make_processor(model).transcribe_segments(audio, resume_key=RESUME_KEY))
+
+    assert model.calls == len(chunks) - 2
+    assert resumed == clean
+    # היומן נשאר עד שהמתקשר שומר את התמלול
+    assert journal_path.exists()
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "probe_duration", lambda path: 200.0)
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"not really a video")
+    return path
+
+
+def test_journal_is_kept_until_the_transcript_is_cached(make_processor, media, tmp_path, monkeypatch):
+    audio = make_audio()
+    cache = ResultCache(tmp_path / "cache", 100)
+    journals = tmp_path / "journals"
+    put_transcript = cache.put_transcript
+    failures = [OSError("disk full")]
+
+    def put_once_failing(key, segments):
+        if failures:
+            raise failures.pop()
+        put_transcript(key, segments)
+
+    monkeypatch.setattr(cache, "put_transcript", put_once_failing)
+    model = FakeModel()
+    processor = make_processor(model)
+    monkeypatch.setattr(processor, "convert_to_audio", lambda path, progress_callback=None: audio)
+    monkeypatch.setattr(processor, "summarize_text", lambda segments, progress_callback=None: "סיכום")
+
+    with pytest.raises(OSError):
+        pipeline.run_pipeline(processor, media, cache)
+    assert len(list(journals.iterdir())) == 1
+    calls = model.calls
+
+    # הריצה החוזרת קוראת הכל מהיומן, שומרת במטמון ורק אז מוחקת את היומן
+    segments, _ = pipeline.run_pipeline(processor, media, cache)
+
+    assert model.calls == calls
+    assert len(segments) > 0
+    assert list(journals.iterdir()) == []
@@ -0,0 +1,51 @@
+"""
+קבצי ההורדה נוצרים בזרימה מקובץ התוצאה - ייצוא JSONL הוא קטע בכל שורה, בלי הכותרת
+"""
+import gzip
+import json
+
+import pytest
+
+from utils.export import EXPORT_FORMATS, RESULT_SUFFIX, ResultFile
+from utils.segments import TranscriptSegment
+
+SEGMENTS = [TranscriptSegment(i * 2.0, i * 2.0 + 1.5, f"קטע {i}") for i in range(5)]
+
+
+@pytest.fixture
+def results(tmp_path):
+    return ResultFile.write(tmp_path / f"job{RESULT_SUFFIX}", SEGMENTS, "הסיכום", model="tiny")
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_jsonl_export_has_only_segments(results, compress):
+    path = results.export("jsonl", compress)
+
+    assert path != results.path
+    opener = gzip.open if compress else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows == [segment.to_dict() for segment in SEGMENTS]
+    assert [TranscriptSegment.from_dict(row) for row in rows] == SEGMENTS
+
+
+def test_result_file_keeps_its_header(results):
+    results.export("jsonl", compress=True)
+
+    reopened = ResultFile(results.path)
+    assert reopened.summary == "הסיכום"
+    assert reopened.segment_count == len(SEGMENTS)
+    assert list(reopened.iter_segments()) == SEGMENTS
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_every_format_exports_to_its_own_file(results, fmt):
+    plain = results.export(fmt)
+    compressed = results.export(fmt, compress=True)
+
+    assert plain != compressed
+    assert results.path not in (plain, compressed)
+    with gzip.open(compressed, "rt", encoding="utf-8") as f:
+        assert f.read() == plain.read_text(encoding="utf-8")
+    # בקשה חוזרת מחזירה את הקובץ שכבר נוצר
+    assert results.export(fmt) == plain
@@ -0,0 +1,247 @@
+"""
+שירות ההסקה: איסוף אצוות, פירוק אסימוני הזמן לקטעים, והחזרת הקטעים לפי הסדר -
+עם מודל ומפרק אסימונים מדומים. השירות שייך לרשומת המודל במאגר.
+"""
+from types import ModuleType, SimpleNamespace
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.audio import SAMPLE_RATE, split_on_silence
+from utils.inference_service import TIME_PRECISION, InferenceService, _WindowRequest, inference_service
+from utils.model_registry import ModelRegistry
+from utils.segments import TranscriptSegment
+
+EOT = 999
+TIMESTAMP_BEGIN = 1000
+N_FRAMES = 10
+
+
+class FakeTokenizer:
+    def __init__(self, hf_tokenizer, multilingual, task=None, language=None):
+        self.language = language
+        self.sot_sequence = (1, 2, 3)
+        self.eot = EOT
+        self.timestamp_begin = TIMESTAMP_BEGIN
+
+    def decode(self, tokens):
+        return " ".join(f"w{token}" for token in tokens)
+
+
+class FeatureExtractor:
+    nb_max_frames = N_FRAMES
+
+    def __call__(self, window):
+        return np.zeros((2, min(len(window) // SAMPLE_RATE, N_FRAMES)), dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def fake_tokenizer(monkeypatch):
+    module = ModuleType("faster_whisper.tokenizer")
+    module.Tokenizer = FakeTokenizer
+    monkeypatch.setitem(sys.modules, "faster_whisper", ModuleType("faster_whisper"))
+    monkeypatch.setitem(sys.modules, "faster_whisper.tokenizer", module)
+
+
+def stub_model():
+    return SimpleNamespace(
+        hf_tokenizer=None,
+        model=SimpleNamespace(is_multilingual=True),
+        feature_extractor=FeatureExtractor()
+    )
+
+
+class IdleService(InferenceService):
+    """שירות בלי תהליכון פענוח - הבדיקה מושכת את החלונות מהתור בעצמה"""
+
+    def _run(self):
+        pass
+
+
+def make_service(max_batch_size=8, max_wait_seconds=0.05):
+    return IdleService(stub_model(), "he", max_batch_size, max_wait_seconds)
+
+
+def request(offset=0.0, duration=10.0):
+    return _WindowRequest(np.zeros((2, N_FRAMES), dtype=np.float32), offset, duration)
+
+
+def ts(seconds: float) -> int:
+    return TIMESTAMP_BEGIN + round(seconds / TIME_PRECISION)
+
+
+def test_collect_batch_stops_at_the_max_batch_size():
+    service = make_service(max_batch_size=3, max_wait_seconds=5.0)
+    for _ in range(4):
+        service._requests.put(request())
+
+    started = time.monotonic()
+    batch = service._collect_batch()
+
+    assert len(batch) == 3
+    assert time.monotonic() - started < 1.0
+    assert service._requests.qsize() == 1
+
+
+def test_collect_batch_runs_a_partial_batch_after_the_deadline():
+    service = make_service(max_batch_size=8, max_wait_seconds=0.1)
+    service._requests.put(request())
+    service._requests.put(request())
+
+    started = time.monotonic()
+    batch = service._collect_batch()
+
+    assert len(batch) == 2
+    assert 0.1 <= time.monotonic() - started < 1.0
+
+
+def test_collect_batch_skips_cancelled_requests():
+    service = make_service(max_batch_size=3)
+    requests = [request(offset) for offset in (0.0, 10.0, 20.0)]
+    for item in requests:
+        service._requests.put(item)
+    requests[1].future.cancel()
+
+    batch = service._collect_batch()
+
+    assert batch == [requests[0], requests[2]]
+    assert all(item.future.running() for item in batch)
+
+
+def test_split_segments_follows_the_timestamp_tokens():
+    service = make_service()
+    tokens = [ts(0.0), 5, 6, ts(2.0), ts(2.0), 7, ts(4.0), ts(5.0), 8, EOT]
+
+    segments = service._split_segments(tokens, request(offset=100.0, duration=10.0))
+
+    assert segments == [
+        TranscriptSegment(100.0, 102.0, "w5 w6"),
+        TranscriptSegment(102.0, 104.0, "w7"),
+        # קטע ללא אסימון סיום נמשך עד סוף החלון
+        TranscriptSegment(105.0, 110.0, "w8")
+    ]
+
+
+def test_split_segments_clamps_to_the_window_duration():
+    service = make_service()
+    tokens = [ts(0.0), 5, ts(28.0), EOT]
+
+    [segment] = service._split_segments(tokens, request(offset=50.0, duration=12.5))
+
+    assert segment == TranscriptSegment(50.0, 62.5, "w5")
+
+
+def test_split_segments_drops_windows_without_text():
+    service = make_service()
+    assert service._split_segments([ts(0.0), ts(3.0), EOT], request()) == []
+
+
+def make_audio(seconds: int = 120) -> np.ndarray:
+    """פרצים של שנייה כל 4 שניות, ושקט מוחלט ביניהם"""
+    audio = np.zeros(seconds * SAMPLE_RATE, dtype=np.float32)
+    for start in range(1, seconds - 1, 4):
+        audio[start * SAMPLE_RATE:(start + 1) * SAMPLE_RATE] = 0.1
+    return audio
+
+
+def test_transcribe_returns_windows_in_order_when_they_finish_out_of_order():
+    service = make_service()
+    audio = make_audio()
+    windows = split_on_silence(audio, 25.0, 5.0)
+    assert len(windows) > 2
+    finished = []
+
+    def decode_in_reverse():
+        pending = [service._requests.get() for _ in windows]
+        for item in reversed(pending):
+            time.sleep(0.01)
+            finished.append(item.offset)
+            item.future.set_running_or_notify_cancel()
+            item.future.set_result([TranscriptSegment(item.offset, item.offset + item.duration, f"{item.offset:.2f}")])
+
+    decoder = threading.Thread(target=decode_in_reverse)
+    decoder.start()
+    progress = []
+    segments = list(service.transcribe(audio, lambda fraction, message: progress.append(fraction)))
+    decoder.join()
+
+    starts = [start / SAMPLE_RATE for start, _ in windows]
+    assert finished == list(reversed(starts))
+    assert [seg.start for seg in segments] == pytest.approx(starts)
+    assert [seg.end for seg in segments] == pytest.approx([end / SAMPLE_RATE for _, end in windows])
+    assert progress[-1] == 1.0
+
+
+class FakeService:
+    def __init__(self, model, language):
+        self.model = model
+        self.language = language
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_service_is_owned_by_the_registry_entry(monkeypatch):
+    registry = ModelRegistry(0)
+    monkeypatch.setattr(registry, "_load", lambda key, load_kwargs: (object(), 1))
+    created = []
+
+    def factory(language):
+        def create(model):
+            created.append(FakeService(model, language))
+            return created[-1]
+        return create
+
+    key = ("tiny", "cpu", "int8")
+    with registry.service(*key, ("inference", "he"), factory("he")) as first:
+        # שירות לכל שפה, ושימוש חוזר באותו שירות לאותה שפה
+        with registry.service(*key, ("inference", "en"), factory("en")) as other:
+            assert other is not first
+        with registry.service(*key, ("inference", "he"), factory("he")) as again:
+            assert again is first
+        assert not first.closed
+
+    # ללא הפניות המודל מפונה (תקציב 0), והשירותים שלו נסגרים איתו
+    assert [service.language for service in created] == ["he", "en"]
+    assert all(service.closed for service in created)
+    assert registry.used_bytes == 0
+
+
+def test_service_close_fails_queued_windows():
+    service = InferenceService(stub_model(), "he", max_batch_size=1)
+    gate = threading.Event()
+    service._decode = lambda batch: gate.wait() and [[] for _ in batch]
+
+    first = service.submit(np.zeros(SAMPLE_RATE, dtype=np.float32), 0.0)
+    # החלון הראשון בפענוח, השני ממתין בתור
+    while not first.future.running():
+        time.sleep(0.01)
+    second = service.submit(np.zeros(SAMPLE_RATE, dtype=np.float32), 1.0)
+    closer = threading.Thread(target=service.close)
+    closer.start()
+    service._closed.wait(5)
+    gate.set()
+    closer.join(5)
+
+    assert not service._thread.is_alive()
+    assert first.future.result() == []
+    with pytest.raises(RuntimeError):
+        second.future.result(timeout=5)
+
+
+def test_inference_service_uses_the_language_in_its_key(monkeypatch):
+    registry = ModelRegistry(1 << 30)
+    monkeypatch.setattr(registry, "_load", lambda key, load_kwargs: (stub_model(), 1))
+    key = ("tiny", "cpu", "int8")
+
+    with inference_service(registry, key, "he") as hebrew, inference_service(registry, key, "en") as english:
+        assert hebrew.tokenizer.language == "he"
+        assert english.tokenizer.language == "en"
+    with inference_service(registry, key, "he") as again:
+        assert again is hebrew
+    for service in (hebrew, english):
+        service.close()
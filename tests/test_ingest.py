@@ -0,0 +1,29 @@
+"""
+העלאה שכבר שמורה לפי תוכנה לא מפנה מקום בשטח הזמני - רק כתיבה חדשה
+"""
+import io
+
+from utils.ingest import ingest_upload
+
+
+def test_make_room_only_for_new_content(tmp_path):
+    requests = []
+    data = b"video bytes" * 1000
+
+    first = ingest_upload(io.BytesIO(data), "a.mp4", tmp_path, make_room=requests.append)
+    assert requests == [len(data)]
+
+    # אותו תוכן בשם אחר - הקובץ הקיים מוחזר בלי לבקש מקום
+    second = ingest_upload(io.BytesIO(data), "b.MP4", tmp_path, make_room=requests.append)
+    assert second == first
+    assert requests == [len(data)]
+    assert first.read_bytes() == data
+
+
+def test_make_room_runs_before_writing(tmp_path):
+    def make_room(nbytes):
+        # המקום מתפנה לפני שנכתב דבר לתיקייה
+        assert list(tmp_path.iterdir()) == []
+
+    ingest_upload(io.BytesIO(b"x" * 10), "a.mp4", tmp_path, make_room=make_room)
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,89 @@
+"""
+תהליכי העבודה של התור: אינם daemon (כדי שיוכלו לפתוח מאגר תהליכים
+לתמלול מקבילי) ונסגרים דרך WorkerPool.shutdown
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import time
+
+import pytest
+
+from utils import job_queue
+from utils.job_queue import JobQueue, WorkerPool, get_worker_pool
+
+
+def _square(x: int) -> int:
+    return x * x
+
+
+def _spawn_children() -> int:
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return sum(pool.map(_square, range(4)))
+
+
+def test_daemon_process_cannot_open_a_process_pool():
+    """הבעיה המקורית - תהליך daemon לא יכול ליצור תהליכי בן"""
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        # תהליכי Pool הם daemon
+        with pytest.raises(Exception, match="daemonic"):
+            pool.apply(_spawn_children)
+
+
+def _config(tmp_path):
+    return {
+        "whisper_model": "tiny",
+        "gemini_api_key": "",
+        "logging": {"dir": str(tmp_path / "logs")},
+        "cache_dir": str(tmp_path / "cache"),
+        "metrics_dir": str(tmp_path / "metrics"),
+        "store_dir": str(tmp_path / "store"),
+        "scratch_dir": str(tmp_path / "scratch"),
+        "results_dir": str(tmp_path / "results"),
+        "concurrency": 2
+    }
+
+
+def _wait_for_ready(queue: JobQueue, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        states = queue.worker_states()
+        if states and all(state == "ready" for state in states.values()):
+            return
+        time.sleep(0.2)
+    pytest.fail(f"תהליך העבודה לא עלה: {queue.worker_states()}")
+
+
+def test_workers_are_not_daemonic_and_shut_down_cleanly(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db")
+    pool = WorkerPool(queue, _config(tmp_path), workers=1)
+    pool.ensure_running()
+    try:
+        process = pool.processes[0]
+        assert not process.daemon
+        _wait_for_ready(queue)
+    finally:
+        started = time.monotonic()
+        pool.shutdown(timeout=30)
+
+    # יציאה רגילה אחרי סימון העצירה, בלי terminate
+    assert not process.is_alive()
+    assert process.exitcode == 0
+    assert time.monotonic() - started < 10
+    assert pool.processes == {}
+
+    # אחרי כיבוי לא מופעלים תהליכים חדשים
+    pool.ensure_running()
+    assert pool.processes == {}
+
+
+def test_zero_workers_keeps_the_queue_without_processes(tmp_path, monkeypatch):
+    """מדידת הממשק רצה עם workers = 0 - אף תהליך עבודה לא טוען מודל"""
+    monkeypatch.setattr(job_queue, "_job_system", None)
+    pool = get_worker_pool(_config(tmp_path), str(tmp_path / "jobs.db"), workers=0)
+    try:
+        assert pool.workers == 0
+        assert pool.processes == {}
+        assert pool.queue.worker_states() == {}
+    finally:
+        pool.shutdown(timeout=5)
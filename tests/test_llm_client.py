@@ -0,0 +1,250 @@
+"""
+הלקוח המשותף מול שרת HTTP מקומי: 429 עם השהיה, כמה בקשות ברצף ובמקביל
+
+המודל המדומה מחזיק חיבורי keep-alive שנפתחו בלולאה של הבקשה הראשונה -
+כמו לקוח ה-grpc.aio של google-generativeai - ולכן נכשל אם נקרא מלולאה אחרת.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from utils.llm_client import LLMClient, LLMSettings
+from utils.segments import TranscriptSegment
+from utils.summarizer import MapReduceSummarizer
+
+FAST = dict(requests_per_minute=0, backoff_base_seconds=0.01, backoff_max_seconds=0.05)
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency_seconds = 0.0
+        # תשובות שגיאה לפי הסדר לבקשות הראשונות (למשל [429, 429])
+        self.errors = []
+        self.requests = 0
+        self.connections = 0
+        self.active = 0
+        self.peak_active = 0
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return self.server_address
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["prompt"]
+        with server.lock:
+            server.requests += 1
+            server.prompts.append(prompt)
+            status = server.errors.pop(0) if server.errors else 200
+            server.active += 1
+            server.peak_active = max(server.peak_active, server.active)
+        try:
+            time.sleep(server.latency_seconds)
+        finally:
+            with server.lock:
+                server.active -= 1
+        body = json.dumps({"text": f"סיכום: {prompt}"} if status == 200 else {"error": status}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class HttpError(Exception):
+    """כמו חריגות google.api_core - קוד ה-HTTP במאפיין code"""
+
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class HttpModel:
+    """מודל עם generate_content_async מעל HTTP, עם מאגר חיבורים שקשור ללולאה"""
+
+    def __init__(self, address):
+        self.host, self.port = address
+        self.loop = None
+        self._idle = []
+
+    async def generate_content_async(self, prompt: str) -> Response:
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError("Event loop is closed")
+
+        reader, writer = self._idle.pop() if self._idle else await asyncio.open_connection(self.host, self.port)
+        try:
+            body = json.dumps({"prompt": prompt}).encode()
+            writer.write(
+                f"POST /generate HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            payload = json.loads(await reader.readexactly(length))
+        except BaseException:
+            # חיבור שנקטע באמצע (למשל בחריגת זמן) לא חוזר למאגר
+            writer.close()
+            raise
+        self._idle.append((reader, writer))
+        if status != 200:
+            raise HttpError(status)
+        return Response(payload["text"])
+
+
+@pytest.fixture
+def server():
+    server = FakeGeminiServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **settings):
+    created = []
+
+    def factory():
+        created.append(HttpModel(server.url))
+        return created[-1]
+
+    client = LLMClient(factory, LLMSettings(**{**FAST, **settings}))
+    return client, created
+
+
+def test_loop_bound_model_fails_with_a_loop_per_call(server):
+    """בדיקת התחליף עצמו - זו התקלה שהלקוח צריך להימנע ממנה"""
+    model = HttpModel(server.url)
+    asyncio.run(model.generate_content_async("א"))
+    with pytest.raises(RuntimeError, match="Event loop is closed"):
+        asyncio.run(model.generate_content_async("ב"))
+
+
+def test_429_is_retried_with_backoff(server):
+    server.errors = [429, 429]
+    client, _ = make_client(server)
+
+    response = client.generate_content("פרומפט")
+
+    assert response.text == "סיכום: פרומפט"
+    assert server.requests == 3
+    assert client.stats() == {"requests": 3, "retries": 2, "coalesced": 0, "failures": 0}
+
+
+def test_429_gives_up_after_max_retries(server):
+    server.errors = [429] * 10
+    client, _ = make_client(server, max_retries=2)
+
+    with pytest.raises(HttpError) as error:
+        client.generate_content("פרומפט")
+    assert error.value.code == 429
+    assert server.requests == 3
+    assert client.stats()["failures"] == 1
+
+
+def test_client_errors_are_not_retried(server):
+    server.errors = [400]
+    client, _ = make_client(server)
+
+    with pytest.raises(HttpError):
+        client.generate_content("פרומפט")
+    assert server.requests == 1
+    assert client.stats()["retries"] == 0
+
+
+def test_timeout_is_retried(server):
+    server.latency_seconds = 0.5
+    client, _ = make_client(server, timeout_seconds=0.1, max_retries=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        client.generate_content("פרומפט")
+    assert client.stats()["requests"] == 2
+    assert client.stats()["retries"] == 1
+
+
+def test_sequential_calls_from_new_loops_share_one_model(server):
+    """כמה עבודות ברצף - כל אחת בלולאה משלה או בקריאה סינכרונית"""
+    client, created = make_client(server)
+
+    for i in range(3):
+        assert client.generate_content(f"סינכרוני {i}").text == f"סיכום: סינכרוני {i}"
+        assert asyncio.run(client.generate_content_async(f"לולאה {i}")).text == f"סיכום: לולאה {i}"
+
+    assert len(created) == 1
+    assert server.requests == 6
+    # כל הבקשות עברו על חיבור keep-alive אחד של הלולאה הקבועה
+    assert server.connections == 1
+
+
+def test_summarize_twice_through_the_client(server):
+    client, created = make_client(server)
+    summarizer = MapReduceSummarizer(client, max_chunk_tokens=100)
+    segments = [TranscriptSegment(float(i), i + 1.0, f"משפט מספר {i} " * 5) for i in range(40)]
+
+    first = summarizer.summarize(segments)
+    second = summarizer.summarize(segments)
+
+    assert first == second
+    # כמה חלקים ושלב איחוד בכל סיכום
+    assert server.requests > 4
+    assert len(created) == 1
+    assert client.stats()["failures"] == 0
+
+
+def test_concurrency_is_capped_across_threads(server):
+    server.latency_seconds = 0.05
+    client, _ = make_client(server, max_concurrency=2)
+
+    with ThreadPoolExecutor(6) as pool:
+        texts = [r.text for r in pool.map(client.generate_content, [f"בקשה {i}" for i in range(12)])]
+
+    assert texts == [f"סיכום: בקשה {i}" for i in range(12)]
+    assert server.peak_active <= 2
+    assert server.connections <= 2
+
+
+def test_identical_prompts_are_coalesced(server):
+    server.latency_seconds = 0.2
+    client, _ = make_client(server)
+
+    with ThreadPoolExecutor(4) as pool:
+        texts = [r.text for r in pool.map(client.generate_content, ["אותו פרומפט"] * 4)]
+
+    assert texts == ["סיכום: אותו פרומפט"] * 4
+    assert server.requests == 1
+    assert client.stats()["coalesced"] == 3
@@ -0,0 +1,77 @@
+"""
+היסטוריית המדדים נקראת בחלון חסום, וייצוא Prometheus מצטבר בלי לקרוא
+את כל הקובץ בכל פעם
+"""
+import re
+
+from utils.metrics import MetricsRecorder, StageMetric
+
+
+def _metric(i: int, stage: str = "transcribe", estimated: bool = True) -> StageMetric:
+    return StageMetric(
+        stage=stage,
+        duration_seconds=float(i),
+        media_seconds=10.0 * i,
+        bytes=1000,
+        peak_rss_bytes=100 + i,
+        model="tiny",
+        device="cpu",
+        estimated_seconds=float(i) + 1 if estimated else None
+    )
+
+
+def _samples(recorder: MetricsRecorder) -> dict:
+    text = recorder.prometheus_path.read_text(encoding="utf-8")
+    return {
+        name + labels: float(value)
+        for name, labels, value in re.findall(r"^(\w+)(\{[^}]*\}) (\S+)$", text, re.M)
+    }
+
+
+def test_history_returns_only_the_last_window(tmp_path):
+    recorder = MetricsRecorder(tmp_path)
+    for i in range(50):
+        recorder.record(_metric(i))
+
+    history = recorder.history(limit=10)
+    assert [m.duration_seconds for m in history] == [float(i) for i in range(40, 50)]
+    assert len(recorder.history(limit=None)) == 50
+
+
+def test_prometheus_totals_are_cumulative(tmp_path):
+    recorder = MetricsRecorder(tmp_path)
+    for i in range(1, 6):
+        recorder.record(_metric(i))
+    recorder.record(_metric(7, stage="summarize", estimated=False))
+    recorder.write_prometheus()
+
+    labels = '{stage="transcribe",model="tiny",device="cpu"}'
+    samples = _samples(recorder)
+    assert samples["video_stage_duration_seconds_count" + labels] == 5
+    assert samples["video_stage_duration_seconds_sum" + labels] == 15
+    assert samples["video_stage_media_seconds_total" + labels] == 150
+    assert samples["video_stage_peak_rss_bytes" + labels] == 105
+    assert samples["video_stage_estimate_error_seconds_sum" + labels] == 5
+    summarize = '{stage="summarize",model="tiny",device="cpu"}'
+    assert samples["video_stage_estimate_error_seconds_count" + summarize] == 0
+
+    # רשומות חדשות - גם מרשם אחר (תהליך אחר) שכותב לאותו קובץ - נוספות לסכומים
+    other = MetricsRecorder(tmp_path)
+    other.record(_metric(10))
+    recorder.record(_metric(20))
+    recorder.write_prometheus()
+    samples = _samples(recorder)
+    assert samples["video_stage_duration_seconds_count" + labels] == 7
+    assert samples["video_stage_duration_seconds_sum" + labels] == 45
+    assert samples["video_stage_peak_rss_bytes" + labels] == 120
+
+
+def test_prometheus_skips_a_line_still_being_written(tmp_path):
+    recorder = MetricsRecorder(tmp_path)
+    recorder.record(_metric(1))
+    with open(recorder.history_path, "a", encoding="utf-8") as f:
+        f.write('{"stage": "transcribe"')
+    recorder.write_prometheus()
+
+    labels = '{stage="transcribe",model="tiny",device="cpu"}'
+    assert _samples(recorder)["video_stage_duration_seconds_count" + labels] == 1
@@ -0,0 +1,83 @@
+"""
+מאגר המודלים: גודל מודל מוערך לפי משפחה וסוג חישוב, ומודל לא מוכר נמדד
+בטעינה - כשטעינות מקבילות לא נמדדות זו על גבי זו
+"""
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+import sys
+import threading
+import time
+
+import pytest
+
+from utils import model_registry
+from utils.model_registry import ModelRegistry, estimate_model_bytes
+
+
+@pytest.mark.parametrize("name, device, compute_type, params_m, bytes_per_param", [
+    ("tiny", "cpu", "int8", 39, 1),
+    ("openai/whisper-large-v3-turbo", "cuda", "float16", 809, 2),
+    ("Systran/faster-whisper-large-v2", "cuda", "int8_float16", 1550, 1),
+    ("small", "cpu", "default", 244, 4),
+    ("medium", "cuda", "default", 769, 2)
+])
+def test_estimate_by_family_and_compute_type(name, device, compute_type, params_m, bytes_per_param):
+    expected = params_m * 1_000_000 * bytes_per_param * model_registry.RUNTIME_OVERHEAD
+    assert estimate_model_bytes(name, device, compute_type) == int(expected)
+
+
+def test_unknown_family_has_no_estimate():
+    assert estimate_model_bytes("ivrit-ai/faster-whisper-v2-d4", "cpu", "int8") is None
+
+
+class FakeWhisperModel:
+    """טעינה איטית שמגדילה את "הזיכרון" ב-100 בתים, ורושמת טעינות חופפות"""
+    rss = 0
+    active = 0
+    overlapped = False
+    lock = threading.Lock()
+
+    def __init__(self, name, device="cpu", compute_type="default", **kwargs):
+        cls = FakeWhisperModel
+        with cls.lock:
+            cls.active += 1
+            cls.overlapped = cls.overlapped or cls.active > 1
+        time.sleep(0.05)
+        with cls.lock:
+            cls.rss += 100
+            cls.active -= 1
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    module = ModuleType("faster_whisper")
+    module.WhisperModel = FakeWhisperModel
+    monkeypatch.setitem(sys.modules, "faster_whisper", module)
+    monkeypatch.setattr(model_registry, "_process_rss_bytes", lambda: FakeWhisperModel.rss)
+    FakeWhisperModel.rss = 0
+    FakeWhisperModel.overlapped = False
+    return FakeWhisperModel
+
+
+def test_unknown_models_are_measured_one_at_a_time(fake_whisper):
+    registry = ModelRegistry(1 << 30)
+    names = [f"custom/model-{i}" for i in range(4)]
+
+    with ThreadPoolExecutor(len(names)) as pool:
+        list(pool.map(lambda name: registry.acquire(name, "cpu", "int8"), names))
+
+    assert not fake_whisper.overlapped
+    assert registry.used_bytes == 100 * len(names)
+
+
+def test_known_models_use_the_estimate(fake_whisper):
+    registry = ModelRegistry(1 << 40)
+    registry.acquire("tiny", "cpu", "int8")
+    assert registry.used_bytes == estimate_model_bytes("tiny", "cpu", "int8")
+
+
+def test_unmeasurable_gpu_model_counts_as_large(fake_whisper, monkeypatch):
+    monkeypatch.setattr(model_registry, "_cuda_used_bytes", lambda device_index=0: None)
+    registry = ModelRegistry(1 << 40)
+    registry.acquire("custom/model", "cuda", "float16")
+    assert registry.used_bytes == estimate_model_bytes("large", "cuda", "float16")
@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils import parallel
+from utils.audio import SAMPLE_RATE, split_on_silence
+
+CHUNK_SECONDS = 40.0
+
+
+class StubModel:
+    """מודל מדומה: קטע לכל פרץ צליל, והטקסט הוא עוצמת הפרץ"""
+
+    def __init__(self, slow_first: bool = False):
+        self.slow_first = slow_first
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, language="he"):
+        with self._lock:
+            call = self.calls
+            self.calls += 1
+        if self.slow_first and call == 0:
+            # המקטע הראשון מסתיים אחרון - האיסוף חייב לשמור על הסדר
+            time.sleep(0.2)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], audio != 0, [0])).astype(np.int8)))
+        segments = [
+            SimpleNamespace(start=start / SAMPLE_RATE, end=end / SAMPLE_RATE, text=f" {audio[start]:.2f} ")
+            for start, end in zip(edges[0::2], edges[1::2])
+        ]
+        return iter(segments), None
+
+
+def make_audio(seconds: int = 200) -> np.ndarray:
+    """פרצים של שנייה כל 7 שניות, עם עוצמה שונה לכל פרץ, ושקט מוחלט ביניהם"""
+    audio = np.zeros(seconds * SAMPLE_RATE, dtype=np.float32)
+    for k, start in enumerate(range(2, seconds - 1, 7)):
+        audio[start * SAMPLE_RATE:(start + 1) * SAMPLE_RATE] = 0.1 + 0.01 * k
+    return audio
+
+
+def serial(audio: np.ndarray):
+    segments, _ = StubModel().transcribe(audio)
+    return [(seg.start, seg.end, seg.text.strip()) for seg in segments]
+
+
+@pytest.fixture
+def stub_pool(monkeypatch):
+    """מאגר תהליכונים במקום מאגר התהליכים, עם המודל המדומה"""
+    model = StubModel(slow_first=True)
+    pool = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(parallel, "_worker_model", model)
+    monkeypatch.setattr(parallel, "_get_pool", lambda key: pool)
+    yield model
+    pool.shutdown()
+
+
+def assert_matches_serial(segments, reference):
+    assert [seg.text for seg in segments] == [text for _, _, text in reference]
+    assert [seg.start for seg in segments] == pytest.approx([start for start, _, _ in reference])
+    assert [seg.end for seg in segments] == pytest.approx([end for _, end, _ in reference])
+
+
+def test_parallel_matches_serial(stub_pool):
+    audio = make_audio()
+    chunks = split_on_silence(audio, CHUNK_SECONDS)
+    assert len(chunks) > 2
+
+    segments = list(parallel.transcribe_parallel(audio, "stub", 4, chunk_seconds=CHUNK_SECONDS))
+
+    assert stub_pool.calls == len(chunks)
+    assert_matches_serial(segments, serial(audio))
+
+
+def test_segments_ordered_and_shifted_at_chunk_boundaries(stub_pool):
+    audio = make_audio()
+    chunks = split_on_silence(audio, CHUNK_SECONDS)
+
+    segments = list(parallel.transcribe_parallel(audio, "stub", 4, chunk_seconds=CHUNK_SECONDS))
+
+    starts = [seg.start for seg in segments]
+    assert starts == sorted(starts)
+    # הקטע הראשון בכל מקטע מוזז בתחילת המקטע - לא מתחיל מאפס
+    for start, end in chunks[1:]:
+        first = next(seg for seg in segments if seg.start >= start / SAMPLE_RATE)
+        assert first.start > start / SAMPLE_RATE
+        assert first.end <= end / SAMPLE_RATE
+
+
+def test_memmap_chunks_read_from_file(stub_pool, tmp_path):
+    audio = make_audio()
+    path = tmp_path / "audio.f32"
+    mapped = np.memmap(path, dtype=np.float32, mode="w+", shape=audio.shape)
+    mapped[:] = audio
+    mapped.flush()
+    assert parallel._memmap_filename(mapped) == str(path)
+
+    segments = list(parallel.transcribe_parallel(mapped, "stub", 4, chunk_seconds=CHUNK_SECONDS))
+
+    assert_matches_serial(segments, serial(audio))
+
+
+def test_progress_reports_every_chunk(stub_pool):
+    audio = make_audio()
+    reports = []
+
+    list(parallel.transcribe_parallel(
+        audio, "stub", 4, chunk_seconds=CHUNK_SECONDS,
+        progress_callback=lambda p, message: reports.append(p)
+    ))
+
+    assert len(reports) == len(split_on_silence(audio, CHUNK_SECONDS))
+    assert reports == sorted(reports)
+    assert reports[-1] == pytest.approx(1.0)
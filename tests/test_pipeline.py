@@ -0,0 +1,94 @@
+"""
+מטמון התמלולים בצנרת - תמלול נשמר לפי כל מה שמשפיע עליו
+"""
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from utils import pipeline
+from utils.cache import ResultCache
+from utils.segments import TranscriptSegment
+from utils.vad import VadSettings
+
+
+class FakeProcessor:
+    """מעבד בלי מודל: התמלול מתאר את ההגדרות שבהן נוצר"""
+
+    def __init__(self, compute_type: str = "default", vad: Optional[VadSettings] = None):
+        self.whisper_model_name = "tiny"
+        self.model_key = ("tiny", "cpu", compute_type)
+        self.device = "cpu"
+        self.gemini_model_name = "fake"
+        self.checkpoint_dir = None
+        self.vad = vad
+        self.transcribed = 0
+
+    def convert_to_audio(self, path, progress_callback=None):
+        return np.zeros(16000, dtype=np.float32)
+
+    def transcribe_segments(self, audio, progress_callback=None, resume_key=None):
+        self.transcribed += 1
+        yield TranscriptSegment(0.0, 1.0, f"compute={self.model_key[2]} vad={self.vad}")
+
+    def summarize_text(self, segments, progress_callback=None):
+        return "סיכום"
+
+    def remove_journal(self, resume_key):
+        pass
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "probe_duration", lambda path: 1.0)
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"not really a video")
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "cache", 100)
+
+
+def test_cache_hit_skips_transcription(media, cache):
+    processor = FakeProcessor()
+    first, _ = pipeline.run_pipeline(processor, media, cache)
+    second, _ = pipeline.run_pipeline(processor, media, cache)
+
+    assert first == second
+    assert processor.transcribed == 1
+
+
+def test_compute_type_is_part_of_the_transcript_key(media, cache):
+    """פרופיל כיול שמחליף את סוג החישוב לא מחזיר תמלול שנוצר בסוג אחר"""
+    before = FakeProcessor("default")
+    segments, _ = pipeline.run_pipeline(before, media, cache)
+
+    calibrated = FakeProcessor("int8")
+    calibrated_segments, _ = pipeline.run_pipeline(calibrated, media, cache)
+
+    assert calibrated.transcribed == 1
+    assert calibrated_segments[0].text.startswith("compute=int8")
+    # ובחזרה - מחיקת הפרופיל מחזירה את התמלול המקורי מהמטמון
+    again = FakeProcessor("default")
+    assert pipeline.run_pipeline(again, media, cache)[0] == segments
+    assert again.transcribed == 0
+
+
+def test_vad_settings_are_part_of_the_transcript_key(media, cache):
+    """תמלול בלי זיהוי דיבור לא מוחזר כתוצאת זיהוי דיבור, ולהפך"""
+    configs = [None, VadSettings(), VadSettings(margin_db=15.0), VadSettings(padding_seconds=0.5)]
+    texts = []
+    for vad in configs:
+        processor = FakeProcessor(vad=vad)
+        segments, _ = pipeline.run_pipeline(processor, media, cache)
+        assert processor.transcribed == 1
+        texts.append(segments[0].text)
+    assert len(set(texts)) == len(configs)
+
+    # אותן הגדרות (גם אובייקט אחר) - פגיעה במטמון
+    processor = FakeProcessor(vad=VadSettings(margin_db=15.0))
+    segments, _ = pipeline.run_pipeline(processor, media, cache)
+    assert processor.transcribed == 0
+    assert segments[0].text == texts[2]
@@ -0,0 +1,70 @@
+"""
+שכבת ה-RAM של השטח הזמני מיועדת לקבצים קטנים בלבד - אודיו ממופה נכתב לדיסק
+"""
+import logging
+
+import numpy as np
+import pytest
+
+from utils import processor as processor_module
+from utils.processor import MediaProcessor
+from utils.scratch import ScratchManager
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ScratchManager(
+        tmp_path / "scratch",
+        quota_mb=4096,
+        ram_dir=tmp_path / "shm",
+        ram_max_mb=1024,
+        ram_file_max_mb=8
+    )
+
+
+def test_small_files_use_the_ram_tier(manager):
+    path = manager.allocate(".bin", 1 * MB)
+    assert path.parent == manager.ram_dir
+
+
+def test_files_over_the_per_file_cap_go_to_disk(manager):
+    # קטן מהנפח הכולל של שכבת ה-RAM, אבל גדול מהמגבלה לקובץ בודד
+    path = manager.allocate(".bin", 100 * MB)
+    assert path.parent == manager.work_dir
+
+
+def test_callers_can_opt_out_of_the_ram_tier(manager):
+    path = manager.space().new_file(".f32", 1 * MB, ram=False)
+    assert path.parent == manager.work_dir
+
+
+def test_long_audio_memmap_lands_on_disk(tmp_path, monkeypatch):
+    """אודיו של שלוש שעות (כ-690MB) - נכנס בשכבת ה-RAM גם לקובץ בודד, ובכל זאת נכתב לדיסק"""
+    manager = ScratchManager(
+        tmp_path / "scratch",
+        quota_mb=4096,
+        ram_dir=tmp_path / "shm",
+        ram_max_mb=1024,
+        ram_file_max_mb=1024
+    )
+    targets = []
+
+    def fake_decode(path, sampling_rate, progress_callback=None, memmap_path=None):
+        targets.append(memmap_path)
+        return np.zeros(16, dtype=np.float32)
+
+    monkeypatch.setattr(processor_module, "probe_duration", lambda path: 3 * 3600.0)
+    monkeypatch.setattr(processor_module, "decode_audio", fake_decode)
+    processor = MediaProcessor(
+        "tiny", "", logging.getLogger("test"), compute_type="int8",
+        memmap_threshold_seconds=3600, scratch=manager
+    )
+    try:
+        processor.convert_to_audio("long.mp4")
+        [memmap_path] = targets
+        assert memmap_path.parent == manager.work_dir
+        assert list(manager.ram_dir.iterdir()) == []
+    finally:
+        processor.cleanup()
@@ -0,0 +1,40 @@
+"""
+חיפוש בארכיון - התוצאות מגיעות עם שם הסרטון שלהן
+"""
+from utils.segment_store import SegmentStore
+from utils.segments import TranscriptSegment
+
+
+def _segments(*texts):
+    return [TranscriptSegment(i * 5.0, i * 5.0 + 4.0, text) for i, text in enumerate(texts)]
+
+
+def test_search_returns_names_of_matching_videos(tmp_path):
+    store = SegmentStore(tmp_path)
+    store.put("a" * 64, _segments("שלום עולם", "הבית הגדול"), name="first.mp4")
+    store.put("b" * 64, _segments("בית ספר", "משהו אחר"), name="second.mp4")
+    # סרטונים רבים שלא תואמים לחיפוש
+    for i in range(20):
+        store.put(f"{i:064d}", _segments("טקסט לא קשור"), name=f"other_{i}.mp4")
+
+    hits = store.search("בית")
+    assert [(hit.name, hit.segment) for hit in hits] == [("first.mp4", 1), ("second.mp4", 0)]
+    assert hits[0].text == "הבית הגדול"
+    assert hits[1].start_ms == 0
+
+
+def test_search_falls_back_to_the_video_id_without_a_name(tmp_path):
+    store = SegmentStore(tmp_path)
+    store.put("c" * 64, _segments("מילה"))
+
+    [hit] = store.search("מילה")
+    assert hit.name == "c" * 12
+
+
+def test_search_respects_the_limit(tmp_path):
+    store = SegmentStore(tmp_path)
+    store.put("d" * 64, _segments(*["חזרה"] * 10), name="long.mp4")
+
+    hits = store.search("חזרה", limit=3)
+    assert [hit.segment for hit in hits] == [0, 1, 2]
+    assert all(hit.name == "long.mp4" for hit in hits)
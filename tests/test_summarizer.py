@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from utils.segments import TranscriptSegment
+from utils.summarizer import MapReduceSummarizer
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LoopBoundClient:
+    """
+    כמו GenerativeModel של google-generativeai: הלקוח האסינכרוני נוצר בבקשה
+    הראשונה ונשאר קשור ללולאה שלה
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.calls = 0
+
+    async def generate_content_async(self, prompt: str) -> Response:
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError("Event loop is closed")
+        self.calls += 1
+        await asyncio.sleep(0)
+        return Response(f"סיכום {len(prompt)}")
+
+
+def long_transcript(segments: int = 200):
+    return [TranscriptSegment(float(i), i + 1.0, f"משפט מספר {i} " * 10) for i in range(segments)]
+
+
+def test_loop_bound_client_fails_with_a_loop_per_call():
+    """בדיקת התחליף עצמו - זו התקלה ש-summarize צריך להימנע ממנה"""
+    summarizer = MapReduceSummarizer(LoopBoundClient())
+    asyncio.run(summarizer.asummarize("טקסט קצר."))
+    with pytest.raises(RuntimeError, match="Event loop is closed"):
+        asyncio.run(summarizer.asummarize("טקסט קצר."))
+
+
+def test_summarize_twice_in_one_process():
+    client = LoopBoundClient()
+    summarizer = MapReduceSummarizer(client)
+
+    first = summarizer.summarize("טקסט קצר לסיכום.")
+    second = summarizer.summarize("טקסט קצר אחר לסיכום.")
+
+    assert first.startswith("סיכום")
+    assert second.startswith("סיכום")
+    assert client.calls == 2
+
+
+def test_map_reduce_summaries_share_the_loop():
+    client = LoopBoundClient()
+    progress = []
+
+    for _ in range(2):
+        summarizer = MapReduceSummarizer(client, max_chunk_tokens=500, max_concurrency=4)
+        summary = summarizer.summarize(long_transcript(), lambda p, message: progress.append(p))
+        assert summary.startswith("סיכום")
+
+    # חלקים רבים ואיחוד בכל אחד משני הסיכומים
+    assert client.calls > 4
+    assert progress and max(progress) <= 0.9
+
+
+class EchoClient:
+    """תשובה ארוכה מהפרומפט - כל סיכום ממלא את תקציב האיחוד לבדו"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content_async(self, prompt: str) -> Response:
+        self.prompts.append(prompt)
+        return Response(prompt)
+
+
+def test_reduce_pairs_summaries_that_each_fill_the_budget():
+    client = EchoClient()
+    summarizer = MapReduceSummarizer(client, max_chunk_tokens=100)
+
+    summary = summarizer.summarize(long_transcript(40))
+
+    # כל שלב ביניים מאחד זוגות עד שנשאר סיכום אחד, שנכנס לבקשת האיחוד האחרונה
+    assert summary == client.prompts[-1]
+    assert "משפט מספר 0 " in summary and "משפט מספר 39 " in summary
@@ -0,0 +1,97 @@
+"""
+מיפוי הזמנים מהאודיו המכווץ (דיבור בלבד) חזרה לזמני ההקלטה המקורית
+"""
+import numpy as np
+import pytest
+
+from utils.segments import TranscriptSegment
+from utils.vad import SpeechMap, VadSettings, detect_speech
+
+SR = 16000
+
+
+@pytest.fixture
+def speech():
+    # קצב דגימה של 100 לחשבון פשוט: דיבור ב-0-1, 3-4 ו-7-7.5 שניות מתוך 10
+    return SpeechMap(np.array([[0, 100], [300, 400], [700, 750]]), 1000, sampling_rate=100)
+
+
+def test_compact_layout(speech):
+    assert speech.compact_starts.tolist() == [0, 100, 200]
+    assert speech.speech_samples == 250
+    assert speech.skipped_fraction == pytest.approx(0.75)
+
+
+def test_region_at_start_keeps_its_times(speech):
+    assert speech.remap(TranscriptSegment(0.0, 0.5, "א")) == TranscriptSegment(0.0, 0.5, "א")
+
+
+def test_gaps_between_regions_are_restored(speech):
+    assert speech.remap(TranscriptSegment(1.2, 1.7, "ב")) == TranscriptSegment(3.2, 3.7, "ב")
+    assert speech.remap(TranscriptSegment(2.1, 2.4, "ג")) == TranscriptSegment(7.1, 7.4, "ג")
+
+
+def test_segment_crossing_a_region_boundary(speech):
+    # מתחיל בקטע הראשון ונגמר בשני - הסיום ממופה לקטע השני, אחרי הפער
+    assert speech.remap(TranscriptSegment(0.8, 1.3, "ד")) == TranscriptSegment(0.8, 3.3, "ד")
+
+
+def test_boundary_times(speech):
+    # סיום בדיוק על הגבול שייך לקטע שלפניו; התחלה בדיוק על הגבול - לקטע שאחריו
+    assert speech.remap(TranscriptSegment(0.5, 1.0, "ה")) == TranscriptSegment(0.5, 1.0, "ה")
+    assert speech.remap(TranscriptSegment(1.0, 1.5, "ו")) == TranscriptSegment(3.0, 3.5, "ו")
+    assert speech.remap(TranscriptSegment(1.5, 2.0, "ז")) == TranscriptSegment(3.5, 4.0, "ז")
+
+
+def test_times_past_the_speech_are_clamped_to_the_last_region(speech):
+    assert speech.remap(TranscriptSegment(2.3, 2.9, "ח")) == TranscriptSegment(7.3, 7.5, "ח")
+
+
+def test_compact_copies_only_speech(speech):
+    audio = np.arange(1000, dtype=np.float32)
+    compact = speech.compact(audio)
+    assert compact.tolist() == list(range(0, 100)) + list(range(300, 400)) + list(range(700, 750))
+
+
+def _recording(seconds: float, bursts):
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(int(seconds * SR)) * 1e-4).astype(np.float32)
+    for start, end in bursts:
+        t = np.arange(int(start * SR), int(end * SR))
+        audio[t] = 0.5 * np.sin(2 * np.pi * 220 * t / SR)
+    return audio
+
+
+def test_padding_is_clamped_at_zero_and_at_the_end():
+    settings = VadSettings(padding_seconds=0.3)
+    audio = _recording(5.0, [(0.0, 0.5), (4.7, 5.0)])
+
+    speech = detect_speech(audio, settings)
+
+    assert speech.regions[0, 0] == 0
+    assert speech.regions[-1, 1] == len(audio)
+    assert len(speech.regions) == 2
+    # השוליים נוספו בצד הפנימי של כל קטע
+    assert speech.regions[0, 1] >= (0.5 + 0.3) * SR
+    assert speech.regions[-1, 0] <= (4.7 - 0.3) * SR
+
+    # תחילת האודיו המכווץ וסופו ממופים לתחילת ההקלטה ולסופה
+    first = speech.remap(TranscriptSegment(0.0, 0.2, "התחלה"))
+    last = speech.remap(TranscriptSegment(speech.speech_samples / SR - 0.2, speech.speech_samples / SR, "סוף"))
+    assert first.start == 0.0
+    assert last.end == pytest.approx(5.0)
+
+
+def test_detected_speech_maps_back_to_the_original_burst():
+    audio = _recording(20.0, [(2.0, 3.0), (12.0, 13.0)])
+    speech = detect_speech(audio, VadSettings())
+    compact = speech.compact(audio)
+    assert speech.skipped_fraction > 0.5
+
+    # המיקום של הדיבור השני באודיו המכווץ, ממופה בחזרה
+    loud = np.flatnonzero(np.abs(compact) > 0.1)
+    second = loud[loud > speech.compact_starts[1]]
+    start = speech.to_original(second[0] / SR)
+    end = speech.to_original((second[-1] + 1) / SR, is_end=True)
+    assert start == pytest.approx(12.0, abs=1e-3)
+    assert end == pytest.approx(13.0, abs=1e-3)
@@ -0,0 +1,56 @@
+"""
+החימום של תהליך הממשק טוען רק את מה שהממשק צריך - לא את ספריות התמלול והסיכום
+"""
+from pathlib import Path
+import json
+import subprocess
+import sys
+
+from utils.warmup import DONE, FAILED, Warmup, get_warmup, start_warmup
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# כמו הצעדים שהממשק מפעיל ב-app.main, בתהליך Python חדש
+CHILD = f"""
+import json, logging, sys
+sys.path.insert(0, {str(SRC)!r})
+from utils.logger import log_system_info
+from utils.warmup import Warmup, import_heavy_modules
+
+logger = logging.getLogger("test")
+warmup = Warmup([
+    ("system", lambda: log_system_info(logger)),
+    ("modules", import_heavy_modules)
+], logger).start()
+assert warmup.wait(60)
+print(json.dumps({{
+    "states": [step.state for step in warmup.status()],
+    "loaded": [name for name in ("torch", "faster_whisper", "google.generativeai", "av")
+               if name in sys.modules]
+}}))
+"""
+
+
+def test_ui_warmup_loads_only_av():
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    assert result["states"] == [DONE, DONE]
+    assert result["loaded"] == ["av"]
+
+
+def test_wait_returns_when_all_steps_finished():
+    def fail():
+        raise ValueError("boom")
+
+    warmup = Warmup([("ok", lambda: None), ("bad", fail)]).start()
+    assert warmup.wait(10)
+    assert [step.state for step in warmup.status()] == [DONE, FAILED]
+
+
+def test_start_warmup_runs_once_per_process():
+    first = start_warmup([("ok", lambda: None)])
+    assert start_warmup([("other", lambda: None)]) is first
+    assert get_warmup() is first
+    assert first.wait(10)